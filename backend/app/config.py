@@ -15,10 +15,75 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str = "sqlite:///./bunker_game.db"
+    DB_WRITE_BATCH_MS: int = 5  # How long the writer waits to batch commits
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+
+    # In-memory game state: how often dirty games are written back, and how
+    # long an untouched game stays cached
+    STATE_FLUSH_INTERVAL_MS: int = 200
+    STATE_IDLE_EVICT_SECONDS: int = 3600
+    # A game's command actor exits after this long without commands
+    GAME_ACTOR_IDLE_SECONDS: int = 60
+
+    # Archiver: ended games move to archived_games after the retention window,
+    # lobbies nobody joined or chatted in for LOBBY_TTL_HOURS are deleted
+    ARCHIVE_RETENTION_HOURS: int = 24
+    LOBBY_TTL_HOURS: int = 6
+    ARCHIVE_INTERVAL_SECONDS: int = 600
+    ARCHIVE_BATCH_SIZE: int = 100
+
+    # Query instrumentation: statements allowed per request/WebSocket message
+    # before a warning (or an error with QUERY_BUDGET_RAISE), with per-endpoint
+    # overrides keyed like "GET /api/games/{game_code}" or "WS request_update".
+    # Running one statement more than QUERY_REPEAT_LIMIT times is flagged as N+1.
+    QUERY_BUDGET: int = 10
+    QUERY_BUDGET_OVERRIDES: dict[str, int] = {}
+    QUERY_REPEAT_LIMIT: int = 3
+    QUERY_BUDGET_RAISE: bool = False
+
+    # WebSocket fan-out: a send slower than this counts as missed; a socket
+    # that misses WS_MAX_MISSED_SENDS in a row, or has more than WS_QUEUE_SIZE
+    # frames waiting, is disconnected
+    WS_SEND_TIMEOUT_MS: int = 1000
+    WS_MAX_MISSED_SENDS: int = 3
+    WS_QUEUE_SIZE: int = 64
+
+    # Liveness: clients quiet for WS_HEARTBEAT_SECONDS get a ping (and must
+    # answer), count as stale after WS_STALE_SECONDS and are dropped after
+    # WS_REAP_SECONDS. WS_PING_* drive protocol-level ping frames (app.server).
+    WS_HEARTBEAT_SECONDS: int = 20
+    WS_STALE_SECONDS: int = 45
+    WS_REAP_SECONDS: int = 75
+    WS_PING_INTERVAL_SECONDS: float = 20.0
+    WS_PING_TIMEOUT_SECONDS: float = 20.0
+
+    # Resume after reconnect: the last WS_REPLAY_SIZE broadcasts of a game are
+    # kept until it has had no sockets for WS_REPLAY_TTL_SECONDS
+    WS_REPLAY_SIZE: int = 128
+    WS_REPLAY_TTL_SECONDS: int = 300
+
+    # permessage-deflate (when served by app.server): a 4 KiB window and
+    # memLevel 5 keep the per-socket zlib state at ~40 KiB instead of ~300 KiB,
+    # and game frames are small enough that a bigger window gains little
+    WS_DEFLATE_WINDOW_BITS: int = 12
+    WS_DEFLATE_MEM_LEVEL: int = 5
+    WS_DEFLATE_LEVEL: int = 6
 
     # Redis (optional)
     REDIS_URL: Optional[str] = None
 
+    # How broadcasts reach sockets on other workers: "memory" (single worker),
+    # "local" (workers on one machine, via a Unix socket at WS_BROKER_SOCKET)
+    # or "redis" (REDIS_URL, which has to be set as well).
+    WS_BROKER: str = "memory"
+    WS_BROKER_SOCKET: str = "/tmp/bunker-game-ws.sock"
+    # Every worker keeps its own authoritative copy of the games it serves, so
+    # a cross-worker broker is only allowed once something in front of the
+    # workers routes all requests for a game to the same one. Set this to
+    # confirm such routing exists.
+    WS_GAME_AFFINITY: bool = False
+
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
     JWT_ALGORITHM: str = "HS256"
@@ -1,12 +1,42 @@
 """Database configuration and session management"""
 
-from sqlalchemy import create_engine
+import importlib.util
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from typing import AsyncGenerator, Generator
 from .config import settings
+from .migrations import apply_migrations
 from .models import Base
+from .query_stats import instrument
+
+
+def get_async_database_url(url: str) -> str:
+    """Map a sync database URL to its asyncio driver"""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgresql:"):
+        if importlib.util.find_spec("asyncpg") is None:
+            raise RuntimeError(
+                "A postgresql DATABASE_URL needs the asyncpg package: "
+                "pip install asyncpg"
+            )
+        return url.replace("postgresql:", "postgresql+asyncpg:", 1)
+    return url
+
 
-# Create engine
+def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Per-connection SQLite tuning: WAL lets readers run alongside the writer"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+    cursor.close()
+
+
+# Create engine (sync, for scripts and maintenance)
 engine = create_engine(
     settings.DATABASE_URL,
     connect_args={"check_same_thread": False}
@@ -14,13 +44,28 @@ engine = create_engine(
     else {},
 )
 
-# Create session factory
+# Create async engine used by request handlers
+async_engine = create_async_engine(get_async_database_url(settings.DATABASE_URL))
+
+if "sqlite" in settings.DATABASE_URL:
+    event.listen(engine, "connect", set_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", set_sqlite_pragmas)
+
+instrument(engine)
+instrument(async_engine.sync_engine)
+
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
 
 
-def init_db() -> None:
-    """Initialize database tables"""
-    Base.metadata.create_all(bind=engine)
+async def init_db() -> None:
+    """Initialize database tables and apply pending migrations"""
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(apply_migrations)
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -30,3 +75,18 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency for getting an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_async_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    """Dependency for handlers that open their own short-lived sessions
+
+    WebSocket handlers live as long as the socket, so they must not hold a
+    session (and its pooled connection) from a ``get_async_db`` dependency.
+    """
+    return AsyncSessionLocal
@@ -1,19 +1,31 @@
 """Main FastAPI application"""
 
 from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
 
+from . import query_stats
 from .config import settings
-from .database import init_db
+from .database import AsyncSessionLocal, async_engine, init_db
 from .routers import games_router, chat_router
-from .websockets import websocket_router
+from .services import (
+    db_writer,
+    game_actors,
+    game_archiver,
+    game_store,
+    phase_scheduler,
+)
+from .websockets import manager, websocket_router
 
 # Create FastAPI app
 app = FastAPI(
-    title=settings.APP_NAME, version=settings.APP_VERSION, debug=settings.DEBUG
+    title=settings.APP_NAME,
+    version=settings.APP_VERSION,
+    debug=settings.DEBUG,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS middleware
@@ -26,11 +38,39 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def count_queries(request: Request, call_next):
+    """Count SQL issued per request; expose it as headers in debug mode"""
+    with query_stats.track(request.method) as stats:
+        response = await call_next(request)
+        # Route templates only: raw paths would add a label per URL requested
+        route = request.scope.get("route")
+        stats.label = f"{request.method} {getattr(route, 'path', '<unmatched>')}"
+    if settings.DEBUG:
+        response.headers.update(stats.headers())
+    return response
+
+
 # Initialize database on startup
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database tables"""
-    init_db()
+    """Initialize database tables and start the background tasks"""
+    await init_db()
+    await game_store.start()
+    await game_archiver.start(async_engine)
+    await phase_scheduler.start(AsyncSessionLocal)
+    await manager.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Persist in-memory game state before exiting"""
+    await manager.stop()
+    await phase_scheduler.stop()
+    await game_actors.stop()
+    await game_archiver.stop()
+    await game_store.stop()
+    await db_writer.stop()
 
 
 # Include routers
@@ -80,3 +120,19 @@ async def game_page(request: Request, game_code: str):
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "app": settings.APP_NAME}
+
+
+@app.get("/metrics/connections")
+async def connection_metrics():
+    """Open WebSockets per game, split by whether the client was heard lately"""
+    return {
+        "games": manager.connection_counts(),
+        "evicted": manager.evicted_count,
+        "reaped": manager.reaped_count,
+    }
+
+
+@app.get("/metrics/queries")
+async def query_metrics():
+    """SQL statements, DB time and rows hydrated per endpoint since startup"""
+    return query_stats.snapshot()
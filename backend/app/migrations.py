@@ -0,0 +1,76 @@
+"""Versioned SQL migrations
+
+Files in ``backend/migrations`` named ``NNN_description.sql`` are applied in
+order and recorded in the ``schema_migrations`` table. Versions up to
+``BASELINE_VERSION`` predate this runner and are already covered by
+``Base.metadata.create_all``, so they are only recorded, not executed.
+"""
+
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+MIGRATIONS_DIR = Path(__file__).parent.parent / "migrations"
+BASELINE_VERSION = "001"
+
+
+def get_migration_files() -> List[Path]:
+    """All migration files, oldest first"""
+    return sorted(MIGRATIONS_DIR.glob("[0-9][0-9][0-9]_*.sql"))
+
+
+def split_statements(sql: str) -> List[str]:
+    """Split a migration file into statements, dropping ``--`` comments"""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    return [stmt.strip() for stmt in "\n".join(lines).split(";") if stmt.strip()]
+
+
+def apply_migrations(connection: Connection) -> List[str]:
+    """Apply pending migrations on a sync connection
+
+    Returns:
+        Versions applied by this call
+    """
+    connection.execute(
+        text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version VARCHAR(16) PRIMARY KEY, applied_at TIMESTAMP NOT NULL)"
+        )
+    )
+    applied = set(
+        connection.execute(text("SELECT version FROM schema_migrations")).scalars()
+    )
+
+    newly_applied = []
+    for path in get_migration_files():
+        version = path.name.split("_", 1)[0]
+        if version in applied:
+            continue
+
+        if version > BASELINE_VERSION:
+            for statement in split_statements(path.read_text(encoding="utf-8")):
+                connection.exec_driver_sql(statement)
+            newly_applied.append(version)
+
+        connection.execute(
+            text(
+                "INSERT INTO schema_migrations (version, applied_at) "
+                "VALUES (:version, :applied_at)"
+            ),
+            {"version": version, "applied_at": datetime.utcnow()},
+        )
+
+    return newly_applied
+
+
+if __name__ == "__main__":
+    from .database import engine
+    from .models import Base
+
+    with engine.begin() as conn:
+        Base.metadata.create_all(conn)
+        versions = apply_migrations(conn)
+    print(f"Applied migrations: {', '.join(versions) or 'none'}")
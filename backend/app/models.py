@@ -7,9 +7,11 @@ from sqlalchemy import (
     Boolean,
     DateTime,
     ForeignKey,
+    Index,
     Enum as SQLEnum,
     Text,
     JSON,
+    LargeBinary,
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -100,6 +102,10 @@ class Player(Base):
     """Player model"""
 
     __tablename__ = "players"
+    __table_args__ = (
+        Index("ix_players_game_id_session_id", "game_id", "session_id"),
+        Index("ix_players_game_id_status", "game_id", "status"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     game_id = Column(Integer, ForeignKey("games.id"), nullable=True)
@@ -145,6 +151,9 @@ class ChatMessage(Base):
     """Chat message model"""
 
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        Index("ix_chat_messages_game_id_timestamp", "game_id", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     game_id = Column(Integer, ForeignKey("games.id"), nullable=False)
@@ -155,3 +164,24 @@ class ChatMessage(Base):
     # Relationships
     game = relationship("Game", back_populates="messages")
     player = relationship("Player", back_populates="messages")
+
+
+class ArchivedGame(Base):
+    """Finished game moved out of the hot tables
+
+    ``payload`` is the zlib-compressed JSON of the game row, its players and
+    its chat history.
+    """
+
+    __tablename__ = "archived_games"
+
+    id = Column(Integer, primary_key=True)  # Original games.id
+    code = Column(String(6), nullable=False, index=True)
+    mode = Column(SQLEnum(GameMode), nullable=False)
+    created_at = Column(DateTime, nullable=True)
+    ended_at = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    player_count = Column(Integer, default=0)
+    message_count = Column(Integer, default=0)
+    raw_size = Column(Integer, default=0)  # Bytes before compression
+    payload = Column(LargeBinary, nullable=False)
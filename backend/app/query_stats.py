@@ -0,0 +1,181 @@
+"""Per-request SQL instrumentation
+
+Engine events count statements, time spent in the driver and ORM rows
+hydrated for whatever unit of work is current - an HTTP request or a single
+WebSocket message. Totals are kept per endpoint for the metrics route, and a
+unit that issues more statements than its budget, or the same statement over
+and over (the N+1 pattern), is reported - or fails, when
+``QUERY_BUDGET_RAISE`` is on, as it is in the tests.
+"""
+
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import settings
+from .models import Base
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised when a unit of work issues more statements than allowed"""
+
+
+@dataclass
+class QueryStats:
+    """Statements issued by one request or WebSocket message"""
+
+    label: str
+    statements: int = 0
+    db_time: float = 0.0
+    rows: int = 0
+    queries: List[str] = field(default_factory=list)
+
+    @property
+    def budget(self) -> int:
+        return settings.QUERY_BUDGET_OVERRIDES.get(self.label, settings.QUERY_BUDGET)
+
+    def headers(self) -> Dict[str, str]:
+        return {
+            "X-DB-Queries": str(self.statements),
+            "X-DB-Time-Ms": f"{self.db_time * 1000:.2f}",
+            "X-DB-Rows": str(self.rows),
+        }
+
+
+@dataclass
+class EndpointMetrics:
+    """Running totals for one endpoint"""
+
+    calls: int = 0
+    statements: int = 0
+    max_statements: int = 0
+    db_time: float = 0.0
+    rows: int = 0
+    over_budget: int = 0
+    repeated: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "statements": self.statements,
+            "avg_statements": round(self.statements / self.calls, 2)
+            if self.calls
+            else 0,
+            "max_statements": self.max_statements,
+            "db_time_ms": round(self.db_time * 1000, 2),
+            "rows": self.rows,
+            "over_budget": self.over_budget,
+            "repeated": self.repeated,
+        }
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+metrics: Dict[str, EndpointMetrics] = {}
+
+
+def current() -> Optional[QueryStats]:
+    """Stats of the unit of work running in this context, if any"""
+    return _current.get()
+
+
+@contextmanager
+def attribute_to(stats: Optional[QueryStats]):
+    """Count statements run inside the block against ``stats``
+
+    Used by the database writer so batched writes are charged to the
+    request that submitted them.
+    """
+    token = _current.set(stats)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def track(label: str):
+    """Collect stats for one request/message and check them against the budget"""
+    stats = QueryStats(label)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+    record(stats)
+
+
+def record(stats: QueryStats) -> None:
+    """Add finished stats to the endpoint totals and enforce the budget"""
+    totals = metrics.setdefault(stats.label, EndpointMetrics())
+    totals.calls += 1
+    totals.statements += stats.statements
+    totals.max_statements = max(totals.max_statements, stats.statements)
+    totals.db_time += stats.db_time
+    totals.rows += stats.rows
+
+    problems = []
+    if stats.statements > stats.budget:
+        totals.over_budget += 1
+        problems.append(f"{stats.statements} queries (budget {stats.budget})")
+    if stats.queries:
+        statement, count = Counter(stats.queries).most_common(1)[0]
+        if count > settings.QUERY_REPEAT_LIMIT:
+            totals.repeated += 1
+            problems.append(f"same query {count} times: {statement[:80]}")
+    if not problems:
+        return
+
+    message = f"{stats.label} issued " + "; ".join(problems)
+    if settings.QUERY_BUDGET_RAISE:
+        raise QueryBudgetExceeded(message)
+    print(f"WARNING: {message}")
+
+
+def snapshot() -> Dict[str, dict]:
+    """Endpoint totals for the metrics route"""
+    return {label: totals.to_dict() for label, totals in sorted(metrics.items())}
+
+
+def reset() -> None:
+    metrics.clear()
+
+
+# ==================== Engine hooks ====================
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info["query_start"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    stats.statements += 1
+    stats.db_time += time.perf_counter() - conn.info.pop(
+        "query_start", time.perf_counter()
+    )
+    stats.queries.append(" ".join(statement.split()))
+
+
+def _on_load(target, context):
+    stats = _current.get()
+    if stats is not None:
+        stats.rows += 1
+
+
+def instrument(engine: Engine) -> None:
+    """Attach the statement counters to an engine (pass ``sync_engine`` for async)"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+event.listen(Base, "load", _on_load, propagate=True)
@@ -1,25 +1,30 @@
 """Game API routes"""
 
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime, timedelta
+from fastapi.responses import ORJSONResponse, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Optional
 import secrets
 
-from ..database import get_db
+from ..database import get_async_db
 from ..schemas import (
+    AdvancePhaseRequest,
     GameCreate,
     GameResponse,
     GameJoin,
-    PlayerResponse,
     VoteRequest,
     CharacterTraits,
     RevealCardRequest,
     UseSpecialRequest,
 )
-from ..models import Game, Player, GamePhase, PlayerStatus
-from ..services import GameService
-from ..game_logic import get_bunker_capacity
+from ..services import (
+    GameService,
+    announce_phase,
+    game_actors,
+    game_store,
+    get_snapshot,
+)
+from ..services.player_actions import ActionError, PlayerActions
 
 router = APIRouter(prefix="/api/games", tags=["games"])
 
@@ -35,51 +40,69 @@ def get_session_id(request: Request) -> str:
     return session_id
 
 
+async def run_action(action, db: AsyncSession, game, player, data):
+    """Run a player action on the game's actor, answering refusals with their
+    HTTP status"""
+
+    async def command():
+        return await action(db, game, player, data)
+
+    try:
+        return await game_actors.submit(game.id, command)
+    except ActionError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag from the version counters a response depends on"""
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def cache_headers(etag: str) -> Dict[str, str]:
+    # Responses depend on the session cookie and must be revalidated every time
+    return {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Cookie"}
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """``304 Not Modified`` if the client already has this version"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    if etag in tags or "*" in tags:
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag)
+        )
+    return None
+
+
 @router.post(
     "/create", response_model=GameResponse, status_code=status.HTTP_201_CREATED
 )
 async def create_game(
-    game_data: GameCreate, request: Request, db: Session = Depends(get_db)
+    game_data: GameCreate, request: Request, db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new game lobby"""
     session_id = get_session_id(request)
 
-    game, player = GameService.create_game(
+    game, player = await GameService.create_game(
         db, game_data.player_name, session_id, mode=game_data.mode, goal=game_data.goal
     )
 
-    # Prepare response
-    player_response = PlayerResponse.model_validate(player)
-    player_response.is_me = True
-
-    response_data = GameResponse(
-        id=game.id,
-        code=game.code,
-        phase=game.phase,
-        current_round=game.current_round,
-        phase_end_time=game.phase_end_time,
-        player_count=1,
-        players=[player_response],
-        mode=game.mode,
-        goal=game.goal,
-        catastrophe=game.catastrophe,
-        bunker_cards=game.bunker_cards,
-        revealed_bunker_cards=game.revealed_bunker_cards,
-        initial_player_count=1,
-        bunker_capacity=None,  # Will be calculated when game starts
+    return ORJSONResponse(
+        get_snapshot(game).for_viewer(player.id),
+        status_code=status.HTTP_201_CREATED,
     )
 
-    return response_data
-
 
 @router.post("/join", response_model=GameResponse)
 async def join_game(
-    join_data: GameJoin, request: Request, db: Session = Depends(get_db)
+    join_data: GameJoin, request: Request, db: AsyncSession = Depends(get_async_db)
 ):
     """Join an existing game"""
     session_id = get_session_id(request)
 
-    game, player = GameService.join_game(
+    game, player = await GameService.join_game(
         db, join_data.code, join_data.player_name, session_id
     )
 
@@ -89,149 +112,57 @@ async def join_game(
             detail="Game not found or cannot join",
         )
 
-    # Get all players
-    players = db.query(Player).filter(Player.game_id == game.id).all()
-
-    player_responses = []
-    for p in players:
-        p_resp = PlayerResponse.model_validate(p)
-        is_me = p.session_id == session_id
-        p_resp.is_me = is_me
-
-        # Ensure revealed_cards is a list
-        revealed = p.revealed_cards if p.revealed_cards else []
-
-        if not is_me and p.status == PlayerStatus.PLAYING:
-            # Hide unrevealed cards
-            if "profession" not in revealed:
-                p_resp.profession = None
-            if "biology" not in revealed:
-                p_resp.biology = None
-            if "health" not in revealed:
-                p_resp.health = None
-            if "hobby" not in revealed:
-                p_resp.hobby = None
-            if "baggage" not in revealed:
-                p_resp.baggage = None
-            if "fact" not in revealed:
-                p_resp.fact = None
-            p_resp.special_condition = None
-            p_resp.threat_card = None
-
-        player_responses.append(p_resp)
-
-    # Calculate initial_player_count and bunker_capacity
-    initial_player_count = len(players)
-    bunker_cap = (
-        get_bunker_capacity(initial_player_count) if initial_player_count >= 4 else None
-    )
-
-    response_data = GameResponse(
-        id=game.id,
-        code=game.code,
-        phase=game.phase,
-        current_round=game.current_round,
-        phase_end_time=game.phase_end_time,
-        player_count=len(players),
-        players=player_responses,
-        mode=game.mode,
-        goal=game.goal,
-        catastrophe=game.catastrophe,
-        bunker_cards=game.bunker_cards,
-        revealed_bunker_cards=game.revealed_bunker_cards,
-        initial_player_count=initial_player_count,
-        bunker_capacity=bunker_cap,
-    )
+    response = ORJSONResponse(get_snapshot(game).for_viewer(player.id))
 
     # Broadcast player joined via WebSocket
     from ..websockets.connection_manager import manager
 
     await manager.send_player_joined(game.id, player.name)
 
-    return response_data
+    return response
 
 
 @router.get("/{game_code}", response_model=GameResponse)
-async def get_game(game_code: str, request: Request, db: Session = Depends(get_db)):
+async def get_game(
+    game_code: str, request: Request, db: AsyncSession = Depends(get_async_db)
+):
     """Get game details by code"""
     session_id = get_session_id(request)
-    game = db.query(Game).filter(Game.code == game_code.upper()).first()
+    game = await game_store.get_by_code(db, game_code)
 
     if not game:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Game not found"
         )
 
-    players = db.query(Player).filter(Player.game_id == game.id).all()
-
-    player_responses = []
-    for p in players:
-        p_resp = PlayerResponse.model_validate(p)
-        is_me = p.session_id == session_id
-        p_resp.is_me = is_me
-
-        # Always ensure revealed_cards is a list (not None)
-        p_resp.revealed_cards = p.revealed_cards if p.revealed_cards else []
-        revealed = p_resp.revealed_cards
-
-        if not is_me and p.status == PlayerStatus.PLAYING:
-            # Hide unrevealed cards
-            if "profession" not in revealed:
-                p_resp.profession = None
-            if "biology" not in revealed:
-                p_resp.biology = None
-            if "health" not in revealed:
-                p_resp.health = None
-            if "hobby" not in revealed:
-                p_resp.hobby = None
-            if "baggage" not in revealed:
-                p_resp.baggage = None
-            if "fact" not in revealed:
-                p_resp.fact = None
-            p_resp.special_condition = None
-            p_resp.threat_card = None
-
-        player_responses.append(p_resp)
-
-    # Calculate initial_player_count and bunker_capacity
-    initial_player_count = len(players)
-    bunker_cap = (
-        get_bunker_capacity(initial_player_count) if initial_player_count >= 4 else None
-    )
+    viewer = game.player_by_session(session_id)
+    viewer_id = viewer.id if viewer else None
 
-    response_data = GameResponse(
-        id=game.id,
-        code=game.code,
-        phase=game.phase,
-        current_round=game.current_round,
-        phase_end_time=game.phase_end_time,
-        player_count=len(players),
-        players=player_responses,
-        mode=game.mode,
-        goal=game.goal,
-        catastrophe=game.catastrophe,
-        bunker_cards=game.bunker_cards,
-        revealed_bunker_cards=game.revealed_bunker_cards,
-        initial_player_count=initial_player_count,
-        bunker_capacity=bunker_cap,
-    )
+    etag = make_etag(game.generation, game.version, viewer_id or 0)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
 
-    return response_data
+    return ORJSONResponse(
+        get_snapshot(game).for_viewer(viewer_id), headers=cache_headers(etag)
+    )
 
 
 @router.post("/{game_id}/start")
-async def start_game(game_id: int, request: Request, db: Session = Depends(get_db)):
+async def start_game(
+    game_id: int, request: Request, db: AsyncSession = Depends(get_async_db)
+):
     """Start the game (host only)"""
     session_id = get_session_id(request)
 
     # Verify host
-    game = db.query(Game).filter(Game.id == game_id).first()
+    game = await game_store.get(db, game_id)
     if not game:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Game not found"
         )
 
-    host = db.query(Player).filter(Player.id == game.host_id).first()
+    host = game.players.get(game.host_id)
 
     # Debug logging
     print(f"DEBUG: start_game game_id={game_id} session_id={session_id}")
@@ -245,7 +176,9 @@ async def start_game(game_id: int, request: Request, db: Session = Depends(get_d
             status_code=status.HTTP_403_FORBIDDEN, detail="Only host can start game"
         )
 
-    success = GameService.start_game(db, game_id)
+    success = await game_actors.submit(
+        game_id, lambda: GameService.start_game(db, game_id)
+    )
 
     if not success:
         raise HTTPException(
@@ -253,9 +186,6 @@ async def start_game(game_id: int, request: Request, db: Session = Depends(get_d
             detail="Cannot start game (not enough players or already started)",
         )
 
-    # Refresh game to get updated data
-    db.refresh(game)
-
     # Log phase and timer info
     print(
         f"DEBUG: Game started - phase={game.phase.value}, phase_end_time={game.phase_end_time}"
@@ -279,120 +209,75 @@ async def vote(
     game_id: int,
     vote_data: VoteRequest,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Vote to eliminate a player"""
     session_id = get_session_id(request)
 
     # Get voter
-    voter = (
-        db.query(Player)
-        .filter(Player.game_id == game_id, Player.session_id == session_id)
-        .first()
-    )
+    game = await game_store.get(db, game_id)
+    voter = game.player_by_session(session_id) if game else None
 
     if not voter:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Player not found"
         )
 
-    success = GameService.vote_player(db, game_id, voter.id, vote_data.target_player_id)
-
-    if not success:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cannot vote now or already voted",
-        )
-
-    # Broadcast vote update via WebSocket
-    from ..websockets.connection_manager import manager
-
-    # Get updated vote counts
-    players = db.query(Player).filter(Player.game_id == game_id).all()
-    votes = {
-        p.id: {
-            "name": p.name,
-            "votes_received": p.votes_received,
-            "has_voted": p.has_voted,
-        }
-        for p in players
-    }
-
-    await manager.send_vote_update(game_id, votes)
-
-    return {"message": "Vote registered"}
+    return await run_action(PlayerActions.vote, db, game, voter, vote_data)
 
 
-# Rate limiting for phase advancement
-_last_phase_advance = {}  # game_id -> datetime
+@router.post("/{game_id}/advance-phase")
+async def advance_phase(
+    game_id: int,
+    data: AdvancePhaseRequest,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Skip to the next game phase (expired timers are advanced by the scheduler)
 
+    Send the ``expected_phase``/``expected_round`` you saw: a retry or a second
+    click that arrives after the game moved on changes nothing and just gets
+    the current phase back, with ``advanced`` false.
+    """
 
-@router.post("/{game_id}/advance-phase")
-async def advance_phase(game_id: int, db: Session = Depends(get_db)):
-    """Advance to next game phase (called by timer or host)"""
-    global _last_phase_advance
-
-    # Rate limiting: prevent calling within 5 seconds of last call
-    now = datetime.utcnow()
-    last_call = _last_phase_advance.get(game_id)
-    if last_call and (now - last_call).total_seconds() < 5:
-        print(
-            f"DEBUG: Ignoring duplicate advance_phase call for game {game_id} (rate limited)"
+    async def command():
+        result = await GameService.advance_phase(
+            db, game_id, data.expected_phase, data.expected_round
         )
-        return {"message": "Rate limited", "phase": "unchanged"}
-
-    _last_phase_advance[game_id] = now
+        if result and result["advanced"]:
+            # Broadcast phase change via WebSocket
+            await announce_phase(await game_store.get(db, game_id), result)
+        return result
 
-    result = GameService.advance_phase(db, game_id)
+    result = await game_actors.submit(game_id, command)
 
     if not result:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Game not found"
         )
 
-    # Get updated game info
-    game = db.query(Game).filter(Game.id == game_id).first()
-
-    # Broadcast phase change via WebSocket
-    from ..websockets.connection_manager import manager
-
-    # Send elimination notification first (if any)
-    if result.get("eliminated_player"):
-        eliminated = result["eliminated_player"]
-        await manager.send_player_eliminated(
-            game_id, eliminated["id"], eliminated["name"], eliminated["revealed_cards"]
-        )
-
-    await manager.send_phase_change(
-        game_id,
-        game.phase.value,
-        game.phase_end_time.isoformat() + "Z" if game.phase_end_time else None,
-        game.current_round,
-    )
-
-    # Also broadcast bunker card if it was revealed
-    if game.phase == GamePhase.CARD_REVEAL:
-        await manager.send_bunker_card_revealed(game_id, game.revealed_bunker_cards)
+    game = await game_store.get(db, game_id)
+    if not result["advanced"]:
+        print(f"DEBUG: advance_phase for game {game_id} lost the race, phase unchanged")
 
     return {
-        "phase": result["phase"].value
-        if hasattr(result["phase"], "value")
-        else result["phase"]
+        "phase": game.phase.value,
+        "current_round": game.current_round,
+        "phase_end_time": game.phase_end_time.isoformat() + "Z"
+        if game.phase_end_time
+        else None,
+        "advanced": result["advanced"],
     }
 
 
 @router.get("/{game_id}/my-character", response_model=CharacterTraits)
 async def get_my_character(
-    game_id: int, request: Request, db: Session = Depends(get_db)
+    game_id: int, request: Request, db: AsyncSession = Depends(get_async_db)
 ):
     """Get current player's character traits"""
     session_id = get_session_id(request)
 
-    player = (
-        db.query(Player)
-        .filter(Player.game_id == game_id, Player.session_id == session_id)
-        .first()
-    )
+    game = await game_store.get(db, game_id)
+    player = game.player_by_session(session_id) if game else None
 
     if not player:
         raise HTTPException(
@@ -404,7 +289,12 @@ async def get_my_character(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Game not started yet"
         )
 
-    return CharacterTraits(
+    etag = make_etag(game.generation, game.version, player.id)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
+    traits = CharacterTraits(
         profession=player.profession,
         biology=player.biology,
         health=player.health,
@@ -414,18 +304,18 @@ async def get_my_character(
         special_condition=player.special_condition,
         revealed_cards=player.revealed_cards or [],
     )
+    return ORJSONResponse(traits.model_dump(mode="json"), headers=cache_headers(etag))
 
 
 @router.post("/{game_id}/ready")
-async def toggle_ready(game_id: int, request: Request, db: Session = Depends(get_db)):
+async def toggle_ready(
+    game_id: int, request: Request, db: AsyncSession = Depends(get_async_db)
+):
     """Toggle player ready status"""
     session_id = get_session_id(request)
 
-    player = (
-        db.query(Player)
-        .filter(Player.game_id == game_id, Player.session_id == session_id)
-        .first()
-    )
+    game = await game_store.get(db, game_id)
+    player = game.player_by_session(session_id) if game else None
 
     if not player:
         raise HTTPException(
@@ -434,13 +324,15 @@ async def toggle_ready(game_id: int, request: Request, db: Session = Depends(get
 
     from ..models import PlayerStatus
 
-    player.status = (
-        PlayerStatus.READY
-        if player.status == PlayerStatus.WAITING
-        else PlayerStatus.WAITING
-    )
+    async def command():
+        player.status = (
+            PlayerStatus.READY
+            if player.status == PlayerStatus.WAITING
+            else PlayerStatus.WAITING
+        )
+        game_store.mark_dirty(game)
 
-    db.commit()
+    await game_actors.submit(game.id, command)
 
     return {"status": player.status}
 
@@ -450,43 +342,21 @@ async def reveal_card(
     game_id: int,
     card_data: RevealCardRequest,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Reveal a player's card"""
     session_id = get_session_id(request)
 
     # Get player
-    player = (
-        db.query(Player)
-        .filter(Player.game_id == game_id, Player.session_id == session_id)
-        .first()
-    )
+    game = await game_store.get(db, game_id)
+    player = game.player_by_session(session_id) if game else None
 
     if not player:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Player not found"
         )
 
-    success = GameService.reveal_player_card(
-        db, game_id, player.id, card_data.card_type
-    )
-
-    if not success:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot reveal this card"
-        )
-
-    # Get card value to broadcast
-    card_value = getattr(player, card_data.card_type, None)
-
-    # Broadcast to other players
-    from ..websockets.connection_manager import manager
-
-    await manager.send_player_revealed_card(
-        game_id, player.id, player.name, card_data.card_type, card_value
-    )
-
-    return {"message": "Card revealed", "card_type": card_data.card_type}
+    return await run_action(PlayerActions.reveal_card, db, game, player, card_data)
 
 
 @router.post("/{game_id}/use-special")
@@ -494,60 +364,18 @@ async def use_special_condition(
     game_id: int,
     special_data: UseSpecialRequest,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Use player's special condition"""
     session_id = get_session_id(request)
 
     # Get player
-    player = (
-        db.query(Player)
-        .filter(Player.game_id == game_id, Player.session_id == session_id)
-        .first()
-    )
+    game = await game_store.get(db, game_id)
+    player = game.player_by_session(session_id) if game else None
 
     if not player:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Player not found"
         )
 
-    if not player.special_condition:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="No special condition"
-        )
-
-    if player.special_used:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Special condition already used",
-        )
-
-    # Execute special condition
-    from ..services.special_conditions import SpecialConditionHandler
-
-    params = special_data.dict(exclude_unset=True)
-    result = SpecialConditionHandler.execute(db, game_id, player.id, params)
-
-    if not result.get("success"):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=result.get("message", "Failed to use special condition"),
-        )
-
-    # Broadcast to other players
-    from ..websockets.connection_manager import manager
-
-    await manager.send_special_card_used(
-        game_id, player.name, player.special_condition.get("name")
-    )
-
-    # Refresh player to get updated data
-    db.refresh(player)
-
-    return {
-        "message": result.get("message"),
-        "effect": result.get("effect"),
-        "data": {
-            k: v for k, v in result.items() if k not in ["success", "message", "effect"]
-        },
-    }
+    return await run_action(PlayerActions.use_special, db, game, player, special_data)
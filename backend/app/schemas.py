@@ -94,6 +94,10 @@ class GameResponse(BaseModel):
     initial_player_count: Optional[int] = None
     bunker_capacity: Optional[int] = None
 
+    # State version for delta sync over WebSocket
+    version: int = 0
+    generation: Optional[str] = None
+
     class Config:
         from_attributes = True
 
@@ -159,6 +163,18 @@ class UseSpecialRequest(BaseModel):
     guess: Optional[str] = None
 
 
+class AdvancePhaseRequest(BaseModel):
+    """Schema for advancing the phase
+
+    The phase and round the caller saw; if the game is no longer there, the
+    request is a no-op that returns the current phase. Both are required, so
+    a bare POST can't skip whatever phase the game happens to be in.
+    """
+
+    expected_phase: GamePhase
+    expected_round: int
+
+
 class CharacterTraits(BaseModel):
     """Schema for character traits"""
 
@@ -0,0 +1,70 @@
+"""Run the app under uvicorn with tuned WebSocket compression and pings
+
+    python -m backend.app.server --host 0.0.0.0 --port 8765
+
+uvicorn's own CLI negotiates permessage-deflate with zlib defaults (32 KiB
+window, memLevel 8) for every socket; this entry point uses the
+WS_DEFLATE_* settings instead, and the WS_PING_* settings for the protocol
+level pings that close half-open connections.
+
+It runs a single worker: game state lives in the worker's memory, and
+uvicorn's workers share one port with no way to keep a game on one of them.
+"""
+
+import argparse
+
+import uvicorn
+from uvicorn.protocols.websockets.websockets_impl import WebSocketProtocol
+from websockets.extensions.permessage_deflate import ServerPerMessageDeflateFactory
+
+from .config import settings
+
+
+def deflate_factory() -> ServerPerMessageDeflateFactory:
+    """permessage-deflate offer built from the WS_DEFLATE_* settings"""
+    return ServerPerMessageDeflateFactory(
+        server_max_window_bits=settings.WS_DEFLATE_WINDOW_BITS,
+        client_max_window_bits=settings.WS_DEFLATE_WINDOW_BITS,
+        compress_settings={
+            "memLevel": settings.WS_DEFLATE_MEM_LEVEL,
+            "level": settings.WS_DEFLATE_LEVEL,
+        },
+    )
+
+
+class TunedWebSocketProtocol(WebSocketProtocol):
+    """uvicorn's websockets protocol with our deflate settings"""
+
+    def __init__(self, config, *args, **kwargs):
+        super().__init__(config, *args, **kwargs)
+        if config.ws_per_message_deflate:
+            self.available_extensions = [deflate_factory()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=settings.APP_NAME)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--reload", action="store_true")
+    args = parser.parse_args()
+    if args.workers != 1:
+        parser.error(
+            "--workers must be 1: each worker would hold its own copy of a game "
+            "and requests for it aren't routed to one worker"
+        )
+
+    uvicorn.run(
+        f"{__package__}.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        reload=args.reload,
+        ws=TunedWebSocketProtocol,
+        ws_ping_interval=settings.WS_PING_INTERVAL_SECONDS,
+        ws_ping_timeout=settings.WS_PING_TIMEOUT_SECONDS,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,30 @@
 """Services package"""
 
+from .archiver import ArchiveReport, GameArchiver, game_archiver
+from .db_writer import DatabaseWriter, db_writer
+from .game_actor import GameActors, game_actors
 from .game_service import GameService
+from .game_snapshot import GameSnapshot, get_snapshot
+from .game_state import GameStateStore, game_store
+from .phase_scheduler import PhaseScheduler, announce_phase, phase_scheduler
+from .player_actions import ActionError, PlayerActions
 
-__all__ = ["GameService"]
+__all__ = [
+    "ArchiveReport",
+    "GameArchiver",
+    "game_archiver",
+    "DatabaseWriter",
+    "db_writer",
+    "GameActors",
+    "game_actors",
+    "GameService",
+    "GameSnapshot",
+    "get_snapshot",
+    "GameStateStore",
+    "game_store",
+    "PhaseScheduler",
+    "announce_phase",
+    "phase_scheduler",
+    "ActionError",
+    "PlayerActions",
+]
@@ -0,0 +1,243 @@
+"""Archival of ended games and purge of abandoned lobbies
+
+Ended games are moved, with their players and chat, into ``archived_games``
+as one compressed JSON blob once ``ARCHIVE_RETENTION_HOURS`` have passed.
+Lobbies with no joins or chat for ``LOBBY_TTL_HOURS`` are deleted outright.
+Each pass runs as a single job on the database writer.
+"""
+
+import asyncio
+import json
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, exists, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from ..config import settings
+from ..models import ArchivedGame, ChatMessage, Game, GamePhase, Player
+from .db_writer import db_writer
+from .game_state import game_store
+
+
+@dataclass
+class ArchiveReport:
+    """What one archiver pass removed from the hot tables"""
+
+    games_archived: int = 0
+    lobbies_purged: int = 0
+    players_deleted: int = 0
+    messages_deleted: int = 0
+    bytes_removed: int = 0  # JSON size of every removed row
+    bytes_stored: int = 0  # Compressed size written to archived_games
+
+    @property
+    def bytes_reclaimed(self) -> int:
+        return self.bytes_removed - self.bytes_stored
+
+    @property
+    def rows_reclaimed(self) -> int:
+        return (
+            self.games_archived
+            + self.lobbies_purged
+            + self.players_deleted
+            + self.messages_deleted
+        )
+
+
+def row_to_dict(row) -> Dict[str, Any]:
+    """Column values of an ORM row"""
+    return {c.name: getattr(row, c.name) for c in row.__table__.columns}
+
+
+def encode(data: Any) -> bytes:
+    return json.dumps(data, default=str, ensure_ascii=False).encode("utf-8")
+
+
+class GameArchiver:
+    """Moves stale games out of ``games``/``players``/``chat_messages``"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(
+        self, bind: AsyncEngine, now: Optional[datetime] = None
+    ) -> ArchiveReport:
+        """Archive and purge one batch of stale games"""
+        now = now or datetime.utcnow()
+
+        async def job(session: AsyncSession) -> ArchiveReport:
+            return await self._archive(session, now)
+
+        report = await db_writer.submit(bind, job)
+        if report.rows_reclaimed:
+            print(
+                f"Archiver: archived {report.games_archived} games, "
+                f"purged {report.lobbies_purged} lobbies, "
+                f"removed {report.rows_reclaimed} rows, "
+                f"reclaimed ~{report.bytes_reclaimed} bytes"
+            )
+        return report
+
+    async def _archive(self, session: AsyncSession, now: datetime) -> ArchiveReport:
+        report = ArchiveReport()
+        ended_cutoff = now - timedelta(hours=settings.ARCHIVE_RETENTION_HOURS)
+        lobby_cutoff = now - timedelta(hours=settings.LOBBY_TTL_HOURS)
+
+        ended = (
+            await session.scalars(
+                select(Game)
+                .where(
+                    Game.phase == GamePhase.ENDED,
+                    func.coalesce(Game.ended_at, Game.created_at) < ended_cutoff,
+                )
+                .limit(settings.ARCHIVE_BATCH_SIZE)
+            )
+        ).all()
+        lobbies = (
+            await session.scalars(
+                select(Game)
+                .where(
+                    Game.phase == GamePhase.LOBBY,
+                    Game.created_at < lobby_cutoff,
+                    ~exists().where(
+                        Player.game_id == Game.id, Player.joined_at >= lobby_cutoff
+                    ),
+                    ~exists().where(
+                        ChatMessage.game_id == Game.id,
+                        ChatMessage.timestamp >= lobby_cutoff,
+                    ),
+                )
+                .limit(settings.ARCHIVE_BATCH_SIZE)
+            )
+        ).all()
+
+        # Games still live in memory keep their rows until they go idle
+        ended = [
+            g
+            for g in ended
+            if game_store.release(g.id, settings.ARCHIVE_RETENTION_HOURS * 3600)
+        ]
+        lobbies = [
+            g
+            for g in lobbies
+            if game_store.release(g.id, settings.LOBBY_TTL_HOURS * 3600)
+        ]
+        games = ended + lobbies
+        if not games:
+            return report
+
+        game_ids = [g.id for g in games]
+        players = (
+            await session.scalars(
+                select(Player).where(Player.game_id.in_(game_ids)).order_by(Player.id)
+            )
+        ).all()
+        messages = (
+            await session.scalars(
+                select(ChatMessage)
+                .where(ChatMessage.game_id.in_(game_ids))
+                .order_by(ChatMessage.timestamp)
+            )
+        ).all()
+
+        players_by_game: Dict[int, List[Player]] = {}
+        for player in players:
+            players_by_game.setdefault(player.game_id, []).append(player)
+        messages_by_game: Dict[int, List[ChatMessage]] = {}
+        for message in messages:
+            messages_by_game.setdefault(message.game_id, []).append(message)
+
+        archive_ids = {g.id for g in ended}
+        for game in games:
+            data = {
+                "game": row_to_dict(game),
+                "players": [row_to_dict(p) for p in players_by_game.get(game.id, [])],
+                "messages": [row_to_dict(m) for m in messages_by_game.get(game.id, [])],
+            }
+            raw = encode(data)
+            report.bytes_removed += len(raw)
+            if game.id not in archive_ids:
+                continue
+
+            payload = zlib.compress(raw)
+            report.bytes_stored += len(payload)
+            session.add(
+                ArchivedGame(
+                    id=game.id,
+                    code=game.code,
+                    mode=game.mode,
+                    created_at=game.created_at,
+                    ended_at=game.ended_at,
+                    archived_at=now,
+                    player_count=len(data["players"]),
+                    message_count=len(data["messages"]),
+                    raw_size=len(raw),
+                    payload=payload,
+                )
+            )
+
+        # A player who also chatted in a game that is staying keeps their row
+        player_ids = [p.id for p in players]
+        kept = set(
+            (
+                await session.scalars(
+                    select(ChatMessage.player_id).where(
+                        ChatMessage.player_id.in_(player_ids),
+                        ChatMessage.game_id.not_in(game_ids),
+                    )
+                )
+            ).all()
+        )
+        deleted_ids = [pid for pid in player_ids if pid not in kept]
+
+        await session.execute(
+            update(Game)
+            .where(or_(Game.id.in_(game_ids), Game.host_id.in_(deleted_ids)))
+            .values(host_id=None)
+        )
+        await session.execute(
+            delete(ChatMessage).where(ChatMessage.game_id.in_(game_ids))
+        )
+        if kept:
+            await session.execute(
+                update(Player).where(Player.id.in_(kept)).values(game_id=None)
+            )
+        await session.execute(delete(Player).where(Player.id.in_(deleted_ids)))
+        await session.execute(delete(Game).where(Game.id.in_(game_ids)))
+
+        report.games_archived = len(ended)
+        report.lobbies_purged = len(lobbies)
+        report.players_deleted = len(deleted_ids)
+        report.messages_deleted = len(messages)
+        return report
+
+    # ==================== Background task ====================
+
+    async def start(self, bind: AsyncEngine):
+        """Run an archiver pass every ``ARCHIVE_INTERVAL_SECONDS``"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(bind))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, bind: AsyncEngine):
+        while True:
+            await asyncio.sleep(settings.ARCHIVE_INTERVAL_SECONDS)
+            try:
+                await self.run_once(bind)
+            except Exception as e:
+                print(f"Archiver error: {e}")
+
+
+# Global archiver instance
+game_archiver = GameArchiver()
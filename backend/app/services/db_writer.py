@@ -0,0 +1,117 @@
+"""Single-writer commit queue
+
+SQLite allows one writer at a time, so every mutation is funnelled through
+one task that groups whatever is pending into a single transaction every few
+milliseconds. Callers await a future that resolves once their write is
+committed.
+"""
+
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from .. import query_stats
+from ..config import settings
+
+WriteJob = Callable[[AsyncSession], Awaitable[Any]]
+# A queued write: the job, the caller's query stats and its result future
+Job = Tuple[WriteJob, Optional[query_stats.QueryStats], asyncio.Future]
+
+
+class DatabaseWriter:
+    """Batches database writes from all requests into shared transactions"""
+
+    def __init__(self):
+        self._pending: List[Tuple[AsyncEngine, Job]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def submit(self, bind: AsyncEngine, job: WriteJob) -> Any:
+        """Queue a write and wait until it is durable
+
+        Args:
+            bind: Engine to write to (normally ``db.bind`` of the caller)
+            job: Coroutine function that applies the write to a session.
+                It may run more than once if its batch has to be retried,
+                so it must build its ORM objects inside.
+
+        Returns:
+            Whatever ``job`` returned
+        """
+        self._ensure_running()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((bind, (job, query_stats.current(), future)))
+        self._wakeup.set()
+        return await future
+
+    def _ensure_running(self):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._wakeup = asyncio.Event()
+            # Fresh context so the task isn't tied to the request that started it
+            self._task = loop.create_task(self._run(), context=contextvars.Context())
+
+    async def stop(self):
+        """Commit everything still queued and stop the writer task"""
+        if self._pending:
+            await self._drain()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        interval = settings.DB_WRITE_BATCH_MS / 1000
+        while True:
+            await self._wakeup.wait()
+            # Give concurrent requests a moment to join this batch
+            await asyncio.sleep(interval)
+            self._wakeup.clear()
+            try:
+                await self._drain()
+            except Exception as e:
+                print(f"Database writer error: {e}")
+
+    async def _drain(self):
+        pending, self._pending = self._pending, []
+
+        batches: Dict[AsyncEngine, List[Job]] = {}
+        for bind, job in pending:
+            batches.setdefault(bind, []).append(job)
+
+        for bind, jobs in batches.items():
+            await self._commit(bind, jobs)
+
+    async def _commit(self, bind: AsyncEngine, jobs: List[Job]):
+        """Run jobs in one transaction; isolate the culprit if it fails"""
+        try:
+            async with AsyncSession(bind=bind, expire_on_commit=False) as session:
+                async with session.begin():
+                    results = []
+                    for job, stats, _ in jobs:
+                        # Charge each write to the request that queued it
+                        with query_stats.attribute_to(stats):
+                            results.append(await job(session))
+        except Exception as e:
+            if len(jobs) == 1:
+                future = jobs[0][2]
+                if not future.done():
+                    future.set_exception(e)
+                return
+            # Retry one by one so a single bad write doesn't fail the batch
+            for job in jobs:
+                await self._commit(bind, [job])
+            return
+
+        for (_, _, future), result in zip(jobs, results):
+            if not future.done():
+                future.set_result(result)
+
+
+# Global database writer instance
+db_writer = DatabaseWriter()
@@ -0,0 +1,121 @@
+"""Per-game command mailboxes
+
+Every command that changes a live game runs on that game's actor: a task
+that takes commands off the game's mailbox and applies them one at a time,
+in arrival order, whether they came over HTTP, the WebSocket or the phase
+scheduler. Commands for one game never interleave, even across awaits;
+different games have their own actors and run in parallel. An actor exits
+once its mailbox has been empty for GAME_ACTOR_IDLE_SECONDS and the next
+command starts a new one.
+"""
+
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .. import query_stats
+from ..config import settings
+
+Command = Callable[[], Awaitable[Any]]
+# A queued command: the command, the caller's query stats and its result future
+Mail = Tuple[Command, Optional[query_stats.QueryStats], asyncio.Future]
+
+# Game whose actor is running the current task, if any
+_current_game: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar(
+    "current_game", default=None
+)
+
+
+class GameActor:
+    """Applies one game's commands in order"""
+
+    def __init__(self, game_id: int, actors: Dict[int, "GameActor"]):
+        self.game_id = game_id
+        self.mailbox: asyncio.Queue[Mail] = asyncio.Queue()
+        self._actors = actors
+        # Fresh context so the task isn't tied to the request that started it
+        self.task = asyncio.get_running_loop().create_task(
+            self._run(), context=contextvars.Context()
+        )
+
+    async def _run(self):
+        _current_game.set(self.game_id)
+        try:
+            while True:
+                try:
+                    command, stats, future = await asyncio.wait_for(
+                        self.mailbox.get(), settings.GAME_ACTOR_IDLE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    if self.mailbox.empty():
+                        return
+                    continue
+
+                if future.done():
+                    # The caller went away before its turn
+                    continue
+                try:
+                    # Charge the command's queries to the request that sent it
+                    with query_stats.attribute_to(stats):
+                        result = await command()
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+        finally:
+            if self._actors.get(self.game_id) is self:
+                del self._actors[self.game_id]
+
+
+class GameActors:
+    """Registry of running game actors"""
+
+    def __init__(self):
+        # game_id -> actor
+        self._actors: Dict[int, GameActor] = {}
+
+    async def submit(self, game_id: int, command: Command) -> Any:
+        """Run ``command`` on the game's actor and wait for its result
+
+        A command already running on that actor runs nested commands for the
+        same game inline, so actions can call each other without deadlocking.
+        """
+        if _current_game.get() == game_id:
+            return await command()
+
+        future = asyncio.get_running_loop().create_future()
+        self._actor(game_id).mailbox.put_nowait(
+            (command, query_stats.current(), future)
+        )
+        return await future
+
+    def _actor(self, game_id: int) -> GameActor:
+        loop = asyncio.get_running_loop()
+        actor = self._actors.get(game_id)
+        if actor is None or actor.task.done() or actor.task.get_loop() is not loop:
+            actor = GameActor(game_id, self._actors)
+            self._actors[game_id] = actor
+        return actor
+
+    def __len__(self) -> int:
+        return len(self._actors)
+
+    async def stop(self):
+        """Stop every actor; queued commands are cancelled"""
+        actors, self._actors = list(self._actors.values()), {}
+        for actor in actors:
+            actor.task.cancel()
+            while not actor.mailbox.empty():
+                _, _, future = actor.mailbox.get_nowait()
+                future.cancel()
+        for actor in actors:
+            try:
+                await actor.task
+            except asyncio.CancelledError:
+                pass
+
+
+# Global actor registry
+game_actors = GameActors()
@@ -1,7 +1,7 @@
 """Game service for business logic"""
 
-from sqlalchemy.orm import Session
-from sqlalchemy.orm.attributes import flag_modified
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List, Tuple
 from datetime import datetime, timedelta
 import random
@@ -20,76 +20,112 @@ from ..game_logic import (
     get_phase_duration,
     get_max_rounds,
 )
+from .db_writer import db_writer
+from .game_actor import game_actors
+from .game_state import GameState, PlayerState, game_store
+from .vote_tally import vote_weight
 
 
 class GameService:
-    """Service for game operations"""
+    """Service for game operations
+
+    Reads and mutations go through the in-memory ``game_store``; only new rows
+    (games and players, which need database ids) are written straight away,
+    via ``db_writer``.
+    """
 
     @staticmethod
-    def create_game(
-        db: Session,
+    async def create_game(
+        db: AsyncSession,
         player_name: str,
         session_id: str,
         mode: GameMode = GameMode.BASIC,
         goal: GameGoal = GameGoal.SALVATION,
-    ) -> Tuple[Game, Player]:
+    ) -> Tuple[GameState, PlayerState]:
         """Create a new game lobby"""
         # Check for existing player with this session_id
-        existing_player = (
-            db.query(Player).filter(Player.session_id == session_id).first()
-        )
+        old_state, existing_player = await game_store.find_player(db, session_id)
 
-        if existing_player:
-            # If player was host of another game, clear that
-            if existing_player.game_id:
-                old_game = (
-                    db.query(Game).filter(Game.id == existing_player.game_id).first()
-                )
-                if old_game and old_game.host_id == existing_player.id:
-                    old_game.host_id = None
-
-            player = existing_player
-        else:
-            player = None
+        if existing_player and old_state:
+            await GameService._leave_game(old_state, existing_player)
 
         # Generate unique code
         code = Game.generate_code()
-        while db.query(Game).filter(Game.code == code).first():
+        while await db.scalar(select(Game.id).where(Game.code == code)):
             code = Game.generate_code()
 
-        # Create game
-        game = Game(code=code, mode=mode, goal=goal)
-        db.add(game)
-        db.flush()  # Get game.id
+        async def insert(session: AsyncSession) -> Tuple[Game, Optional[Player]]:
+            # Create game
+            game = Game(code=code, mode=mode, goal=goal)
+            session.add(game)
+            await session.flush()  # Get game.id
 
-        if player:
-            # Update existing player
-            GameService._reset_player(player, game.id, player_name, is_host=True)
-        else:
-            # Create host player
-            player = Player(
-                game_id=game.id,
-                session_id=session_id,
-                name=player_name,
-                is_host=True,
-                status=PlayerStatus.READY,
-                revealed_cards=[],
-            )
-            db.add(player)
+            row = None
+            if existing_player:
+                game.host_id = existing_player.id
+            else:
+                # Create host player
+                row = Player(
+                    game_id=game.id,
+                    session_id=session_id,
+                    name=player_name,
+                    is_host=True,
+                    status=PlayerStatus.READY,
+                    revealed_cards=[],
+                )
+                session.add(row)
+                await session.flush()  # Flush player to get player.id
+                # Set host_id now that player has an ID
+                game.host_id = row.id
+            return game, row
+
+        game, row = await db_writer.submit(db.bind, insert)
+        player = existing_player or PlayerState.from_model(row)
+
+        state = GameState.from_model(game, [])
+        game_store.add_game(db, state)
+        GameService._reset_player(player, game.id, player_name, is_host=True)
+        game_store.add_player(state, player)
+
+        return state, player
+
+    @staticmethod
+    async def _leave_game(state: GameState, player: PlayerState) -> bool:
+        """Take a player out of its previous game, on that game's actor
+
+        Also hands back the host role if the player held it. Returns whether
+        the player was the host.
+        """
 
-        db.flush()  # Flush player to get player.id
+        async def command() -> bool:
+            was_host = state.host_id == player.id
+            game_store.remove_player(state, player)
+            return was_host
 
-        # Set host_id now that player has an ID
-        game.host_id = player.id
+        return await game_actors.submit(state.id, command)
 
-        db.commit()
-        db.refresh(game)
-        db.refresh(player)
+    @staticmethod
+    async def _return_to_game(state: GameState, player: PlayerState, was_host: bool):
+        """Undo ``_leave_game``, on the game's actor"""
+
+        async def command():
+            if was_host and state.host_id is None:
+                state.host_id = player.id
+            game_store.add_player(state, player)
+
+        await game_actors.submit(state.id, command)
 
-        return game, player
+    @staticmethod
+    def _joinable(state: GameState) -> bool:
+        """Whether a lobby still takes new players"""
+        return (
+            state.phase == GamePhase.LOBBY and len(state.players) < settings.MAX_PLAYERS
+        )
 
     @staticmethod
-    def _reset_player(player: Player, game_id: int, name: str, is_host: bool = False):
+    def _reset_player(
+        player: PlayerState, game_id: int, name: str, is_host: bool = False
+    ):
         """Reset player for a new game"""
         player.game_id = game_id
         player.name = name
@@ -105,8 +141,8 @@ class GameService:
         player.fact = None
         player.special_condition = None
         player.special_used = False
+        player.special_data = None
         player.revealed_cards = []
-        flag_modified(player, "revealed_cards")
         player.threat_card = None
 
         # Reset voting
@@ -116,105 +152,136 @@ class GameService:
         player.joined_at = datetime.utcnow()
 
     @staticmethod
-    def join_game(
-        db: Session, code: str, player_name: str, session_id: str
-    ) -> Tuple[Optional[Game], Optional[Player]]:
-        """Join an existing game"""
-        game = db.query(Game).filter(Game.code == code.upper()).first()
-
-        if not game:
-            return None, None
-
-        # Check if game is in lobby phase
-        if game.phase != GamePhase.LOBBY:
-            return None, None
+    async def join_game(
+        db: AsyncSession, code: str, player_name: str, session_id: str
+    ) -> Tuple[Optional[GameState], Optional[PlayerState]]:
+        """Join an existing game
+
+        The game must still be a lobby with room left when the player is
+        attached, on the game's actor; a game that started or filled up while
+        the player's row was being inserted refuses the join, and the new row
+        is detached again. A player coming from another game is in that game
+        again if the join is refused.
+        """
+        state = await game_store.get_by_code(db, code)
 
-        # Check player count
-        player_count = db.query(Player).filter(Player.game_id == game.id).count()
-        if player_count >= settings.MAX_PLAYERS:
+        # Check if game is in lobby phase and has room
+        if not state or not GameService._joinable(state):
             return None, None
 
         # Check for existing player with this session_id
-        existing_player = (
-            db.query(Player).filter(Player.session_id == session_id).first()
-        )
+        old_state, existing_player = await game_store.find_player(db, session_id)
 
         if existing_player:
-            # If player was host of another game, clear that
-            if existing_player.game_id:
-                old_game = (
-                    db.query(Game).filter(Game.id == existing_player.game_id).first()
-                )
-                if old_game and old_game.host_id == existing_player.id:
-                    old_game.host_id = None
-
             player = existing_player
-            GameService._reset_player(player, game.id, player_name, is_host=False)
         else:
-            # Create player
-            player = Player(
-                game_id=game.id,
-                session_id=session_id,
-                name=player_name,
-                status=PlayerStatus.WAITING,
-                revealed_cards=[],
-            )
-            db.add(player)
 
-        db.commit()
-        db.refresh(player)
+            async def insert(session: AsyncSession) -> Player:
+                # Create player
+                row = Player(
+                    game_id=state.id,
+                    session_id=session_id,
+                    name=player_name,
+                    status=PlayerStatus.WAITING,
+                    revealed_cards=[],
+                )
+                session.add(row)
+                await session.flush()
+                return row
+
+            player = PlayerState.from_model(await db_writer.submit(db.bind, insert))
+
+        async def joinable() -> bool:
+            return GameService._joinable(state)
+
+        leaving = old_state if old_state and old_state is not state else None
+        was_host = False
+        if leaving:
+            # Checked again before the player leaves its old game
+            if not await game_actors.submit(state.id, joinable):
+                return None, None
+            was_host = await GameService._leave_game(leaving, player)
+
+        async def attach() -> bool:
+            # Checked again: the game may have started or filled up meanwhile
+            if not GameService._joinable(state):
+                return False
+            if state.host_id == player.id:
+                state.host_id = None
+            GameService._reset_player(player, state.id, player_name, is_host=False)
+            game_store.add_player(state, player)
+            return True
+
+        if not await game_actors.submit(state.id, attach):
+            if leaving:
+                # Lost the lobby between the two checks: back to the old game
+                await GameService._return_to_game(leaving, player, was_host)
+            if not existing_player:
+
+                async def detach(session: AsyncSession):
+                    # Keep the refused row out of the game when it is reloaded
+                    await session.execute(
+                        update(Player)
+                        .where(Player.id == player.id)
+                        .values(game_id=None)
+                    )
+
+                await db_writer.submit(db.bind, detach)
+            return None, None
 
-        return game, player
+        return state, player
 
     @staticmethod
-    def start_game(db: Session, game_id: int) -> bool:
+    async def start_game(db: AsyncSession, game_id: int) -> bool:
         """Start the game and assign traits"""
-        game = db.query(Game).filter(Game.id == game_id).first()
+        game = await game_store.get(db, game_id)
 
         if not game or game.phase != GamePhase.LOBBY:
             return False
 
-        players = db.query(Player).filter(Player.game_id == game_id).all()
+        players = game.player_list()
 
         # Check minimum players
         if len(players) < settings.MIN_PLAYERS:
             return False
 
-        # Assign random traits to each player (6 карток + особлива умова)
-        for player in players:
-            cards = get_random_cards()
-            player.profession = cards["profession"]
-            player.biology = cards["biology"]
-            player.health = cards["health"]
-            player.hobby = cards["hobby"]
-            player.baggage = cards["baggage"]
-            player.fact = cards["fact"]
-            player.special_condition = cards["special_condition"]
-            player.status = PlayerStatus.PLAYING
-            player.revealed_cards = []  # Всі картки закриті
-            flag_modified(player, "revealed_cards")
-
-        # Assign catastrophe and bunker cards
-        game.catastrophe = get_random_catastrophe()
-        game.bunker_cards = get_random_bunker_cards(5)  # 5 карток бункера
-        game.revealed_bunker_cards = 0
-
-        # Update game state
-        game.phase = GamePhase.BUNKER_REVEAL  # Почати з відкривання картки бункера
-        game.current_round = 1
-        game.started_at = datetime.utcnow()
-
-        # Set timer for bunker reveal phase
-        duration = get_phase_duration("bunker_reveal")
-        game.phase_end_time = datetime.utcnow() + timedelta(seconds=duration)
-
-        db.commit()
+        with game_store.unit_of_work(game):
+            # Assign random traits to each player (6 карток + особлива умова)
+            for player in players:
+                cards = get_random_cards()
+                player.profession = cards["profession"]
+                player.biology = cards["biology"]
+                player.health = cards["health"]
+                player.hobby = cards["hobby"]
+                player.baggage = cards["baggage"]
+                player.fact = cards["fact"]
+                player.special_condition = cards["special_condition"]
+                player.status = PlayerStatus.PLAYING
+                player.revealed_cards = []  # Всі картки закриті
+
+            # Assign catastrophe and bunker cards
+            game.catastrophe = get_random_catastrophe()
+            game.bunker_cards = get_random_bunker_cards(5)  # 5 карток бункера
+            game.revealed_bunker_cards = 0
+
+            # Update game state
+            game.phase = GamePhase.BUNKER_REVEAL  # Почати з відкривання картки бункера
+            game.current_round = 1
+            game.started_at = datetime.utcnow()
+            game.round_reveals.clear()
+            game.recount()
+
+            # Set timer for bunker reveal phase
+            duration = get_phase_duration("bunker_reveal")
+            game.phase_end_time = datetime.utcnow() + timedelta(seconds=duration)
+
+            game_store.mark_dirty(game)
         return True
 
     @staticmethod
-    def reveal_bunker_card(db: Session, game_id: int) -> bool:
+    async def reveal_bunker_card(db: AsyncSession, game_id: int) -> bool:
         """Reveal next bunker card"""
-        game = db.query(Game).filter(Game.id == game_id).first()
+        game = await game_store.get(db, game_id)
 
         if not game or not game.bunker_cards:
             return False
@@ -223,19 +290,16 @@ class GameService:
             return False  # All cards already revealed
 
         game.revealed_bunker_cards += 1
-        db.commit()
+        game_store.mark_dirty(game)
         return True
 
     @staticmethod
-    def reveal_player_card(
-        db: Session, game_id: int, player_id: int, card_type: str
+    async def reveal_player_card(
+        db: AsyncSession, game_id: int, player_id: int, card_type: str
     ) -> bool:
         """Reveal a player's card"""
-        player = (
-            db.query(Player)
-            .filter(Player.game_id == game_id, Player.id == player_id)
-            .first()
-        )
+        game = await game_store.get(db, game_id)
+        player = game.players.get(player_id) if game else None
 
         if not player:
             return False
@@ -250,99 +314,135 @@ class GameService:
             return False
 
         # Check mandatory first round card
-        game = db.query(Game).filter(Game.id == game_id).first()
         if game.current_round == 1:
             mandatory = get_mandatory_card_for_round(1)
             if mandatory and card_type != mandatory:
                 return False  # Must reveal profession in round 1
 
-        # Reveal the card - use flag_modified for JSON field
-        if player.revealed_cards is None:
-            player.revealed_cards = []
-
         player.revealed_cards.append(card_type)
-        flag_modified(player, "revealed_cards")  # Important for JSON fields!
-        db.commit()
-        db.refresh(player)
+        if player.status == PlayerStatus.PLAYING:
+            game.round_reveals.add(player.id)
+        game_store.mark_dirty(game)
         return True
 
     @staticmethod
-    def advance_phase(db: Session, game_id: int) -> Optional[dict]:
+    async def advance_phase(
+        db: AsyncSession,
+        game_id: int,
+        expected_phase: Optional[GamePhase] = None,
+        expected_round: Optional[int] = None,
+    ) -> Optional[dict]:
         """Advance to the next game phase
 
+        With ``expected_phase``/``expected_round`` this is a compare-and-set:
+        if the game has already moved on (another caller won the race), it is
+        left untouched and the current phase is returned with 'advanced' False.
+        The check and the transition run without yielding to the event loop.
+
         Returns:
-            dict with 'phase' and optionally 'eliminated_player' info
+            dict with 'phase', 'advanced' and optionally 'eliminated_player' info
         """
-        game = db.query(Game).filter(Game.id == game_id).first()
+        game = await game_store.get(db, game_id)
 
         if not game:
             return None
 
-        players = (
-            db.query(Player)
-            .filter(Player.game_id == game_id, Player.status == PlayerStatus.PLAYING)
-            .all()
-        )
+        result = {"phase": game.phase, "eliminated_player": None, "advanced": False}
 
-        total_players = len(db.query(Player).filter(Player.game_id == game_id).all())
+        if (expected_phase is not None and game.phase != expected_phase) or (
+            expected_round is not None and game.current_round != expected_round
+        ):
+            return result
 
-        result = {"phase": None, "eliminated_player": None}
+        players = game.playing_players()
+        total_players = len(game.players)
+        before = (game.phase, game.current_round)
 
-        if game.phase == GamePhase.BUNKER_REVEAL:
-            # Reveal bunker card and move to card reveal phase
-            GameService.reveal_bunker_card(db, game_id)
-            game.phase = GamePhase.CARD_REVEAL
-            duration = get_phase_duration("card_reveal", len(players))
-            game.phase_end_time = datetime.utcnow() + timedelta(seconds=duration)
+        with game_store.unit_of_work(game):
+            if game.phase == GamePhase.BUNKER_REVEAL:
+                # Reveal bunker card and move to card reveal phase
+                await GameService.reveal_bunker_card(db, game_id)
+                game.phase = GamePhase.CARD_REVEAL
+                duration = get_phase_duration("card_reveal", len(players))
+                game.phase_end_time = datetime.utcnow() + timedelta(seconds=duration)
 
-        elif game.phase == GamePhase.CARD_REVEAL:
-            # Move to discussion
-            game.phase = GamePhase.DISCUSSION
-            duration = get_phase_duration("discussion")
-            game.phase_end_time = datetime.utcnow() + timedelta(seconds=duration)
+            elif game.phase == GamePhase.CARD_REVEAL:
+                # Move to discussion
+                game.phase = GamePhase.DISCUSSION
+                duration = get_phase_duration("discussion")
+                game.phase_end_time = datetime.utcnow() + timedelta(seconds=duration)
 
-        elif game.phase == GamePhase.DISCUSSION:
-            # Move to voting (if this round has voting)
-            votings = get_votings_for_round(total_players, game.current_round)
-            if votings > 0:
-                game.phase = GamePhase.VOTING
-                duration = get_phase_duration("voting")
+            elif game.phase == GamePhase.DISCUSSION:
+                # Move to voting (if this round has voting)
+                votings = get_votings_for_round(total_players, game.current_round)
+                if votings > 0:
+                    game.phase = GamePhase.VOTING
+                    duration = get_phase_duration("voting")
+                    game.phase_end_time = datetime.utcnow() + timedelta(
+                        seconds=duration
+                    )
+                else:
+                    # Skip voting, go to next round
+                    GameService._next_round(game, players, total_players)
+
+            elif game.phase == GamePhase.VOTING:
+                # The round's votes are written to the players once, here
+                game.tally.persist(game.player_list())
+                game.phase = GamePhase.REVEAL
+                duration = get_phase_duration("reveal")
                 game.phase_end_time = datetime.utcnow() + timedelta(seconds=duration)
-            else:
-                # Skip voting, go to next round
-                GameService._next_round(db, game, players, total_players)
 
-        elif game.phase == GamePhase.VOTING:
-            game.phase = GamePhase.REVEAL
-            duration = get_phase_duration("reveal")
-            game.phase_end_time = datetime.utcnow() + timedelta(seconds=duration)
+            elif game.phase == GamePhase.REVEAL:
+                # Eliminate player and check if game should end
+                eliminated = await GameService.eliminate_player(db, game_id)
 
-        elif game.phase == GamePhase.REVEAL:
-            # Eliminate player and check if game should end
-            eliminated = GameService.eliminate_player(db, game_id)
+                if eliminated:
+                    result["eliminated_player"] = {
+                        "id": eliminated.id,
+                        "name": eliminated.name,
+                        "revealed_cards": eliminated.revealed_cards,
+                    }
 
-            if eliminated:
-                result["eliminated_player"] = {
-                    "id": eliminated.id,
-                    "name": eliminated.name,
-                    "revealed_cards": eliminated.revealed_cards,
-                }
+                # _next_round resets the votes
+                GameService._next_round(game, players, total_players)
 
-            # Reset votes for next round
-            for player in players:
-                player.votes_received = 0
-                player.has_voted = False
-                player.voted_for = None
+            game_store.mark_dirty(game)
+        result["phase"] = game.phase
+        result["advanced"] = (game.phase, game.current_round) != before
+        return result
 
-            GameService._next_round(db, game, players, total_players)
+    @staticmethod
+    def phase_complete(game: GameState) -> bool:
+        """Whether every living player has done what the current phase waits for
 
-        db.commit()
-        db.refresh(game)
-        result["phase"] = game.phase
+        VOTING waits for a vote and CARD_REVEAL for a card revealed this round.
+        """
+        if game.alive_count <= 0:
+            return False
+        if game.phase == GamePhase.VOTING:
+            return len(game.tally.ballots) >= game.alive_count
+        if game.phase == GamePhase.CARD_REVEAL:
+            return len(game.round_reveals) >= game.alive_count
+        return False
+
+    @staticmethod
+    async def finish_phase_early(db: AsyncSession, game: GameState) -> Optional[dict]:
+        """Advance the phase now if every living player has acted
+
+        Returns the ``advance_phase`` result, or None if the phase goes on.
+        """
+        if not GameService.phase_complete(game):
+            return None
+        result = await GameService.advance_phase(
+            db, game.id, game.phase, game.current_round
+        )
+        if not result or not result["advanced"]:
+            return None
+        print(f"DEBUG: Everyone acted, game {game.id} moved on to {game.phase.value}")
         return result
 
     @staticmethod
-    def _next_round(db: Session, game: Game, players: List[Player], total_players: int):
+    def _next_round(game: GameState, players: List[PlayerState], total_players: int):
         """Move to next round or end game"""
         alive_count = len([p for p in players if p.status == PlayerStatus.PLAYING])
         bunker_capacity = get_bunker_capacity(total_players)
@@ -353,6 +453,7 @@ class GameService:
             player.votes_received = 0
             player.has_voted = False
             player.voted_for = None
+        game.tally.new_round()
 
         if alive_count <= bunker_capacity or game.current_round >= max_rounds:
             # Game over - move to survival check or end
@@ -360,7 +461,7 @@ class GameService:
                 game.phase = GamePhase.SURVIVAL_CHECK
                 duration = get_phase_duration("survival_check")
                 game.phase_end_time = datetime.utcnow() + timedelta(seconds=duration)
-                GameService._assign_threat_cards(db, game.id, players)
+                GameService._assign_threat_cards(players)
             else:
                 game.phase = GamePhase.ENDED
                 game.ended_at = datetime.utcnow()
@@ -371,12 +472,13 @@ class GameService:
         else:
             # Next round
             game.current_round += 1
+            game.round_reveals.clear()
             game.phase = GamePhase.BUNKER_REVEAL
             duration = get_phase_duration("bunker_reveal")
             game.phase_end_time = datetime.utcnow() + timedelta(seconds=duration)
 
     @staticmethod
-    def _assign_threat_cards(db: Session, game_id: int, players: List[Player]):
+    def _assign_threat_cards(players: List[PlayerState]):
         """Assign threat cards for survival story mode"""
         alive_players = [p for p in players if p.status == PlayerStatus.PLAYING]
         threat_cards = get_random_threat_cards(len(alive_players))
@@ -385,20 +487,20 @@ class GameService:
             if i < len(threat_cards):
                 player.threat_card = threat_cards[i]
 
-        db.commit()
-
     @staticmethod
-    def vote_player(db: Session, game_id: int, voter_id: int, target_id: int) -> bool:
+    async def vote_player(
+        db: AsyncSession, game_id: int, voter_id: int, target_id: int
+    ) -> bool:
         """Register a vote"""
-        game = db.query(Game).filter(Game.id == game_id).first()
+        game = await game_store.get(db, game_id)
 
         if not game or game.phase != GamePhase.VOTING:
             return False
 
-        voter = db.query(Player).filter(Player.id == voter_id).first()
-        target = db.query(Player).filter(Player.id == target_id).first()
+        voter = game.players.get(voter_id)
+        target = game.players.get(target_id)
 
-        if not voter or not target or voter.has_voted:
+        if not voter or not target or game.tally.has_voted(voter_id):
             return False
 
         # Eliminated players can't vote
@@ -413,34 +515,32 @@ class GameService:
         if voter_id == target_id:
             return False
 
-        target.votes_received += 1
-        voter.has_voted = True
-        voter.voted_for = target_id
+        # Counted in memory only; the players' vote fields are written at REVEAL
+        game.tally.cast(voter_id, target_id, vote_weight(voter))
 
-        db.commit()
+        game_store.mark_dirty(game)
         return True
 
     @staticmethod
-    def eliminate_player(db: Session, game_id: int) -> Optional[Player]:
-        """Eliminate player with most votes"""
-        players = (
-            db.query(Player)
-            .filter(Player.game_id == game_id, Player.status == PlayerStatus.PLAYING)
-            .all()
-        )
-
-        if not players:
+    async def eliminate_player(db: AsyncSession, game_id: int) -> Optional[PlayerState]:
+        """Eliminate the unprotected player with most (weighted) votes"""
+        game = await game_store.get(db, game_id)
+        if not game:
             return None
 
-        # Find player(s) with most votes
-        max_votes = max(p.votes_received for p in players)
+        # Find player(s) with most votes, skipping those a Guardian protects
+        max_votes, top = game.tally.candidates()
 
         # Don't eliminate anyone if no votes were cast
         if max_votes == 0:
             print(f"DEBUG: No votes cast, no elimination for game {game_id}")
             return None
 
-        candidates = [p for p in players if p.votes_received == max_votes]
+        candidates = [
+            game.players[pid]
+            for pid in sorted(top)
+            if pid in game.players and game.players[pid].status == PlayerStatus.PLAYING
+        ]
         print(
             f"DEBUG: Elimination candidates for game {game_id}: {[c.name for c in candidates]}, max_votes: {max_votes}"
         )
@@ -451,12 +551,11 @@ class GameService:
         if eliminated:
             print(f"DEBUG: Eliminating player {eliminated.name} with {max_votes} votes")
             eliminated.status = PlayerStatus.ELIMINATED
+            game.alive_count -= 1
+            game.round_reveals.discard(eliminated.id)
             # Reveal all cards except special condition
             all_cards = ["profession", "biology", "health", "hobby", "baggage", "fact"]
             eliminated.revealed_cards = all_cards
-            flag_modified(eliminated, "revealed_cards")  # Important for JSON fields!
-
-            db.commit()
-            db.refresh(eliminated)
+            game_store.mark_dirty(game)
 
         return eliminated
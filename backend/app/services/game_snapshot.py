@@ -0,0 +1,152 @@
+"""Versioned game snapshots for ``GameResponse``
+
+The public projection of a game (other players' unrevealed cards hidden) is
+the same for every viewer, so it is built once per game version and cached on
+the state. A viewer's response is that projection with their own entry swapped
+for the unmasked one.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from ..game_logic import get_bunker_capacity
+from ..models import PlayerStatus
+from ..schemas import GameResponse, PlayerResponse
+from .game_state import GameState, PlayerState
+from .vote_tally import VoteTally
+
+CARD_TYPES = ["profession", "biology", "health", "hobby", "baggage", "fact"]
+
+
+def player_view(
+    player: PlayerState, is_me: bool, tally: Optional[VoteTally] = None
+) -> PlayerResponse:
+    """Player as seen by themselves or by someone else"""
+    view = PlayerResponse.model_validate(player)
+    view.is_me = is_me
+    if tally is not None:
+        # Votes of the current round live in the tally until REVEAL
+        view.votes_received = tally.votes(player.id)
+        view.has_voted = tally.has_voted(player.id)
+        view.voted_for = tally.voted_for(player.id)
+    view.revealed_cards = player.revealed_cards if player.revealed_cards else []
+
+    if not is_me and player.status == PlayerStatus.PLAYING:
+        # Hide unrevealed cards
+        for card in CARD_TYPES:
+            if card not in view.revealed_cards:
+                setattr(view, card, None)
+        view.special_condition = None
+        view.threat_card = None
+
+    return view
+
+
+@dataclass
+class GameSnapshot:
+    """JSON-ready ``GameResponse`` of one game version"""
+
+    state: GameState
+    version: int
+    public: Dict[str, Any]
+    # player_id -> position in public["players"]
+    positions: Dict[int, int]
+    # player_id -> unmasked entry, built on first request
+    private: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+
+    def for_viewer(self, player_id: Optional[int]) -> Dict[str, Any]:
+        """Response for a viewer, with only their own entry unmasked"""
+        position = self.positions.get(player_id)
+        if position is None:
+            return self.public
+
+        entry = self.private.get(player_id)
+        if entry is None:
+            player = self.state.players[player_id]
+            entry = player_view(player, True, self.state.tally).model_dump(mode="json")
+            self.private[player_id] = entry
+
+        players = list(self.public["players"])
+        players[position] = entry
+        return {**self.public, "players": players}
+
+
+def build_snapshot(state: GameState) -> GameSnapshot:
+    """Build the public projection of the current game version"""
+    players = state.player_list()
+
+    # Calculate initial_player_count and bunker_capacity
+    initial_player_count = len(players)
+    bunker_cap = (
+        get_bunker_capacity(initial_player_count) if initial_player_count >= 4 else None
+    )
+
+    response = GameResponse(
+        id=state.id,
+        code=state.code,
+        phase=state.phase,
+        current_round=state.current_round,
+        phase_end_time=state.phase_end_time,
+        player_count=len(players),
+        players=[player_view(p, False, state.tally) for p in players],
+        mode=state.mode,
+        goal=state.goal,
+        catastrophe=state.catastrophe,
+        bunker_cards=state.bunker_cards,
+        revealed_bunker_cards=state.revealed_bunker_cards,
+        initial_player_count=initial_player_count,
+        bunker_capacity=bunker_cap,
+        version=state.version,
+        generation=state.generation,
+    )
+
+    return GameSnapshot(
+        state=state,
+        version=state.version,
+        public=response.model_dump(mode="json"),
+        positions={p.id: i for i, p in enumerate(players)},
+    )
+
+
+def diff_snapshots(old: Dict[str, Any], new: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Patch ops turning the public projection ``old`` into ``new``
+
+    Ops carry absolute values, so applying them to any state between the two
+    versions gives the same result.
+    """
+    ops = []
+
+    changed = {
+        key: value
+        for key, value in new.items()
+        if key not in ("players", "version") and old.get(key) != value
+    }
+    if changed:
+        ops.append({"op": "game", "set": changed})
+
+    old_players = {p["id"]: p for p in old["players"]}
+    new_ids = set()
+    for player in new["players"]:
+        new_ids.add(player["id"])
+        before = old_players.get(player["id"])
+        if before is None:
+            ops.append({"op": "player_added", "player": player})
+            continue
+        changed = {k: v for k, v in player.items() if before.get(k) != v}
+        if changed:
+            ops.append({"op": "player", "id": player["id"], "set": changed})
+
+    for player_id in old_players:
+        if player_id not in new_ids:
+            ops.append({"op": "player_removed", "id": player_id})
+
+    return ops
+
+
+def get_snapshot(state: GameState) -> GameSnapshot:
+    """Cached snapshot of the game, rebuilt when its version changes"""
+    snapshot = state.snapshot
+    if snapshot is None or snapshot.version != state.version:
+        snapshot = build_snapshot(state)
+        state.snapshot = snapshot
+    return snapshot
@@ -0,0 +1,593 @@
+"""In-memory game state store with write-behind persistence
+
+Live games are kept as plain in-process objects. All reads are served from
+memory; mutations mark the game dirty and a background task flushes dirty
+games to the database in batches. Only columns that changed since the last
+flush are written, and players that changed the same way (a vote reset, the
+survivors of a finished game) share one set-based UPDATE.
+"""
+
+import asyncio
+import copy
+import itertools
+import json
+import secrets
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..models import Game, Player, GamePhase, PlayerStatus, GameMode, GameGoal
+from .db_writer import db_writer
+from .vote_tally import VoteTally
+
+
+@dataclass
+class PlayerState:
+    """In-memory copy of a ``players`` row"""
+
+    id: int
+    game_id: Optional[int]
+    session_id: str
+    name: str
+    status: PlayerStatus = PlayerStatus.WAITING
+    is_host: bool = False
+
+    # 6 типів карток персонажа
+    profession: Optional[str] = None
+    biology: Optional[str] = None
+    health: Optional[str] = None
+    hobby: Optional[str] = None
+    baggage: Optional[str] = None
+    fact: Optional[str] = None
+
+    # Особлива умова
+    special_condition: Optional[Dict[str, Any]] = None
+    special_used: bool = False
+    special_data: Optional[Dict[str, Any]] = None
+
+    revealed_cards: List[str] = field(default_factory=list)
+    threat_card: Optional[Dict[str, Any]] = None
+
+    # Voting
+    votes_received: int = 0
+    has_voted: bool = False
+    voted_for: Optional[int] = None
+
+    joined_at: Optional[datetime] = None
+
+    @classmethod
+    def from_model(cls, player: Player) -> "PlayerState":
+        """Build state from an ORM row"""
+        state = cls(**{f.name: getattr(player, f.name) for f in fields(cls)})
+        if state.revealed_cards is None:
+            state.revealed_cards = []
+        return state
+
+    def to_row(self) -> Dict[str, Any]:
+        """Column values for persisting this player"""
+        return {f.name: copy.deepcopy(getattr(self, f.name)) for f in fields(self)}
+
+
+@dataclass
+class GameState:
+    """In-memory copy of a ``games`` row together with its players"""
+
+    id: int
+    code: str
+    host_id: Optional[int] = None
+    phase: GamePhase = GamePhase.LOBBY
+    current_round: int = 0
+    phase_end_time: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    ended_at: Optional[datetime] = None
+
+    # Режим та ціль гри
+    mode: GameMode = GameMode.BASIC
+    goal: GameGoal = GameGoal.SALVATION
+
+    # Картка катастрофи та бункера
+    catastrophe: Optional[Dict[str, Any]] = None
+    bunker_cards: Optional[List[str]] = None
+    revealed_bunker_cards: int = 0
+
+    # player_id -> player, in join order
+    players: Dict[int, PlayerState] = field(default_factory=dict, repr=False)
+
+    # Bumped on every mutation; flushed_version trails it until persisted
+    version: int = field(default=0, compare=False)
+    flushed_version: int = field(default=0, compare=False)
+    last_access: float = field(default_factory=time.monotonic, compare=False)
+
+    # Open unit-of-work nesting depth and whether it recorded a change
+    uow_depth: int = field(default=0, repr=False, compare=False)
+    uow_changed: bool = field(default=False, repr=False, compare=False)
+
+    # Unique per load of this game, so versions restarting at 0 after an
+    # eviction or a restart never repeat an earlier ETag
+    generation: str = field(default="", compare=False)
+    # Bumped on every chat message; chat isn't part of the game row
+    chat_version: int = field(default=0, compare=False)
+
+    # Cached GameSnapshot of the current version (see game_snapshot)
+    snapshot: Any = field(default=None, repr=False, compare=False)
+
+    # Living players and which of them revealed a card this round, kept up
+    # to date by GameService so phases can end early in O(1)
+    alive_count: int = field(default=0, compare=False)
+    round_reveals: Set[int] = field(default_factory=set, repr=False, compare=False)
+    # Votes of the current round (authoritative during VOTING, see vote_tally)
+    tally: VoteTally = field(default_factory=VoteTally, repr=False, compare=False)
+
+    _COLUMNS = (
+        "id",
+        "code",
+        "host_id",
+        "phase",
+        "current_round",
+        "phase_end_time",
+        "created_at",
+        "started_at",
+        "ended_at",
+        "mode",
+        "goal",
+        "catastrophe",
+        "bunker_cards",
+        "revealed_bunker_cards",
+    )
+
+    @classmethod
+    def from_model(cls, game: Game, players: List[Player]) -> "GameState":
+        """Build state from ORM rows"""
+        state = cls(**{name: getattr(game, name) for name in cls._COLUMNS})
+        for player in players:
+            state.players[player.id] = PlayerState.from_model(player)
+        state.tally = VoteTally.from_players(
+            state.players.values(), state.current_round
+        )
+        state.recount()
+        return state
+
+    def to_row(self) -> Dict[str, Any]:
+        """Column values for persisting this game"""
+        return {name: copy.deepcopy(getattr(self, name)) for name in self._COLUMNS}
+
+    def player_list(self) -> List[PlayerState]:
+        """All players in join order"""
+        return list(self.players.values())
+
+    def playing_players(self) -> List[PlayerState]:
+        """Players still in the game"""
+        return [p for p in self.players.values() if p.status == PlayerStatus.PLAYING]
+
+    def recount(self):
+        """Rebuild the action counters from the players
+
+        Who revealed a card this round isn't stored, so after a reload only
+        the players still alive are kept from it.
+        """
+        alive = self.playing_players()
+        self.alive_count = len(alive)
+        self.round_reveals &= {p.id for p in alive}
+
+    def player_by_session(self, session_id: str) -> Optional[PlayerState]:
+        """Find player by session cookie"""
+        for player in self.players.values():
+            if player.session_id == session_id:
+                return player
+        return None
+
+    @property
+    def is_dirty(self) -> bool:
+        return self.version != self.flushed_version
+
+
+def changed_columns(
+    old: Optional[Dict[str, Any]], new: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Columns of ``new`` that differ from ``old``, plus the primary key
+
+    Returns an empty dict when nothing changed.
+    """
+    if old is None:
+        return dict(new)
+    changes = {name: value for name, value in new.items() if old.get(name) != value}
+    if changes:
+        changes["id"] = new["id"]
+    return changes
+
+
+class GameStateStore:
+    """Authoritative in-process store for live games"""
+
+    def __init__(self):
+        # game_id -> state
+        self._games: Dict[int, GameState] = {}
+        # code -> game_id
+        self._codes: Dict[str, int] = {}
+        # session_id -> (game_id, player_id)
+        self._sessions: Dict[str, Tuple[int, int]] = {}
+        self._dirty: Set[int] = set()
+        # Rows as last written to (or read from) the database, for diffing
+        self._flushed_games: Dict[int, Dict[str, Any]] = {}
+        self._flushed_players: Dict[int, Dict[str, Any]] = {}
+        # Engine the states were loaded from; flushes go to the same database
+        self._bind = None
+        self._flusher: Optional[asyncio.Task] = None
+        # Called with a game after each committed change
+        self._listeners: List[Callable[[GameState], None]] = []
+        self._epoch = secrets.token_hex(4)
+        self._loads = itertools.count(1)
+
+    # ==================== Reads ====================
+
+    async def get(self, db: AsyncSession, game_id: int) -> Optional[GameState]:
+        """Get live game by id, loading it on first access"""
+        state = self._games.get(game_id)
+        if state is None:
+            game = await db.scalar(select(Game).where(Game.id == game_id))
+            if not game:
+                return None
+            state = await self._load(db, game)
+        state.last_access = time.monotonic()
+        return state
+
+    async def get_by_code(self, db: AsyncSession, code: str) -> Optional[GameState]:
+        """Get live game by room code, loading it on first access"""
+        code = code.upper()
+        game_id = self._codes.get(code)
+        if game_id is not None:
+            return await self.get(db, game_id)
+
+        game = await db.scalar(select(Game).where(Game.code == code))
+        if not game:
+            return None
+        state = await self._load(db, game)
+        state.last_access = time.monotonic()
+        return state
+
+    async def find_player(
+        self, db: AsyncSession, session_id: str
+    ) -> Tuple[Optional[GameState], Optional[PlayerState]]:
+        """Find a player by session across all games
+
+        Returns the player's live game (if it is loaded) and the player.
+        """
+        location = self._sessions.get(session_id)
+        if location is not None:
+            game_id, player_id = location
+            state = self._games[game_id]
+            return state, state.players[player_id]
+
+        player = await db.scalar(select(Player).where(Player.session_id == session_id))
+        if not player:
+            return None, None
+        if player.game_id is not None:
+            state = await self.get(db, player.game_id)
+            if state is not None and player.id in state.players:
+                return state, state.players[player.id]
+        return None, PlayerState.from_model(player)
+
+    async def _load(self, db: AsyncSession, game: Game) -> GameState:
+        """Load game and its players into memory"""
+        players = (
+            await db.scalars(
+                select(Player).where(Player.game_id == game.id).order_by(Player.id)
+            )
+        ).all()
+
+        # Another request may have loaded it while we were waiting on the database
+        if game.id in self._games:
+            return self._games[game.id]
+
+        # Skip players that already moved to another live game but aren't flushed yet
+        players = [
+            p
+            for p in players
+            if self._sessions.get(p.session_id, (game.id,))[0] == game.id
+        ]
+        state = GameState.from_model(game, players)
+        self._register(state)
+        self._remember_flushed(state)
+        if self._bind is None:
+            self._bind = db.bind
+        return state
+
+    def _register(self, state: GameState):
+        state.generation = f"{self._epoch}.{next(self._loads)}"
+        self._games[state.id] = state
+        self._codes[state.code] = state.id
+        for player in state.players.values():
+            self._sessions[player.session_id] = (state.id, player.id)
+
+    def _remember_flushed(self, state: GameState):
+        self._flushed_games[state.id] = state.to_row()
+        for player in state.players.values():
+            self._flushed_players[player.id] = player.to_row()
+
+    # ==================== Writes ====================
+
+    def add_game(self, db: AsyncSession, state: GameState) -> GameState:
+        """Register a freshly inserted game"""
+        self._register(state)
+        if self._bind is None:
+            self._bind = db.bind
+        return state
+
+    def add_player(self, state: GameState, player: PlayerState):
+        """Attach a player to a live game, detaching it from its previous one
+
+        Callers detach the player from its previous game first, on that game's
+        actor (``remove_player``); this only covers a stale session entry.
+        """
+        location = self._sessions.get(player.session_id)
+        if location is not None and location[0] != state.id:
+            self.remove_player(self._games[location[0]], player)
+
+        player.game_id = state.id
+        state.players[player.id] = player
+        self._sessions[player.session_id] = (state.id, player.id)
+        self.mark_dirty(state)
+
+    def remove_player(self, state: GameState, player: PlayerState):
+        """Detach a player from a live game (the player object is kept)"""
+        if state.host_id == player.id:
+            state.host_id = None
+        state.players.pop(player.id, None)
+        state.recount()
+        if self._sessions.get(player.session_id) == (state.id, player.id):
+            del self._sessions[player.session_id]
+        self.mark_dirty(state)
+
+    def mark_dirty(self, state: GameState):
+        """Record that a game changed and needs to be persisted
+
+        Inside a unit of work the change is recorded once, when it completes.
+        """
+        if state.uow_depth:
+            state.uow_changed = True
+            return
+        state.version += 1
+        self._dirty.add(state.id)
+
+        for listener in self._listeners:
+            try:
+                listener(state)
+            except Exception as e:
+                print(f"Game change listener error: {e}")
+
+    def add_listener(self, listener: Callable[[GameState], None]):
+        """Get notified of every committed change to a live game"""
+        self._listeners.append(listener)
+
+    @contextmanager
+    def unit_of_work(self, state: GameState) -> Iterator[GameState]:
+        """Apply one action to a game atomically
+
+        Changes become visible to the flusher only when the outermost unit of
+        work exits; if it raises, the game and its players are restored to
+        how they were on entry. Nested units join the outer one.
+        """
+        outermost = state.uow_depth == 0
+        if outermost:
+            game_row = state.to_row()
+            player_rows = {pid: p.to_row() for pid, p in state.players.items()}
+            players = dict(state.players)
+            tally = copy.deepcopy(state.tally)
+            state.uow_changed = False
+
+        state.uow_depth += 1
+        try:
+            yield state
+        except BaseException:
+            if outermost:
+                self._restore(state, game_row, players, player_rows, tally)
+            raise
+        finally:
+            state.uow_depth -= 1
+
+        if outermost and state.uow_changed:
+            state.uow_changed = False
+            self.mark_dirty(state)
+
+    def _restore(
+        self,
+        state: GameState,
+        game_row: Dict[str, Any],
+        players: Dict[int, PlayerState],
+        player_rows: Dict[int, Dict[str, Any]],
+        tally: VoteTally,
+    ):
+        """Roll a game back to a snapshot taken by ``unit_of_work``"""
+        for name, value in game_row.items():
+            setattr(state, name, value)
+        for player_id, row in player_rows.items():
+            for name, value in row.items():
+                setattr(players[player_id], name, value)
+        state.players = players
+        state.tally = tally
+        state.recount()
+        state.uow_changed = False
+
+    async def flush(self) -> int:
+        """Write all dirty games to the database through the single writer
+
+        Returns:
+            Number of games flushed
+        """
+        if not self._dirty or self._bind is None:
+            return 0
+
+        # Games in the middle of an action stay dirty until it completes
+        batch = [
+            self._games[gid]
+            for gid in self._dirty
+            if gid in self._games and not self._games[gid].uow_depth
+        ]
+        self._dirty.difference_update(state.id for state in batch)
+        self._dirty.intersection_update(self._games)
+        if not batch:
+            return 0
+
+        # Snapshot synchronously so later mutations can't tear the rows
+        versions = {state.id: state.version for state in batch}
+        game_rows = [state.to_row() for state in batch]
+        player_rows = [p.to_row() for state in batch for p in state.players.values()]
+
+        game_updates = [
+            changes
+            for row in game_rows
+            if (changes := changed_columns(self._flushed_games.get(row["id"]), row))
+        ]
+        player_updates, player_bulk = self._group_player_changes(batch, player_rows)
+
+        async def write(session: AsyncSession):
+            if game_updates:
+                await session.execute(update(Game), game_updates)
+            if player_updates:
+                await session.execute(update(Player), player_updates)
+            for ids, values in player_bulk:
+                await session.execute(
+                    update(Player).where(Player.id.in_(ids)).values(**values)
+                )
+
+        if game_updates or player_updates or player_bulk:
+            try:
+                await db_writer.submit(self._bind, write)
+            except BaseException:
+                # Keep them dirty and retry on the next cycle (or the final
+                # flush, if stop() cancelled this one)
+                self._dirty.update(versions)
+                raise
+
+        for row in game_rows:
+            self._flushed_games[row["id"]] = row
+        for row in player_rows:
+            self._flushed_players[row["id"]] = row
+        for state in batch:
+            state.flushed_version = versions[state.id]
+            if state.is_dirty:
+                self._dirty.add(state.id)
+
+        return len(batch)
+
+    def _group_player_changes(
+        self, batch: List[GameState], player_rows: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], List[Tuple[List[int], Dict[str, Any]]]]:
+        """Split changed players into per-row updates and set-based ones
+
+        Players of one game whose changes are identical are updated with a
+        single ``UPDATE ... WHERE id IN (...)``; the rest go through one
+        executemany.
+        """
+        game_of = {p.id: state.id for state in batch for p in state.players.values()}
+        groups: Dict[Tuple[int, str], Tuple[List[int], Dict[str, Any]]] = {}
+        for row in player_rows:
+            changes = changed_columns(self._flushed_players.get(row["id"]), row)
+            if not changes:
+                continue
+            player_id = changes.pop("id")
+            key = (game_of[player_id], json.dumps(changes, sort_keys=True, default=str))
+            groups.setdefault(key, ([], changes))[0].append(player_id)
+
+        per_row, bulk = [], []
+        for ids, changes in groups.values():
+            if len(ids) > 1:
+                bulk.append((ids, changes))
+            else:
+                per_row.append({"id": ids[0], **changes})
+        return per_row, bulk
+
+    def evict_idle(self, max_idle_seconds: float) -> int:
+        """Drop clean games that weren't touched for a while"""
+        now = time.monotonic()
+        idle = [
+            state
+            for state in self._games.values()
+            if not state.is_dirty
+            and state.id not in self._dirty
+            and now - state.last_access > max_idle_seconds
+        ]
+        for state in idle:
+            self.evict(state.id)
+        return len(idle)
+
+    def release(self, game_id: int, min_idle_seconds: float) -> bool:
+        """Evict a game so its rows can be removed from the database
+
+        Returns False if the game is still in use: dirty, mid-action, or
+        accessed within ``min_idle_seconds``.
+        """
+        state = self._games.get(game_id)
+        if state is None:
+            return True
+        if (
+            state.is_dirty
+            or state.uow_depth
+            or game_id in self._dirty
+            or time.monotonic() - state.last_access < min_idle_seconds
+        ):
+            return False
+        self.evict(game_id)
+        return True
+
+    def evict(self, game_id: int):
+        """Forget a game (must be flushed first to keep its changes)"""
+        state = self._games.pop(game_id, None)
+        if state is None:
+            return
+        self._codes.pop(state.code, None)
+        self._flushed_games.pop(game_id, None)
+        for player in state.players.values():
+            self._flushed_players.pop(player.id, None)
+            if self._sessions.get(player.session_id) == (state.id, player.id):
+                del self._sessions[player.session_id]
+        self._dirty.discard(game_id)
+
+    def clear(self):
+        """Forget every game (used by tests)"""
+        self._games.clear()
+        self._codes.clear()
+        self._sessions.clear()
+        self._dirty.clear()
+        self._flushed_games.clear()
+        self._flushed_players.clear()
+        self._bind = None
+
+    # ==================== Background flusher ====================
+
+    async def start(self):
+        """Start the write-behind flusher"""
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher and persist everything still pending"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+
+    async def _run(self):
+        interval = settings.STATE_FLUSH_INTERVAL_MS / 1000
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush()
+                self.evict_idle(settings.STATE_IDLE_EVICT_SECONDS)
+            except Exception as e:
+                print(f"Game state flush error: {e}")
+
+
+# Global game state store instance
+game_store = GameStateStore()
@@ -0,0 +1,239 @@
+"""Server-side phase timer
+
+Every running game's ``phase_end_time`` sits in one min-heap; a single task
+sleeps until the earliest deadline and advances each game whose phase has
+expired. Deadlines follow the in-memory store through a change listener, so
+anything that starts a game or advances a phase reschedules it. On startup
+the heap is rebuilt from the ``games`` table.
+"""
+
+import asyncio
+import heapq
+import itertools
+from functools import partial
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..models import Game, GamePhase
+from .game_actor import game_actors
+from .game_service import GameService
+from .game_state import GameState, game_store
+
+# Phases that end when their timer runs out
+TIMED_PHASES = frozenset(
+    {
+        GamePhase.BUNKER_REVEAL,
+        GamePhase.CARD_REVEAL,
+        GamePhase.DISCUSSION,
+        GamePhase.VOTING,
+        GamePhase.REVEAL,
+    }
+)
+
+
+async def announce_phase(game: GameState, result: Dict[str, Any]):
+    """Broadcast the outcome of ``GameService.advance_phase``"""
+    from ..websockets.connection_manager import manager
+
+    # Send elimination notification first (if any)
+    if result.get("eliminated_player"):
+        eliminated = result["eliminated_player"]
+        await manager.send_player_eliminated(
+            game.id, eliminated["id"], eliminated["name"], eliminated["revealed_cards"]
+        )
+
+    await manager.send_phase_change(
+        game.id,
+        game.phase.value,
+        game.phase_end_time.isoformat() + "Z" if game.phase_end_time else None,
+        game.current_round,
+    )
+
+    # Also broadcast bunker card if it was revealed
+    if game.phase == GamePhase.CARD_REVEAL:
+        await manager.send_bunker_card_revealed(game.id, game.revealed_bunker_cards)
+
+
+class PhaseScheduler:
+    """Advances games when their phase deadline passes"""
+
+    def __init__(self):
+        # (deadline, tiebreak, game_id); entries not matching _deadlines are stale
+        self._heap: List[Tuple[datetime, int, int]] = []
+        # game_id -> deadline currently scheduled
+        self._deadlines: Dict[int, datetime] = {}
+        # game_id -> (phase_end_time when paused, time that was left)
+        self._paused: Dict[int, Tuple[datetime, timedelta]] = {}
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._sessions: Optional[async_sessionmaker[AsyncSession]] = None
+        self._task: Optional[asyncio.Task] = None
+        # Advances started by run_due and not finished yet
+        self._advancing: Set[asyncio.Task] = set()
+
+    # ==================== Deadlines ====================
+
+    def schedule(self, game_id: int, deadline: Optional[datetime]):
+        """Advance ``game_id`` at ``deadline`` (naive UTC); None unschedules it"""
+        if deadline is None:
+            self._deadlines.pop(game_id, None)
+            return
+        self._deadlines[game_id] = deadline
+        heapq.heappush(self._heap, (deadline, next(self._counter), game_id))
+        if self._heap[0][2] == game_id:
+            # New earliest deadline; the task may be sleeping past it
+            self._wakeup.set()
+
+    def sync(self, state: GameState):
+        """Store listener: follow the game's current phase deadline"""
+        deadline = state.phase_end_time if state.phase in TIMED_PHASES else None
+
+        paused = self._paused.get(state.id)
+        if paused is not None:
+            if deadline == paused[0]:
+                return
+            # The phase moved on (host skip) while paused
+            del self._paused[state.id]
+
+        if self._deadlines.get(state.id) != deadline:
+            self.schedule(state.id, deadline)
+
+    def deadline(self, game_id: int) -> Optional[datetime]:
+        return self._deadlines.get(game_id)
+
+    # ==================== Pause ====================
+
+    def is_paused(self, game_id: int) -> bool:
+        return game_id in self._paused
+
+    def pause(self, state: GameState, now: Optional[datetime] = None) -> bool:
+        """Stop the game's timer, keeping the time that was left"""
+        if state.id in self._paused or state.id not in self._deadlines:
+            return False
+        now = now or datetime.utcnow()
+        deadline = self._deadlines.pop(state.id)
+        self._paused[state.id] = (deadline, max(deadline - now, timedelta(0)))
+        return True
+
+    def resume(self, state: GameState, now: Optional[datetime] = None) -> bool:
+        """Restart a paused timer with the time that was left"""
+        paused = self._paused.pop(state.id, None)
+        if paused is None:
+            return False
+        now = now or datetime.utcnow()
+        state.phase_end_time = now + paused[1]
+        # The listener schedules the new deadline
+        game_store.mark_dirty(state)
+        return True
+
+    # ==================== Running ====================
+
+    async def run_due(self, now: Optional[datetime] = None) -> Optional[float]:
+        """Start advancing every game whose deadline has passed
+
+        The advances run as their own tasks, on each game's actor, and aren't
+        waited for: a slow game holds up neither the others nor the next
+        deadline. Returns seconds until the next deadline, or None if nothing
+        is scheduled.
+        """
+        now = now or datetime.utcnow()
+        while self._heap and self._heap[0][0] <= now:
+            deadline, _, game_id = heapq.heappop(self._heap)
+            if self._deadlines.get(game_id) != deadline:
+                continue
+            del self._deadlines[game_id]
+            task = asyncio.create_task(
+                game_actors.submit(game_id, partial(self._advance, game_id, deadline))
+            )
+            self._advancing.add(task)
+            task.add_done_callback(partial(self._advanced, game_id))
+
+        if not self._heap:
+            return None
+        return max((self._heap[0][0] - now).total_seconds(), 0.0)
+
+    def _advanced(self, game_id: int, task: asyncio.Task):
+        self._advancing.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Phase scheduler error for game {game_id}: {task.exception()}")
+
+    async def wait_advancing(self):
+        """Wait for the advances already started by ``run_due``"""
+        if self._advancing:
+            await asyncio.gather(*self._advancing, return_exceptions=True)
+
+    async def _advance(self, game_id: int, deadline: datetime):
+        async with self._sessions() as db:
+            game = await game_store.get(db, game_id)
+            # Skip games that were deleted, paused or moved on meanwhile
+            if (
+                not game
+                or game.phase not in TIMED_PHASES
+                or game.phase_end_time != deadline
+                or game.id in self._paused
+            ):
+                return
+
+            print(f"DEBUG: Phase {game.phase.value} of game {game_id} expired")
+            result = await GameService.advance_phase(
+                db, game_id, game.phase, game.current_round
+            )
+            if result and result["advanced"]:
+                await announce_phase(game, result)
+
+    async def rebuild(self, sessions: async_sessionmaker[AsyncSession]) -> int:
+        """Schedule every running game from the database"""
+        self._sessions = sessions
+        async with sessions() as db:
+            rows = (
+                await db.execute(
+                    select(Game.id, Game.phase_end_time).where(
+                        Game.phase.in_(TIMED_PHASES),
+                        Game.phase_end_time.is_not(None),
+                    )
+                )
+            ).all()
+        for game_id, deadline in rows:
+            if game_id not in self._deadlines:
+                self.schedule(game_id, deadline)
+        return len(rows)
+
+    async def start(self, sessions: async_sessionmaker[AsyncSession]):
+        """Rebuild the schedule and start the timer task"""
+        if self._task is None:
+            count = await self.rebuild(sessions)
+            print(f"Phase scheduler: {count} running games scheduled")
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.wait_advancing()
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            delay = await self.run_due()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def clear(self):
+        """Forget all deadlines (used by tests)"""
+        self._heap.clear()
+        self._deadlines.clear()
+        self._paused.clear()
+
+
+# Global scheduler instance
+phase_scheduler = PhaseScheduler()
+game_store.add_listener(phase_scheduler.sync)
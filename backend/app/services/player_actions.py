@@ -0,0 +1,196 @@
+"""Player actions shared by the HTTP routes and the WebSocket command channel
+
+Each action checks the request, applies it through ``GameService`` or
+``SpecialConditionHandler`` and broadcasts the outcome. Failures raise
+``ActionError`` with the HTTP status the routes answer with.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import ChatMessage
+from ..schemas import (
+    ChatMessageCreate,
+    ChatMessageResponse,
+    RevealCardRequest,
+    UseSpecialRequest,
+    VoteRequest,
+)
+from .db_writer import db_writer
+from .game_service import GameService
+from .game_state import GameState, PlayerState
+from .phase_scheduler import announce_phase
+
+# Simple rate limiting storage (in production, use Redis)
+rate_limit_storage: dict[str, list[datetime]] = {}
+
+
+def check_rate_limit(
+    session_id: str, limit: int = 10, window_seconds: int = 60
+) -> bool:
+    """Check if user has exceeded rate limit"""
+    now = datetime.utcnow()
+
+    if session_id not in rate_limit_storage:
+        rate_limit_storage[session_id] = []
+
+    # Remove old timestamps
+    rate_limit_storage[session_id] = [
+        ts
+        for ts in rate_limit_storage[session_id]
+        if now - ts < timedelta(seconds=window_seconds)
+    ]
+
+    # Check limit
+    if len(rate_limit_storage[session_id]) >= limit:
+        return False
+
+    # Add current timestamp
+    rate_limit_storage[session_id].append(now)
+    return True
+
+
+class ActionError(Exception):
+    """A player action was refused"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class PlayerActions:
+    """What a player can do during a game"""
+
+    @staticmethod
+    async def vote(
+        db: AsyncSession, game: GameState, voter: PlayerState, data: VoteRequest
+    ) -> Dict[str, Any]:
+        """Vote to eliminate a player"""
+        success = await GameService.vote_player(
+            db, game.id, voter.id, data.target_player_id
+        )
+        if not success:
+            raise ActionError(400, "Cannot vote now or already voted")
+
+        from ..websockets.connection_manager import manager
+
+        # Only the voter and the target changed
+        target = game.players[data.target_player_id]
+        votes = {p.id: game.tally.view(p) for p in (voter, target)}
+        await manager.send_vote_update(game.id, votes)
+        await PlayerActions._finish_phase_early(db, game)
+
+        return {"message": "Vote registered"}
+
+    @staticmethod
+    async def reveal_card(
+        db: AsyncSession,
+        game: GameState,
+        player: PlayerState,
+        data: RevealCardRequest,
+    ) -> Dict[str, Any]:
+        """Reveal one of the player's cards"""
+        success = await GameService.reveal_player_card(
+            db, game.id, player.id, data.card_type
+        )
+        if not success:
+            raise ActionError(400, "Cannot reveal this card")
+
+        from ..websockets.connection_manager import manager
+
+        await manager.send_player_revealed_card(
+            game.id,
+            player.id,
+            player.name,
+            data.card_type,
+            getattr(player, data.card_type, None),
+        )
+        await PlayerActions._finish_phase_early(db, game)
+
+        return {"message": "Card revealed", "card_type": data.card_type}
+
+    @staticmethod
+    async def _finish_phase_early(db: AsyncSession, game: GameState):
+        """End the phase once the last living player has acted"""
+        result = await GameService.finish_phase_early(db, game)
+        if result:
+            await announce_phase(game, result)
+
+    @staticmethod
+    async def use_special(
+        db: AsyncSession,
+        game: GameState,
+        player: PlayerState,
+        data: UseSpecialRequest,
+    ) -> Dict[str, Any]:
+        """Use the player's special condition"""
+        if not player.special_condition:
+            raise ActionError(400, "No special condition")
+        if player.special_used:
+            raise ActionError(400, "Special condition already used")
+
+        from .special_conditions import SpecialConditionHandler
+
+        params = data.model_dump(exclude_unset=True)
+        result = await SpecialConditionHandler.execute(db, game.id, player.id, params)
+        if not result.get("success"):
+            raise ActionError(
+                400, result.get("message", "Failed to use special condition")
+            )
+
+        from ..websockets.connection_manager import manager
+
+        await manager.send_special_card_used(
+            game.id, player.name, player.special_condition.get("name")
+        )
+
+        return {
+            "message": result.get("message"),
+            "effect": result.get("effect"),
+            "data": {
+                k: v
+                for k, v in result.items()
+                if k not in ["success", "message", "effect"]
+            },
+        }
+
+    @staticmethod
+    async def chat(
+        db: AsyncSession,
+        game: GameState,
+        player: PlayerState,
+        data: ChatMessageCreate,
+    ) -> ChatMessageResponse:
+        """Post a chat message under the player's own name"""
+        if not check_rate_limit(player.session_id):
+            raise ActionError(429, "Too many messages, please slow down")
+
+        async def insert(session: AsyncSession) -> ChatMessage:
+            chat_message = ChatMessage(
+                game_id=game.id, player_id=player.id, message=data.message
+            )
+            session.add(chat_message)
+            await session.flush()
+            return chat_message
+
+        chat_message = await db_writer.submit(db.bind, insert)
+        game.chat_version += 1
+
+        response = ChatMessageResponse(
+            id=chat_message.id,
+            player_id=player.id,
+            player_name=player.name,
+            message=chat_message.message,
+            timestamp=chat_message.timestamp,
+        )
+
+        from ..websockets.connection_manager import manager
+
+        await manager.send_chat_message(
+            game.id, player.name, response.message, response.model_dump(mode="json")
+        )
+
+        return response
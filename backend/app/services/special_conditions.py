@@ -3,20 +3,20 @@ Special Conditions Logic
 Handles the execution of all 32 special condition effects
 """
 
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy.orm.attributes import flag_modified
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, Dict, Any
 import random
 
-from ..models import Game, Player, PlayerStatus, GamePhase
+from ..models import GamePhase
+from .game_state import GameState, PlayerState, game_store
 
 
 class SpecialConditionHandler:
     """Handles execution of special condition effects"""
 
     @staticmethod
-    def execute(
-        db: Session,
+    async def execute(
+        db: AsyncSession,
         game_id: int,
         player_id: int,
         params: Optional[Dict[str, Any]] = None,
@@ -37,11 +37,11 @@ class SpecialConditionHandler:
             params = {}
 
         # Get player and game
-        player = (
-            db.query(Player)
-            .filter(Player.id == player_id, Player.game_id == game_id)
-            .first()
-        )
+        game = await game_store.get(db, game_id)
+        if not game:
+            return {"success": False, "message": "Game not found"}
+
+        player = game.players.get(player_id)
 
         if not player or not player.special_condition:
             return {"success": False, "message": "No special condition"}
@@ -49,10 +49,6 @@ class SpecialConditionHandler:
         if player.special_used:
             return {"success": False, "message": "Already used"}
 
-        game = db.query(Game).filter(Game.id == game_id).first()
-        if not game:
-            return {"success": False, "message": "Game not found"}
-
         special_name = player.special_condition.get("name")
 
         # Execute based on special name
@@ -96,22 +92,23 @@ class SpecialConditionHandler:
             return {"success": False, "message": f"Unknown special: {special_name}"}
 
         try:
-            result = handler(db, game, player, params)
+            # A failing handler leaves the game exactly as it was
+            with game_store.unit_of_work(game):
+                result = handler(game, player, params)
 
-            if result.get("success"):
-                # Mark as used only if successful
-                player.special_used = True
-                db.commit()
+                if result.get("success"):
+                    # Mark as used only if successful
+                    player.special_used = True
+                    game_store.mark_dirty(game)
 
             return result
         except Exception as e:
-            db.rollback()
             return {"success": False, "message": f"Error: {str(e)}"}
 
     # ==================== Special Condition Implementations ====================
 
     @staticmethod
-    def _sex_last(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _sex_last(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Секс наостанок: Пара різної статі отримує +1 голос кожен"""
         # This is passive - affects voting weight
         # Mark as "used" means it's activated for final check
@@ -122,24 +119,19 @@ class SpecialConditionHandler:
         }
 
     @staticmethod
-    def _swap_health(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _swap_health(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Віддай картку здоров'я: Обміняти картку здоров'я"""
         target_id = params.get("target_player_id")
         if not target_id:
             return {"success": False, "message": "Потрібен target_player_id"}
 
-        target = (
-            db.query(Player)
-            .filter(Player.id == target_id, Player.game_id == game.id)
-            .first()
-        )
+        target = game.players.get(target_id)
 
         if not target:
             return {"success": False, "message": "Гравець не знайдений"}
 
         # Swap health cards
         player.health, target.health = target.health, player.health
-        db.commit()
 
         return {
             "success": True,
@@ -149,7 +141,7 @@ class SpecialConditionHandler:
         }
 
     @staticmethod
-    def _hostage(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _hostage(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Заручник: Якщо вигнано - забирає когось з собою"""
         target_id = params.get("target_player_id")
         if not target_id:
@@ -160,8 +152,6 @@ class SpecialConditionHandler:
             player.special_data = {}
 
         player.special_data = {"hostage_target": target_id}
-        flag_modified(player, "special_data")
-        db.commit()
 
         return {
             "success": True,
@@ -171,17 +161,13 @@ class SpecialConditionHandler:
         }
 
     @staticmethod
-    def _antidote(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _antidote(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Антидот: Вилікувати хворобу"""
         target_id = params.get("target_player_id")
         if not target_id:
             return {"success": False, "message": "Потрібен target_player_id"}
 
-        target = (
-            db.query(Player)
-            .filter(Player.id == target_id, Player.game_id == game.id)
-            .first()
-        )
+        target = game.players.get(target_id)
 
         if not target:
             return {"success": False, "message": "Гравець не знайдений"}
@@ -189,7 +175,6 @@ class SpecialConditionHandler:
         # Set health to "Здоровий як бик"
         old_health = target.health
         target.health = "Здоровий як бик (вилікувано)"
-        db.commit()
 
         return {
             "success": True,
@@ -199,7 +184,7 @@ class SpecialConditionHandler:
         }
 
     @staticmethod
-    def _spy(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _spy(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Шпигун: Подивитись закриту картку"""
         target_id = params.get("target_player_id")
         card_type = params.get("card_type")
@@ -210,11 +195,7 @@ class SpecialConditionHandler:
                 "message": "Потрібен target_player_id та card_type",
             }
 
-        target = (
-            db.query(Player)
-            .filter(Player.id == target_id, Player.game_id == game.id)
-            .first()
-        )
+        target = game.players.get(target_id)
 
         if not target:
             return {"success": False, "message": "Гравець не знайдений"}
@@ -238,7 +219,7 @@ class SpecialConditionHandler:
         }
 
     @staticmethod
-    def _saboteur(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _saboteur(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Диверсант: Скасувати один голос"""
         target_id = params.get("target_player_id")
         if not target_id:
@@ -250,18 +231,11 @@ class SpecialConditionHandler:
                 "message": "Можна використати тільки під час голосування",
             }
 
-        target = (
-            db.query(Player)
-            .filter(Player.id == target_id, Player.game_id == game.id)
-            .first()
-        )
+        target = game.players.get(target_id)
 
-        if not target or target.votes_received <= 0:
+        if not target or not game.tally.cancel_one(target_id):
             return {"success": False, "message": "У гравця немає голосів"}
 
-        target.votes_received = max(0, target.votes_received - 1)
-        db.commit()
-
         return {
             "success": True,
             "message": f"Скасовано 1 голос проти {target.name}",
@@ -270,9 +244,11 @@ class SpecialConditionHandler:
         }
 
     @staticmethod
-    def _leader(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _leader(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Лідер: Подвійний голос"""
-        # This is passive - affects vote weight
+        # This is passive - affects vote weight (see vote_tally.vote_weight);
+        # a vote already cast this round is doubled too
+        game.tally.reweigh(player.id, 2)
         return {
             "success": True,
             "message": "Активовано: Ваш голос тепер рахується подвійно",
@@ -280,7 +256,7 @@ class SpecialConditionHandler:
         }
 
     @staticmethod
-    def _engineer(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _engineer(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Інженер: +1 місце в бункері"""
         # This is passive - affects bunker capacity calculation
         return {
@@ -290,7 +266,7 @@ class SpecialConditionHandler:
         }
 
     @staticmethod
-    def _detective(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _detective(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Детектив: Поставити запитання - правда"""
         # This requires chat interaction - just mark as used
         return {
@@ -300,7 +276,7 @@ class SpecialConditionHandler:
         }
 
     @staticmethod
-    def _psychologist(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _psychologist(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Психолог: Змінити голос гравця"""
         source_id = params.get("source_player_id")
         target_id = params.get("target_player_id")
@@ -314,23 +290,13 @@ class SpecialConditionHandler:
         if game.phase != GamePhase.VOTING:
             return {"success": False, "message": "Тільки під час голосування"}
 
-        source = db.query(Player).filter(Player.id == source_id).first()
-        if not source or not source.has_voted:
+        source = game.players.get(source_id)
+        if not source or not game.tally.has_voted(source_id):
             return {"success": False, "message": "Гравець ще не проголосував"}
 
-        # Change vote
-        old_target_id = source.voted_for
-        if old_target_id:
-            old_target = db.query(Player).filter(Player.id == old_target_id).first()
-            if old_target:
-                old_target.votes_received = max(0, old_target.votes_received - 1)
-
-        new_target = db.query(Player).filter(Player.id == target_id).first()
-        if new_target:
-            new_target.votes_received += 1
-            source.voted_for = target_id
-
-        db.commit()
+        # Change vote, keeping its weight
+        if target_id in game.players:
+            game.tally.recast(source_id, target_id)
 
         return {
             "success": True,
@@ -339,19 +305,13 @@ class SpecialConditionHandler:
         }
 
     @staticmethod
-    def _peacemaker(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _peacemaker(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Миротворець: Скасувати голосування"""
         if game.phase != GamePhase.VOTING:
             return {"success": False, "message": "Тільки під час голосування"}
 
-        # Reset all votes
-        players = db.query(Player).filter(Player.game_id == game.id).all()
-        for p in players:
-            p.votes_received = 0
-            p.has_voted = False
-            p.voted_for = None
-
-        db.commit()
+        # Reset all votes (they're only in the tally until REVEAL)
+        game.tally.clear()
 
         return {
             "success": True,
@@ -360,7 +320,7 @@ class SpecialConditionHandler:
         }
 
     @staticmethod
-    def _judge(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _judge(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Судія: Вирішує нічию"""
         # This is passive - checked during tie-break
         return {
@@ -370,7 +330,7 @@ class SpecialConditionHandler:
         }
 
     @staticmethod
-    def _mafia(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _mafia(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Мафіозі: Погроза (блеф чи правда)"""
         # Chat-based, just mark as used
         return {
@@ -380,24 +340,19 @@ class SpecialConditionHandler:
         }
 
     @staticmethod
-    def _sleeper_agent(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _sleeper_agent(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Сплячий агент: Поміняти професію"""
         target_id = params.get("target_player_id")
         if not target_id:
             return {"success": False, "message": "Потрібен target_player_id"}
 
-        target = (
-            db.query(Player)
-            .filter(Player.id == target_id, Player.game_id == game.id)
-            .first()
-        )
+        target = game.players.get(target_id)
 
         if not target:
             return {"success": False, "message": "Гравець не знайдений"}
 
         # Swap professions
         player.profession, target.profession = target.profession, player.profession
-        db.commit()
 
         return {
             "success": True,
@@ -407,7 +362,7 @@ class SpecialConditionHandler:
         }
 
     @staticmethod
-    def _telepath(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _telepath(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Телепат: Вгадати закриту картку"""
         target_id = params.get("target_player_id")
         card_type = params.get("card_type")
@@ -419,7 +374,7 @@ class SpecialConditionHandler:
                 "message": "Потрібен target_player_id, card_type, guess",
             }
 
-        target = db.query(Player).filter(Player.id == target_id).first()
+        target = game.players.get(target_id)
         if not target:
             return {"success": False, "message": "Гравець не знайдений"}
 
@@ -431,9 +386,6 @@ class SpecialConditionHandler:
                 target.revealed_cards = []
             if card_type not in target.revealed_cards:
                 target.revealed_cards.append(card_type)
-                flag_modified(target, "revealed_cards")
-
-            db.commit()
 
             return {
                 "success": True,
@@ -450,7 +402,7 @@ class SpecialConditionHandler:
             }
 
     @staticmethod
-    def _fortune_teller(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _fortune_teller(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Ворожка: Передбачити результат голосування"""
         # Requires prediction before voting ends
         return {
@@ -460,7 +412,7 @@ class SpecialConditionHandler:
         }
 
     @staticmethod
-    def _hacker(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _hacker(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Хакер: Подивитись 3 закритих картки Бункера"""
         if not game.bunker_cards or game.revealed_bunker_cards >= len(
             game.bunker_cards
@@ -479,7 +431,7 @@ class SpecialConditionHandler:
         }
 
     @staticmethod
-    def _diplomat(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _diplomat(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Дипломат: Альянс 3 гравців"""
         # Chat-based coalition
         return {
@@ -489,14 +441,10 @@ class SpecialConditionHandler:
         }
 
     @staticmethod
-    def _revolutionary(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _revolutionary(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Революціонер: Перемішати всі закриті картки"""
         # This is VERY powerful - shuffle all unrevealed cards
-        players = (
-            db.query(Player)
-            .filter(Player.game_id == game.id, Player.status == PlayerStatus.PLAYING)
-            .all()
-        )
+        players = game.playing_players()
 
         card_types = ["profession", "biology", "health", "hobby", "baggage", "fact"]
 
@@ -516,8 +464,6 @@ class SpecialConditionHandler:
             for p, new_value in zip(unrevealed_players, values):
                 setattr(p, card_type, new_value)
 
-        db.commit()
-
         return {
             "success": True,
             "message": "Революція! Всі закриті картки перемішано!",
@@ -525,7 +471,7 @@ class SpecialConditionHandler:
         }
 
     @staticmethod
-    def _guardian(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _guardian(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Страж: Захистити гравця від вигнання"""
         target_id = params.get("target_player_id")
         if not target_id:
@@ -539,8 +485,7 @@ class SpecialConditionHandler:
             "protected_player": target_id,
             "round": game.current_round,
         }
-        flag_modified(player, "special_data")
-        db.commit()
+        game.tally.protect(target_id)
 
         return {
             "success": True,
@@ -550,7 +495,7 @@ class SpecialConditionHandler:
         }
 
     @staticmethod
-    def _clone(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _clone(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Клон: Скопіювати відкриту картку"""
         target_id = params.get("target_player_id")
         card_type = params.get("card_type")
@@ -561,7 +506,7 @@ class SpecialConditionHandler:
                 "message": "Потрібен target_player_id та card_type",
             }
 
-        target = db.query(Player).filter(Player.id == target_id).first()
+        target = game.players.get(target_id)
         if not target:
             return {"success": False, "message": "Гравець не знайдений"}
 
@@ -572,7 +517,6 @@ class SpecialConditionHandler:
         # Copy card value
         card_value = getattr(target, card_type)
         setattr(player, card_type, card_value)
-        db.commit()
 
         return {
             "success": True,
@@ -582,13 +526,13 @@ class SpecialConditionHandler:
         }
 
     @staticmethod
-    def _mutant(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _mutant(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Мутант: Поміняти 2 картки з кимось"""
         target_id = params.get("target_player_id")
         if not target_id:
             return {"success": False, "message": "Потрібен target_player_id"}
 
-        target = db.query(Player).filter(Player.id == target_id).first()
+        target = game.players.get(target_id)
         if not target:
             return {"success": False, "message": "Гравець не знайдений"}
 
@@ -616,8 +560,6 @@ class SpecialConditionHandler:
             setattr(player, card_type, target_val)
             setattr(target, card_type, player_val)
 
-        db.commit()
-
         return {
             "success": True,
             "message": f"Обмінялись 2 картками з {target.name}",
@@ -626,7 +568,7 @@ class SpecialConditionHandler:
         }
 
     @staticmethod
-    def _medic(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _medic(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Санітар: Вигнаний віддає картку"""
         # This is passive - triggers on elimination
         return {
@@ -636,7 +578,7 @@ class SpecialConditionHandler:
         }
 
     @staticmethod
-    def _berserker(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _berserker(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Берсерк: Якщо вигнано - виганяє ще одного"""
         target_id = params.get("target_player_id")
         if not target_id:
@@ -647,8 +589,6 @@ class SpecialConditionHandler:
             player.special_data = {}
 
         player.special_data = {"berserker_target": target_id}
-        flag_modified(player, "special_data")
-        db.commit()
 
         return {
             "success": True,
@@ -658,7 +598,7 @@ class SpecialConditionHandler:
         }
 
     @staticmethod
-    def _ghost(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _ghost(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Привид: Голосує ще 2 раунди після вигнання"""
         # This is passive - checked when player is eliminated
         return {
@@ -668,7 +608,7 @@ class SpecialConditionHandler:
         }
 
     @staticmethod
-    def _oracle(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _oracle(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Оракул: Подивитись сторону B катастрофи"""
         if not game.catastrophe:
             return {"success": False, "message": "Немає катастрофи"}
@@ -683,7 +623,7 @@ class SpecialConditionHandler:
         }
 
     @staticmethod
-    def _illusionist(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _illusionist(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Ілюзіоніст: Приховати відкриту картку"""
         card_type = params.get("card_type")
         if not card_type:
@@ -693,8 +633,6 @@ class SpecialConditionHandler:
             return {"success": False, "message": "Картка не відкрита"}
 
         player.revealed_cards.remove(card_type)
-        flag_modified(player, "revealed_cards")
-        db.commit()
 
         return {
             "success": True,
@@ -704,7 +642,7 @@ class SpecialConditionHandler:
         }
 
     @staticmethod
-    def _magnet(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _magnet(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Магніт: Картка бункера стає особистою"""
         if game.revealed_bunker_cards >= len(game.bunker_cards):
             return {"success": False, "message": "Всі картки вже відкриті"}
@@ -716,8 +654,6 @@ class SpecialConditionHandler:
             player.special_data = {}
 
         player.special_data = {"personal_bunker_card": next_card}
-        flag_modified(player, "special_data")
-        db.commit()
 
         return {
             "success": True,
@@ -727,7 +663,7 @@ class SpecialConditionHandler:
         }
 
     @staticmethod
-    def _provocateur(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _provocateur(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Провокатор: Двоє голосують один за одного"""
         player1_id = params.get("player1_id")
         player2_id = params.get("player2_id")
@@ -742,8 +678,6 @@ class SpecialConditionHandler:
         player.special_data = {
             "forced_votes": {player1_id: player2_id, player2_id: player1_id}
         }
-        flag_modified(player, "special_data")
-        db.commit()
 
         return {
             "success": True,
@@ -752,13 +686,13 @@ class SpecialConditionHandler:
         }
 
     @staticmethod
-    def _anarchist(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _anarchist(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Анархіст: Скасувати іншу Особливу Умову"""
         target_id = params.get("target_player_id")
         if not target_id:
             return {"success": False, "message": "Потрібен target_player_id"}
 
-        target = db.query(Player).filter(Player.id == target_id).first()
+        target = game.players.get(target_id)
         if not target:
             return {"success": False, "message": "Гравець не знайдений"}
 
@@ -770,7 +704,6 @@ class SpecialConditionHandler:
 
         # Cancel their special
         target.special_used = False
-        db.commit()
 
         return {
             "success": True,
@@ -780,7 +713,7 @@ class SpecialConditionHandler:
         }
 
     @staticmethod
-    def _trader(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _trader(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Торговець: Обміняти картку (за згодою)"""
         # This requires agreement - mark as initiated
         return {
@@ -790,6 +723,6 @@ class SpecialConditionHandler:
         }
 
     @staticmethod
-    def _neutral(db: Session, game: Game, player: Player, params: Dict) -> Dict:
+    def _neutral(game: GameState, player: PlayerState, params: Dict) -> Dict:
         """Нейтральна зона: Немає особливої умови"""
         return {"success": False, "message": "У вас немає особливої умови"}
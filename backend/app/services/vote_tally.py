@@ -0,0 +1,164 @@
+"""Weighted vote counts of a game's current round
+
+During VOTING the tally, not the players' ``votes_received``/``has_voted``/
+``voted_for`` fields, is the source of truth: casting, recasting or cancelling
+a vote is O(1) and writes nothing. The result is copied onto the players once,
+when voting ends (``persist``), and is flushed with them from there.
+
+Targets are also kept in buckets by vote count, so the players with the most
+votes are found without looking at every player.
+"""
+
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+# Special whose owner's vote counts twice once it is used
+LEADER = "Лідер"
+
+
+def vote_weight(player) -> int:
+    """How many votes a player's ballot is worth"""
+    special = player.special_condition or {}
+    return 2 if special.get("name") == LEADER and player.special_used else 1
+
+
+class VoteTally:
+    """Ballots and weighted counts of one voting round"""
+
+    def __init__(self):
+        # voter_id -> (target_id, weight)
+        self.ballots: Dict[int, Tuple[int, int]] = {}
+        # target_id -> weighted votes (only targets with votes)
+        self.counts: Dict[int, int] = {}
+        # weighted votes -> targets with exactly that many
+        self._buckets: Dict[int, Set[int]] = {}
+        self.top = 0
+        # Players a Guardian shields from elimination this round
+        self.protected: Set[int] = set()
+
+    @classmethod
+    def from_players(cls, players: Iterable, current_round: int) -> "VoteTally":
+        """Rebuild from persisted player fields (as written by ``persist``)"""
+        tally = cls()
+        for player in players:
+            if player.votes_received:
+                tally._add(player.id, player.votes_received)
+            if player.has_voted and player.voted_for is not None:
+                tally.ballots[player.id] = (player.voted_for, vote_weight(player))
+            data = player.special_data or {}
+            if (
+                data.get("protected_player") is not None
+                and data.get("round") == current_round
+            ):
+                tally.protected.add(data["protected_player"])
+        return tally
+
+    # ==================== Reads ====================
+
+    def votes(self, target_id: int) -> int:
+        return self.counts.get(target_id, 0)
+
+    def has_voted(self, voter_id: int) -> bool:
+        return voter_id in self.ballots
+
+    def voted_for(self, voter_id: int) -> Optional[int]:
+        ballot = self.ballots.get(voter_id)
+        return ballot[0] if ballot else None
+
+    def candidates(self) -> Tuple[int, Set[int]]:
+        """Most votes held by an unprotected player, and who holds them
+
+        Walks the vote-count buckets from the top, so it costs the number of
+        distinct counts above the answer, not the number of players.
+        Returns ``(0, set())`` if nobody unprotected has a vote.
+        """
+        for count in range(self.top, 0, -1):
+            bucket = self._buckets.get(count)
+            if bucket:
+                eligible = bucket - self.protected
+                if eligible:
+                    return count, eligible
+        return 0, set()
+
+    def view(self, player) -> Dict[str, object]:
+        """Vote fields of one player, as sent in ``vote_update``"""
+        return {
+            "name": player.name,
+            "votes_received": self.votes(player.id),
+            "has_voted": self.has_voted(player.id),
+        }
+
+    # ==================== Changes ====================
+
+    def cast(self, voter_id: int, target_id: int, weight: int = 1):
+        """Record a vote, replacing the voter's previous one"""
+        self.retract(voter_id)
+        self.ballots[voter_id] = (target_id, weight)
+        self._add(target_id, weight)
+
+    def recast(self, voter_id: int, target_id: int) -> Optional[int]:
+        """Move an existing ballot to another target, keeping its weight
+
+        Returns the previous target, or None if the voter hasn't voted.
+        """
+        ballot = self.ballots.get(voter_id)
+        if ballot is None:
+            return None
+        self.cast(voter_id, target_id, ballot[1])
+        return ballot[0]
+
+    def retract(self, voter_id: int):
+        ballot = self.ballots.pop(voter_id, None)
+        if ballot is not None:
+            self._add(ballot[0], -ballot[1])
+
+    def reweigh(self, voter_id: int, weight: int):
+        """Change the weight of a ballot already cast"""
+        ballot = self.ballots.get(voter_id)
+        if ballot is not None and ballot[1] != weight:
+            self.cast(voter_id, ballot[0], weight)
+
+    def cancel_one(self, target_id: int) -> bool:
+        """Strike one vote against ``target_id`` (ballots stay cast)"""
+        if not self.votes(target_id):
+            return False
+        self._add(target_id, -1)
+        return True
+
+    def protect(self, player_id: int):
+        self.protected.add(player_id)
+
+    def clear(self):
+        """Drop every ballot (protection stays for the round)"""
+        self.ballots.clear()
+        self.counts.clear()
+        self._buckets.clear()
+        self.top = 0
+
+    def new_round(self):
+        self.clear()
+        self.protected.clear()
+
+    def persist(self, players: Iterable):
+        """Copy the result onto the players' fields"""
+        for player in players:
+            player.votes_received = self.votes(player.id)
+            player.has_voted = self.has_voted(player.id)
+            player.voted_for = self.voted_for(player.id)
+
+    def _add(self, target_id: int, delta: int):
+        old = self.counts.get(target_id, 0)
+        new = max(old + delta, 0)
+        if old:
+            bucket = self._buckets[old]
+            bucket.discard(target_id)
+            if not bucket:
+                del self._buckets[old]
+        if new:
+            self.counts[target_id] = new
+            self._buckets.setdefault(new, set()).add(target_id)
+            self.top = max(self.top, new)
+        else:
+            self.counts.pop(target_id, None)
+        # The top only drops by the (small) weight that was removed
+        while self.top and self.top not in self._buckets:
+            self.top -= 1
@@ -1,6 +1,7 @@
 """WebSocket package"""
 
 from .connection_manager import manager
+from .game_sync import game_sync
 from .websocket_routes import router as websocket_router
 
-__all__ = ["manager", "websocket_router"]
+__all__ = ["manager", "game_sync", "websocket_router"]
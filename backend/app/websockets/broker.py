@@ -0,0 +1,341 @@
+"""Pub/sub brokers carrying game broadcasts between worker processes
+
+Each worker delivers a broadcast to its own sockets directly and hands the
+already encoded frame to the broker, which forwards it to every other worker
+with sockets in that game. A worker subscribes to a game's channel while it
+has at least one connection in it.
+
+- ``InProcessBroker``: single worker, nothing to forward
+- ``LocalBroker``: workers on one machine, relayed through a Unix socket hub
+  run by whichever worker gets there first
+- ``RedisBroker``: workers on any number of machines, via Redis pub/sub
+  (needs the optional ``redis`` package)
+"""
+
+import asyncio
+import fcntl
+import os
+import secrets
+from typing import Callable, Dict, Optional, Set
+
+from ..config import settings
+
+# (game_id, message type, encoded frame) -> queue for the local sockets
+Deliver = Callable[[int, str, str], None]
+
+# Longest line the Unix socket hub accepts; a game_update of a full game is
+# well below this
+LINE_LIMIT = 4 * 1024 * 1024
+
+
+class Broker:
+    """Interface of a game channel broker; also the single-process no-op"""
+
+    # Whether other workers may have sockets in a game this one has none in
+    remote = False
+
+    async def start(self, deliver: Deliver):
+        """Connect; frames from other workers are passed to ``deliver``"""
+
+    async def stop(self):
+        """Disconnect"""
+
+    def subscribe(self, game_id: int):
+        """Receive broadcasts for a game"""
+
+    def unsubscribe(self, game_id: int):
+        """Stop receiving broadcasts for a game"""
+
+    def publish(self, game_id: int, msg_type: str, frame: str):
+        """Send a frame to the other workers subscribed to a game"""
+
+
+class InProcessBroker(Broker):
+    """Single worker: every socket is local, so there is nothing to do"""
+
+
+def pack(game_id: int, msg_type: Optional[str], frame: str) -> str:
+    # Encoded frames are compact JSON and never contain a newline
+    return f"{game_id} {msg_type or '-'} {frame}"
+
+
+def unpack(payload: str):
+    game_id, msg_type, frame = payload.split(" ", 2)
+    return int(game_id), (None if msg_type == "-" else msg_type), frame
+
+
+# ==== Local (Unix socket) broker ====
+
+
+class LocalHub:
+    """Relays published frames between the workers of one machine
+
+    Line protocol, one command per line: ``S <game_id>`` subscribes,
+    ``U <game_id>`` unsubscribes, ``P <game_id> <type> <frame>`` publishes to
+    every other peer subscribed to the game. Whoever holds the lock file next
+    to the socket is the hub.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.server: Optional[asyncio.AbstractServer] = None
+        # peer writer -> game ids it subscribed to
+        self.peers: Dict[asyncio.StreamWriter, Set[int]] = {}
+        self._lock_fd: Optional[int] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def try_start(self) -> bool:
+        """Become the hub unless another worker already is"""
+        fd = os.open(f"{self.path}.lock", os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        # Replaces a socket file left behind by a hub that died
+        self.server = await asyncio.start_unix_server(
+            self._accept, path=self.path, limit=LINE_LIMIT
+        )
+        return True
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            # Let connections accepted just before closing register as peers
+            await asyncio.sleep(0.01)
+            for writer in list(self.peers):
+                writer.close()
+            await self.server.wait_closed()
+            self.server = None
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def _accept(self, reader, writer):
+        # Registered right away, so stop() closes it even before it is served
+        self.peers[writer] = set()
+        task = asyncio.create_task(self._serve(reader, writer))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _serve(self, reader, writer):
+        games = self.peers[writer]
+        try:
+            while line := await reader.readline():
+                command, rest = line.decode().rstrip("\n").split(" ", 1)
+                if command == "S":
+                    games.add(int(rest))
+                elif command == "U":
+                    games.discard(int(rest))
+                elif command == "P":
+                    game_id = int(rest.split(" ", 1)[0])
+                    for peer, subscribed in list(self.peers.items()):
+                        if peer is not writer and game_id in subscribed:
+                            peer.write(line)
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            self.peers.pop(writer, None)
+            writer.close()
+
+
+class LocalBroker(Broker):
+    """Workers on one machine, talking through a Unix socket hub
+
+    The first worker to start runs the hub; the others connect to it. If the
+    hub's worker goes away, the rest reconnect and one of them takes over.
+    """
+
+    remote = True
+
+    CONNECT_ATTEMPTS = 50
+
+    def __init__(self, path: str):
+        self.path = path
+        self.games: Set[int] = set()
+        self.hub: Optional[LocalHub] = None
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, deliver: Deliver):
+        await self._connect()
+        self._task = asyncio.create_task(self._run(deliver))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+        if self.hub:
+            await self.hub.stop()
+            self.hub = None
+
+    def subscribe(self, game_id: int):
+        self.games.add(game_id)
+        self._send(f"S {game_id}")
+
+    def unsubscribe(self, game_id: int):
+        self.games.discard(game_id)
+        self._send(f"U {game_id}")
+
+    def publish(self, game_id: int, msg_type: str, frame: str):
+        self._send(f"P {pack(game_id, msg_type, frame)}")
+
+    def _send(self, line: str):
+        if self._writer is not None and not self._writer.is_closing():
+            self._writer.write(f"{line}\n".encode())
+
+    async def _connect(self):
+        for _ in range(self.CONNECT_ATTEMPTS):
+            try:
+                self._reader, self._writer = await asyncio.open_unix_connection(
+                    self.path, limit=LINE_LIMIT
+                )
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                if self.hub is None:
+                    hub = LocalHub(self.path)
+                    if await hub.try_start():
+                        self.hub = hub
+                        continue
+                # Another worker is starting the hub
+                await asyncio.sleep(0.05)
+        else:
+            raise OSError(f"No local broker hub at {self.path}")
+
+        for game_id in self.games:
+            self._send(f"S {game_id}")
+
+    async def _run(self, deliver: Deliver):
+        while True:
+            try:
+                while line := await self._reader.readline():
+                    deliver(*unpack(line.decode().rstrip("\n")[2:]))
+            except ConnectionError:
+                pass
+            print("WARNING: Lost connection to the local broker hub, reconnecting")
+            self._writer = None
+            try:
+                await self._connect()
+            except OSError as e:
+                print(f"WARNING: Local broker reconnect failed: {e}")
+                await asyncio.sleep(1)
+
+
+# ==== Redis broker ====
+
+
+class RedisBroker(Broker):
+    """Workers anywhere, through Redis pub/sub channels ``bunker:game:<id>``
+
+    Redis delivers a message to its publisher too if it is subscribed, so
+    every payload is tagged with the worker it came from.
+    """
+
+    CHANNEL = "bunker:game:"
+    remote = True
+
+    def __init__(self, url: str):
+        self.url = url
+        self.origin = secrets.token_hex(4)
+        self.redis = None
+        self.pubsub = None
+        self._task: Optional[asyncio.Task] = None
+        self._pending: Set[asyncio.Task] = set()
+
+    async def start(self, deliver: Deliver):
+        try:
+            import redis.asyncio as aioredis
+        except ImportError as e:
+            raise RuntimeError(
+                "WS_BROKER=redis needs the redis package: pip install redis"
+            ) from e
+
+        self.redis = aioredis.from_url(self.url, decode_responses=True)
+        self.pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        self._task = asyncio.create_task(self._run(deliver))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.pubsub:
+            await self.pubsub.aclose()
+        if self.redis:
+            await self.redis.aclose()
+
+    def subscribe(self, game_id: int):
+        self._spawn(self.pubsub.subscribe(f"{self.CHANNEL}{game_id}"))
+
+    def unsubscribe(self, game_id: int):
+        self._spawn(self.pubsub.unsubscribe(f"{self.CHANNEL}{game_id}"))
+
+    def publish(self, game_id: int, msg_type: str, frame: str):
+        payload = f"{self.origin} {pack(game_id, msg_type, frame)}"
+        self._spawn(self.redis.publish(f"{self.CHANNEL}{game_id}", payload))
+
+    def _spawn(self, coro):
+        if self.redis is None:
+            coro.close()
+            return
+        task = asyncio.create_task(coro)
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _run(self, deliver: Deliver):
+        while True:
+            try:
+                if not self.pubsub.subscribed:
+                    await asyncio.sleep(0.05)
+                    continue
+                message = await self.pubsub.get_message(timeout=1.0)
+                if message is None:
+                    continue
+                origin, payload = message["data"].split(" ", 1)
+                if origin != self.origin:
+                    deliver(*unpack(payload))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"WARNING: Redis broker error: {e}")
+                await asyncio.sleep(1)
+
+
+def create_broker() -> Broker:
+    """Broker selected by ``WS_BROKER`` (in-process unless set otherwise)
+
+    REDIS_URL alone doesn't select Redis: ask for it with ``WS_BROKER=redis``.
+    """
+    kind = settings.WS_BROKER
+    if kind == "memory":
+        return InProcessBroker()
+    if not settings.WS_GAME_AFFINITY:
+        # Two workers holding the same game would overwrite each other's flushes
+        raise RuntimeError(
+            f"WS_BROKER={kind} needs game-affinity routing in front of the "
+            "workers; set WS_GAME_AFFINITY=true once requests for a game "
+            "always reach the same worker"
+        )
+    if kind == "local":
+        return LocalBroker(settings.WS_BROKER_SOCKET)
+    if kind == "redis":
+        if not settings.REDIS_URL:
+            raise RuntimeError("WS_BROKER=redis needs REDIS_URL")
+        return RedisBroker(settings.REDIS_URL)
+    raise RuntimeError(f"Unknown WS_BROKER: {kind}")
@@ -1,29 +1,162 @@
 """WebSocket connection manager"""
 
-from fastapi import WebSocket, WebSocketDisconnect
-from typing import Dict, List, Set
-import json
+from fastapi import WebSocket
+from typing import Deque, Dict, List, Optional, Set, Tuple
+import asyncio
+import time
+
+import orjson
+from collections import deque
 from datetime import datetime
 
+from ..config import settings
+from .broker import Broker, InProcessBroker, create_broker
+from .protocols import JSON, EncodedMessage, Frame, encode
+from .replay import ReplayBuffer
 
-class ConnectionManager:
-    """Manages WebSocket connections for real-time game updates"""
+
+# Only the latest of these matters to a client, so a queued one is replaced.
+# vote_update isn't one: each carries only the players whose votes changed.
+COALESCED_TYPES = {"game_update", "ping"}
+
+
+class Outbox:
+    """Bounded queue of encoded frames waiting to be sent to one socket"""
 
     def __init__(self):
+        # (message type, frame), oldest first
+        self.frames: Deque[Tuple[str, Frame]] = deque()
+        self.wakeup = asyncio.Event()
+        self.writer: Optional[asyncio.Task] = None
+
+    def put(self, msg_type: str, frame: Frame) -> bool:
+        """Queue a frame; returns False if the queue is full
+
+        A queued game_update is superseded by the new one, which
+        goes to the back so it still follows whatever was queued before it.
+        """
+        if msg_type in COALESCED_TYPES:
+            for i, (queued_type, _) in enumerate(self.frames):
+                if queued_type == msg_type:
+                    del self.frames[i]
+                    break
+        if len(self.frames) >= settings.WS_QUEUE_SIZE:
+            return False
+        self.frames.append((msg_type, frame))
+        self.wakeup.set()
+        return True
+
+
+class ConnectionManager:
+    """Manages WebSocket connections for real-time game updates
+
+    Every socket has its own outbox drained by a writer task, so handlers
+    only enqueue and never wait on a client. Broadcasts also go through the
+    broker to sockets connected to other workers.
+    """
+
+    def __init__(self, broker: Optional[Broker] = None):
+        self.broker = broker or InProcessBroker()
         # game_id -> list of websockets
         self.active_connections: Dict[int, List[WebSocket]] = {}
         # websocket -> game_id
         self.connection_game_map: Dict[WebSocket, int] = {}
+        # websocket -> id of the player authenticated at handshake
+        self.connection_player_map: Dict[WebSocket, int] = {}
+        # websocket -> wire format negotiated at handshake
+        self.connection_protocols: Dict[WebSocket, str] = {}
+        # websocket -> pending outbound frames
+        self.outboxes: Dict[WebSocket, Outbox] = {}
+        # websocket -> sends in a row that missed the deadline
+        self.missed_sends: Dict[WebSocket, int] = {}
+        # websocket -> monotonic time of the last message from the client
+        self.last_seen: Dict[WebSocket, float] = {}
+        # game_id -> recent broadcasts, for clients resuming after a reconnect
+        self.replay: Dict[int, ReplayBuffer] = {}
+        # Sockets dropped for being too slow / for going silent, since startup
+        self.evicted_count = 0
+        self.reaped_count = 0
+        self._closing: Set[asyncio.Task] = set()
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
+    async def start(self, broker: Optional[Broker] = None):
+        """Connect to the broker configured by WS_BROKER; start heartbeats"""
+        self.broker = broker or create_broker()
+        await self.broker.start(self.deliver)
+        for game_id in self.active_connections:
+            self.broker.subscribe(game_id)
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
 
-    async def connect(self, websocket: WebSocket, game_id: int):
+    async def stop(self):
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+        await self.broker.stop()
+        self.broker = InProcessBroker()
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        game_id: int,
+        player_id: Optional[int] = None,
+        protocol: str = JSON,
+        subprotocol: Optional[str] = None,
+    ):
         """Accept and register a new WebSocket connection"""
-        await websocket.accept()
+        await websocket.accept(subprotocol=subprotocol)
 
         if game_id not in self.active_connections:
             self.active_connections[game_id] = []
+            self.broker.subscribe(game_id)
 
         self.active_connections[game_id].append(websocket)
         self.connection_game_map[websocket] = game_id
+        if player_id is not None:
+            self.connection_player_map[websocket] = player_id
+        self.connection_protocols[websocket] = protocol
+        self.last_seen[websocket] = time.monotonic()
+
+        outbox = Outbox()
+        outbox.writer = asyncio.create_task(self._writer(websocket, outbox))
+        self.outboxes[websocket] = outbox
+
+    def resume(self, websocket: WebSocket, resume: Optional[Tuple[str, int]] = None):
+        """Catch a connected client up on what it missed
+
+        It is sent a ``resume`` message first. If it passed the ``(stream,
+        seq)`` it last saw and everything after that is still buffered, that
+        follows and ``replayed`` is true; otherwise it must reload the game.
+        Either way the message carries the stream and seq it is now at.
+        """
+        game_id = self.connection_game_map[websocket]
+        buffer = self.replay.get(game_id)
+        if buffer is None:
+            buffer = self.replay[game_id] = ReplayBuffer()
+        buffer.idle_since = None
+
+        missed = None
+        if resume and resume[0] == buffer.stream:
+            missed = buffer.since(resume[1])
+            # Replaying more than fits comfortably in the outbox costs more
+            # than reloading the snapshot
+            if missed is not None and len(missed) > settings.WS_QUEUE_SIZE // 2:
+                missed = None
+
+        protocol = self.connection_protocols.get(websocket, JSON)
+        info = {
+            "stream": buffer.stream,
+            "seq": buffer.seq,
+            "replayed": missed is not None,
+        }
+        frame = self.encode(self.stamp({"type": "resume", "data": info}), protocol)
+        self._enqueue(websocket, "resume", frame)
+
+        for _, msg_type, encoded in missed or ():
+            self._enqueue(websocket, msg_type, encoded.frame(protocol, self.encode))
 
     def disconnect(self, websocket: WebSocket):
         """Remove a WebSocket connection"""
@@ -36,51 +169,239 @@ class ConnectionManager:
                 # Clean up empty game rooms
                 if not self.active_connections[game_id]:
                     del self.active_connections[game_id]
+                    self.broker.unsubscribe(game_id)
+                    if game_id in self.replay:
+                        self.replay[game_id].idle_since = time.monotonic()
 
             del self.connection_game_map[websocket]
+        self.connection_player_map.pop(websocket, None)
+        self.connection_protocols.pop(websocket, None)
+        self.last_seen.pop(websocket, None)
+        self.missed_sends.pop(websocket, None)
+
+        outbox = self.outboxes.pop(websocket, None)
+        if outbox and outbox.writer and outbox.writer is not asyncio.current_task():
+            outbox.writer.cancel()
+
+    def touch(self, websocket: WebSocket):
+        """Record that the client is alive (it just sent something)"""
+        if websocket in self.last_seen:
+            self.last_seen[websocket] = time.monotonic()
+
+    def check_heartbeats(self, now: Optional[float] = None) -> int:
+        """Ping quiet clients and drop those silent past WS_REAP_SECONDS
+
+        A half-open socket accepts sends until the kernel buffer fills, so
+        only messages from the client prove it is still there. Returns the
+        number of sockets reaped.
+        """
+        now = time.monotonic() if now is None else now
+        reaped = 0
+        for websocket, seen in list(self.last_seen.items()):
+            idle = now - seen
+            if idle >= settings.WS_REAP_SECONDS:
+                self._drop(websocket, f"silent for {idle:.0f}s", code=1001)
+                reaped += 1
+            elif idle >= settings.WS_HEARTBEAT_SECONDS:
+                self._enqueue(websocket, "ping", self._ping_frame(websocket))
+        self.reaped_count += reaped
+        return reaped
+
+    def _ping_frame(self, websocket: WebSocket) -> Frame:
+        protocol = self.connection_protocols.get(websocket, JSON)
+        return self.encode(self.stamp({"type": "ping"}), protocol)
+
+    def prune_replay(self, now: Optional[float] = None) -> int:
+        """Drop replay buffers of games nobody reconnected to in time"""
+        now = time.monotonic() if now is None else now
+        expired = [
+            game_id
+            for game_id, buffer in self.replay.items()
+            if buffer.idle_since is not None
+            and now - buffer.idle_since >= settings.WS_REPLAY_TTL_SECONDS
+        ]
+        for game_id in expired:
+            del self.replay[game_id]
+        return len(expired)
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(settings.WS_HEARTBEAT_SECONDS)
+            try:
+                self.check_heartbeats()
+                self.prune_replay()
+            except Exception as e:
+                print(f"WARNING: WebSocket heartbeat failed: {e}")
+
+    def connection_counts(self, now: Optional[float] = None) -> Dict[int, dict]:
+        """game_id -> sockets heard from recently / quiet past WS_STALE_SECONDS"""
+        now = time.monotonic() if now is None else now
+        counts = {}
+        for game_id, connections in self.active_connections.items():
+            stale = sum(
+                1
+                for ws in connections
+                if now - self.last_seen.get(ws, now) >= settings.WS_STALE_SECONDS
+            )
+            counts[game_id] = {"active": len(connections) - stale, "stale": stale}
+        return counts
+
+    @staticmethod
+    def stamp(message: dict) -> dict:
+        return {**message, "timestamp": datetime.utcnow().isoformat()}
+
+    @staticmethod
+    def encode(message: dict, protocol: str = JSON) -> Frame:
+        """Serialize a message into a frame of the given wire format"""
+        return encode(message, protocol)
 
     async def send_personal_message(self, message: dict, websocket: WebSocket):
         """Send a message to a specific WebSocket"""
-        try:
-            await websocket.send_json(
-                {**message, "timestamp": datetime.utcnow().isoformat()}
-            )
-        except:
-            pass
+        protocol = self.connection_protocols.get(websocket, JSON)
+        frame = self.encode(self.stamp(message), protocol)
+        self._enqueue(websocket, message.get("type"), frame)
 
     async def broadcast_to_game(
         self, game_id: int, message: dict, exclude: WebSocket = None
     ):
         """Broadcast a message to all connections in a game"""
-        if game_id not in self.active_connections:
+        self.publish(game_id, message, exclude)
+
+    def publish(self, game_id: int, message: dict, exclude: WebSocket = None):
+        """Queue a message for every connection in a game, on every worker
+
+        The message is encoded once per wire format in use and the same frame
+        is queued for every socket of that format. Doesn't wait for any
+        client, so it is safe to call from synchronous code.
+        """
+        buffer = self.replay.get(game_id)
+        if buffer is None and not self.has_listeners(game_id):
             return
 
-        message_data = {**message, "timestamp": datetime.utcnow().isoformat()}
+        stamped = self.stamp(message)
+        msg_type = message.get("type")
 
-        disconnected = []
+        if self.broker.remote:
+            # Without our seq: every worker numbers its own replay stream
+            self.broker.publish(game_id, msg_type, self.encode(stamped, JSON))
 
-        for connection in self.active_connections[game_id]:
-            if connection == exclude:
-                continue
+        encoded = self._record(game_id, msg_type, stamped)
+        if self.has_listeners(game_id):
+            self._deliver(game_id, msg_type, encoded, exclude)
 
-            try:
-                await connection.send_json(message_data)
-            except:
-                disconnected.append(connection)
+    def has_listeners(self, game_id: int) -> bool:
+        """Whether a broadcast to the game may reach any socket"""
+        return game_id in self.active_connections or self.broker.remote
 
-        # Clean up disconnected sockets
-        for conn in disconnected:
-            self.disconnect(conn)
+    def deliver(self, game_id: int, msg_type: str, frame: str):
+        """Queue a JSON frame forwarded by the broker for this worker's sockets"""
+        if game_id in self.replay:
+            encoded = self._record(game_id, msg_type, orjson.loads(frame))
+        else:
+            encoded = EncodedMessage(json_frame=frame)
+        self._deliver(game_id, msg_type, encoded)
+
+    def _record(self, game_id: int, msg_type: str, message: dict) -> EncodedMessage:
+        """Number a broadcast and keep it in the game's replay buffer, if any
+
+        Kept even while nobody is connected, for clients coming back.
+        """
+        buffer = self.replay.get(game_id)
+        if buffer is not None:
+            message["seq"] = buffer.next_seq()
+        encoded = EncodedMessage(message)
+        if buffer is not None:
+            buffer.append(message["seq"], msg_type, encoded)
+        return encoded
+
+    def _deliver(
+        self,
+        game_id: int,
+        msg_type: str,
+        encoded: EncodedMessage,
+        exclude: WebSocket = None,
+    ):
+        for connection in list(self.active_connections.get(game_id, ())):
+            if connection != exclude:
+                protocol = self.connection_protocols.get(connection, JSON)
+                frame = encoded.frame(protocol, self.encode)
+                self._enqueue(connection, msg_type, frame)
+
+    def _enqueue(self, websocket: WebSocket, msg_type: str, frame: Frame):
+        outbox = self.outboxes.get(websocket)
+        if outbox is None:
+            return
+        if not outbox.put(msg_type, frame):
+            # Never drop a message silently: the client resyncs on reconnect
+            self._evict(websocket, "outbound queue full")
+
+    async def _writer(self, websocket: WebSocket, outbox: Outbox):
+        """Send queued frames to one socket, in order"""
+        while websocket in self.outboxes:
+            await outbox.wakeup.wait()
+            outbox.wakeup.clear()
+            while outbox.frames and websocket in self.outboxes:
+                _, frame = outbox.frames.popleft()
+                await self._send(websocket, frame)
+
+    async def _send(self, websocket: WebSocket, frame: Frame):
+        """Send with a deadline; drop sockets that fail or keep missing it"""
+        send = websocket.send_bytes if isinstance(frame, bytes) else websocket.send_text
+        try:
+            await asyncio.wait_for(
+                send(frame),
+                timeout=settings.WS_SEND_TIMEOUT_MS / 1000,
+            )
+        except asyncio.TimeoutError:
+            missed = self.missed_sends.get(websocket, 0) + 1
+            self.missed_sends[websocket] = missed
+            if missed >= settings.WS_MAX_MISSED_SENDS:
+                self._evict(websocket, f"{missed} missed sends")
+            return
+        except Exception:
+            # Clean up disconnected sockets
+            self.disconnect(websocket)
+            return
+        self.missed_sends.pop(websocket, None)
+
+    def _evict(self, websocket: WebSocket, reason: str):
+        """Drop a client that can't keep up; it can reconnect and resync"""
+        self._drop(websocket, reason, code=1013)  # Try again later
+        self.evicted_count += 1
+
+    def _drop(self, websocket: WebSocket, reason: str, code: int):
+        game_id = self.connection_game_map.get(websocket)
+        print(f"WARNING: Dropping WebSocket client from game {game_id}: {reason}")
+        self.disconnect(websocket)
+
+        # Close in the background so no sender waits on it
+        task = asyncio.create_task(self._close(websocket, code))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _close(self, websocket: WebSocket, code: int):
+        try:
+            await asyncio.wait_for(
+                websocket.close(code=code),
+                timeout=settings.WS_SEND_TIMEOUT_MS / 1000,
+            )
+        except Exception:
+            pass
 
     async def send_game_update(self, game_id: int, data: dict):
         """Send a game state update to all players"""
         await self.broadcast_to_game(game_id, {"type": "game_update", "data": data})
 
-    async def send_chat_message(self, game_id: int, player_name: str, message: str):
-        """Broadcast a chat message"""
+    async def send_chat_message(
+        self, game_id: int, player_name: str, message: str, entry: dict = None
+    ):
+        """Broadcast a chat message (``entry``: the stored message, with its id)"""
         await self.broadcast_to_game(
             game_id,
-            {"type": "chat", "data": {"player_name": player_name, "message": message}},
+            {
+                "type": "chat",
+                "data": entry or {"player_name": player_name, "message": message},
+            },
         )
 
     async def send_player_joined(self, game_id: int, player_name: str):
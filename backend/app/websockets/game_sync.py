@@ -0,0 +1,73 @@
+"""Delta sync of game state over WebSocket
+
+After every committed change to a game with connected clients (or a replay
+buffer for clients coming back), the public
+projection is diffed against the last one published and the difference is
+broadcast as a ``delta`` message::
+
+    {"type": "delta", "data": {"gen": ..., "from": 41, "seq": 43, "ops": [...]}}
+
+``seq`` is the game version the ops lead to and ``from`` the version they
+were computed against. A client holding any version in ``[from, seq)`` of the
+same ``gen`` applies the ops; anything else means it missed something, and it
+refetches the snapshot from ``GET /api/games/{code}``.
+"""
+
+from typing import Dict
+
+from ..services import GameSnapshot, game_store, get_snapshot
+from ..services.game_snapshot import diff_snapshots
+from ..services.game_state import GameState
+from .connection_manager import manager
+
+
+class GameSync:
+    """Publishes deltas of live games to their sockets"""
+
+    def __init__(self):
+        # game_id -> snapshot the last delta led to
+        self.published: Dict[int, GameSnapshot] = {}
+
+    def track(self, state: GameState):
+        """Start publishing deltas for a game a client just connected to"""
+        published = self.published.get(state.id)
+        if published is None or published.state is not state:
+            self.published[state.id] = get_snapshot(state)
+
+    def on_change(self, state: GameState):
+        if not manager.has_listeners(state.id) and state.id not in manager.replay:
+            # Nobody to tell and nothing to replay; connecting clients start
+            # from a fresh snapshot
+            self.published.pop(state.id, None)
+            return
+
+        old = self.published.get(state.id)
+        new = get_snapshot(state)
+
+        if old is None or old.state is not state:
+            # Game was reloaded: versions restarted, clients must resync
+            base, ops = None, []
+        else:
+            base, ops = old.version, diff_snapshots(old.public, new.public)
+            if not ops:
+                # Nothing visible changed; the next delta covers this version
+                return
+
+        self.published[state.id] = new
+        manager.publish(
+            state.id,
+            {
+                "type": "delta",
+                "data": {
+                    "gen": state.generation,
+                    "from": base,
+                    "seq": new.version,
+                    "ops": ops,
+                },
+            },
+        )
+
+
+# Global game sync instance
+game_sync = GameSync()
+game_store.add_listener(game_sync.on_change)
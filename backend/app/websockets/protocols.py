@@ -0,0 +1,67 @@
+"""Wire formats of server -> client WebSocket frames
+
+Clients offer subprotocols in order of preference; the first one we support
+wins. ``bunker.msgpack.v1`` sends binary MessagePack frames, which are much
+smaller than JSON for the same message; ``bunker.json.v1`` (or no subprotocol
+at all, for older clients) sends JSON text frames. Client -> server messages
+are JSON text either way.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+
+import msgpack
+import orjson
+
+JSON = "json"
+MSGPACK = "msgpack"
+
+SUBPROTOCOLS: Dict[str, str] = {
+    "bunker.msgpack.v1": MSGPACK,
+    "bunker.json.v1": JSON,
+}
+
+Frame = Union[str, bytes]
+
+
+def negotiate(offered: List[str]) -> Tuple[Optional[str], str]:
+    """(subprotocol to accept, wire format) for the client's offer"""
+    for subprotocol in offered:
+        if subprotocol in SUBPROTOCOLS:
+            return subprotocol, SUBPROTOCOLS[subprotocol]
+    return None, JSON
+
+
+def _msgpack_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def encode(message: dict, protocol: str = JSON) -> Frame:
+    """Serialize a message into a text (JSON) or binary (MessagePack) frame"""
+    if protocol == MSGPACK:
+        return msgpack.packb(message, default=_msgpack_default)
+    return orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+class EncodedMessage:
+    """One broadcast, encoded at most once per wire format
+
+    Built either from the message itself or, for broadcasts forwarded by the
+    broker, from its JSON frame.
+    """
+
+    def __init__(self, message: Optional[dict] = None, json_frame: str = None):
+        self.message = message
+        self.frames: Dict[str, Frame] = {}
+        if json_frame is not None:
+            self.frames[JSON] = json_frame
+
+    def frame(self, protocol: str, encoder=encode) -> Frame:
+        frame = self.frames.get(protocol)
+        if frame is None:
+            if self.message is None:
+                self.message = orjson.loads(self.frames[JSON])
+            frame = self.frames[protocol] = encoder(self.message, protocol)
+        return frame
@@ -0,0 +1,45 @@
+"""Recent broadcasts of a game, for clients resuming after a reconnect
+
+Every broadcast to a game with a buffer gets the next ``seq`` of the buffer's
+``stream``. A client reconnecting with ``?stream=...&seq=N`` is sent whatever
+came after N, as long as it is still buffered; otherwise it is told to reload
+the snapshot. A new buffer (after a restart, or once a game had no sockets
+for WS_REPLAY_TTL_SECONDS) has a new stream id, so old seqs never match it.
+"""
+
+import secrets
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+from ..config import settings
+from .protocols import EncodedMessage
+
+# (seq, message type, message)
+Event = Tuple[int, str, EncodedMessage]
+
+
+class ReplayBuffer:
+    """Bounded, sequenced log of one game's broadcasts"""
+
+    def __init__(self, size: Optional[int] = None):
+        self.stream = secrets.token_hex(4)
+        self.seq = 0
+        self.events: Deque[Event] = deque(maxlen=size or settings.WS_REPLAY_SIZE)
+        # Monotonic time the game's last socket left, None while it has some
+        self.idle_since: Optional[float] = None
+
+    def next_seq(self) -> int:
+        self.seq += 1
+        return self.seq
+
+    def append(self, seq: int, msg_type: str, message: EncodedMessage):
+        self.events.append((seq, msg_type, message))
+
+    def since(self, seq: int) -> Optional[List[Event]]:
+        """Events after ``seq``, or None if some of them are gone"""
+        if seq > self.seq or seq < 0:
+            return None
+        first = self.events[0][0] if self.events else self.seq + 1
+        if seq + 1 < first:
+            return None
+        return [event for event in self.events if event[0] > seq]
@@ -1,94 +1,108 @@
 """WebSocket routes for real-time communication"""
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
-from sqlalchemy.orm import Session
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import async_sessionmaker
 import json
-
-from ..database import get_db
-from ..models import Game, Player
+from typing import Optional, Tuple
+
+from .. import query_stats
+from ..database import get_async_sessionmaker
+from ..schemas import (
+    ChatMessageCreate,
+    RevealCardRequest,
+    UseSpecialRequest,
+    VoteRequest,
+)
+from ..services import (
+    ActionError,
+    PlayerActions,
+    game_actors,
+    game_store,
+    get_snapshot,
+    phase_scheduler,
+)
 from .connection_manager import manager
+from .game_sync import game_sync
+from .protocols import negotiate
 
 router = APIRouter()
 
+# Commands a player can send over the socket: type -> (action, payload schema)
+COMMANDS = {
+    "vote": (PlayerActions.vote, VoteRequest),
+    "reveal_card": (PlayerActions.reveal_card, RevealCardRequest),
+    "use_special": (PlayerActions.use_special, UseSpecialRequest),
+    "chat": (PlayerActions.chat, ChatMessageCreate),
+}
+
+# Message types handled by handle_message; others share one metrics label
+MESSAGE_TYPES = frozenset(
+    {"ping", "pong", "pause_toggle", "game_result", "request_update", *COMMANDS}
+)
+
+
+def resume_point(websocket: WebSocket) -> Optional[Tuple[str, int]]:
+    """``(stream, seq)`` a reconnecting client last saw, from the query string"""
+    stream = websocket.query_params.get("stream")
+    seq = websocket.query_params.get("seq", "")
+    if not stream or not seq.isdigit():
+        return None
+    return stream, int(seq)
+
+
+async def load_game(sessions: async_sessionmaker, game_id: int):
+    """Current state of a game, opening a session only if it isn't cached"""
+    async with sessions() as db:
+        return await game_store.get(db, game_id)
+
 
 @router.websocket("/ws/{game_code}")
 async def websocket_endpoint(
-    websocket: WebSocket, game_code: str, db: Session = Depends(get_db)
+    websocket: WebSocket,
+    game_code: str,
+    sessions: async_sessionmaker = Depends(get_async_sessionmaker),
 ):
-    """WebSocket endpoint for game real-time updates"""
+    """WebSocket endpoint for game real-time updates
+
+    The socket is bound at handshake to the player whose session cookie it
+    carries. It holds no database session: each message reads the in-memory
+    game state, loading it with a session of its own if it isn't cached.
+    """
 
-    # Find game
-    game = db.query(Game).filter(Game.code == game_code.upper()).first()
+    # Find game and player
+    with query_stats.track("WS connect"):
+        async with sessions() as db:
+            game = await game_store.get_by_code(db, game_code)
 
-    if not game:
+    session_id = websocket.cookies.get("session_id")
+    player = game.player_by_session(session_id) if game and session_id else None
+
+    if not player:
         await websocket.close(code=1008)  # Policy violation
         return
 
-    # Connect
-    await manager.connect(websocket, game.id)
+    # Connect, in the most compact wire format the client offers
+    game_id = game.id
+    subprotocol, protocol = negotiate(websocket.scope.get("subprotocols", []))
+    await manager.connect(websocket, game_id, player.id, protocol, subprotocol)
+    manager.resume(websocket, resume_point(websocket))
+    game_sync.track(game)
 
     try:
         while True:
             # Receive messages
             data = await websocket.receive_text()
+            manager.touch(websocket)
             message_data = json.loads(data)
 
             # Handle different message types
             msg_type = message_data.get("type")
 
-            if msg_type == "ping":
-                await manager.send_personal_message({"type": "pong"}, websocket)
-
-            elif msg_type == "chat":
-                # Broadcast chat message
-                await manager.send_chat_message(
-                    game.id,
-                    message_data.get("player_name", "Unknown"),
-                    message_data.get("message", ""),
-                )
-
-            elif msg_type == "pause_toggle":
-                # Broadcast pause state to all players
-                paused = message_data.get("paused", False)
-                await manager.broadcast_to_game(
-                    game.id, {"type": "timer_paused", "data": {"paused": paused}}
-                )
-
-            elif msg_type == "game_result":
-                # Broadcast game result (victory/defeat) to all players
-                result = message_data.get("result", "")
-                await manager.broadcast_to_game(
-                    game.id, {"type": "game_result", "data": {"result": result}}
-                )
-
-            elif msg_type == "request_update":
-                # Send current game state
-                players = db.query(Player).filter(Player.game_id == game.id).all()
-
-                game_state = {
-                    "phase": game.phase.value,
-                    "current_round": game.current_round,
-                    "phase_end_time": game.phase_end_time.isoformat() + "Z"
-                    if game.phase_end_time
-                    else None,
-                    "players": [
-                        {
-                            "id": p.id,
-                            "name": p.name,
-                            "status": p.status.value,
-                            "is_host": p.is_host,
-                            "votes_received": p.votes_received,
-                            "has_voted": p.has_voted,
-                            "revealed_cards": p.revealed_cards
-                            if p.revealed_cards
-                            else [],
-                        }
-                        for p in players
-                    ],
-                }
-
-                await manager.send_personal_message(
-                    {"type": "game_update", "data": game_state}, websocket
+            label = msg_type if msg_type in MESSAGE_TYPES else "unknown"
+            with query_stats.track(f"WS {label}"):
+                await handle_message(
+                    websocket, sessions, game_id, msg_type, message_data
                 )
 
     except WebSocketDisconnect:
@@ -96,3 +110,125 @@ async def websocket_endpoint(
     except Exception as e:
         print(f"WebSocket error: {e}")
         manager.disconnect(websocket)
+
+
+async def handle_message(
+    websocket: WebSocket,
+    sessions: async_sessionmaker,
+    game_id: int,
+    msg_type: str,
+    message_data: dict,
+):
+    """Handle one client message"""
+    if msg_type == "ping":
+        await manager.send_personal_message({"type": "pong"}, websocket)
+
+    elif msg_type == "pong":
+        # Answer to a server heartbeat; receiving it already updated last_seen
+        pass
+
+    elif msg_type in COMMANDS:
+        await run_command(websocket, sessions, game_id, msg_type, message_data)
+
+    elif msg_type == "pause_toggle":
+        await toggle_pause(websocket, sessions, game_id, message_data)
+
+    elif msg_type == "game_result":
+        # Broadcast game result (victory/defeat) to all players
+        result = message_data.get("result", "")
+        await manager.broadcast_to_game(
+            game_id, {"type": "game_result", "data": {"result": result}}
+        )
+
+    elif msg_type == "request_update":
+        # Send current game state (public view; deltas follow from its version)
+        state = await load_game(sessions, game_id)
+        if state is None:
+            return
+        game_state = get_snapshot(state).public
+
+        await manager.send_personal_message(
+            {"type": "game_update", "data": game_state}, websocket
+        )
+
+
+async def toggle_pause(
+    websocket: WebSocket,
+    sessions: async_sessionmaker,
+    game_id: int,
+    message_data: dict,
+):
+    """Pause or resume the phase timer (host only) and tell every player"""
+    state = await load_game(sessions, game_id)
+    if state is None or manager.connection_player_map.get(websocket) != state.host_id:
+        return
+
+    async def command():
+        if message_data.get("paused", False):
+            return phase_scheduler.pause(state)
+        return phase_scheduler.resume(state)
+
+    if not await game_actors.submit(game_id, command):
+        return
+
+    await manager.broadcast_to_game(
+        game_id,
+        {
+            "type": "timer_paused",
+            "data": {
+                "paused": phase_scheduler.is_paused(game_id),
+                "phase_end_time": state.phase_end_time.isoformat() + "Z"
+                if state.phase_end_time
+                else None,
+            },
+        },
+    )
+
+
+async def run_command(
+    websocket: WebSocket,
+    sessions: async_sessionmaker,
+    game_id: int,
+    msg_type: str,
+    message_data: dict,
+):
+    """Run a player command and acknowledge it
+
+    ``{"type": "vote", "id": 7, "data": {"target_player_id": 3}}`` is answered
+    with ``{"type": "ack", "data": {"id": 7, "ok": true, "result": {...}}}``,
+    or ``"ok": false`` with the HTTP-style ``status`` and ``error`` (500 for
+    unexpected failures, which leave the socket open). The player
+    is the one the socket was bound to at handshake. Commands run on the
+    game's actor, in order with the game's other commands.
+    """
+    action, schema = COMMANDS[msg_type]
+    ack = {"id": message_data.get("id")}
+
+    async def command():
+        async with sessions() as db:
+            game = await game_store.get(db, game_id)
+            player_id = manager.connection_player_map.get(websocket)
+            player = game.players.get(player_id) if game else None
+            if not player:
+                raise ActionError(404, "Player not found")
+
+            return await action(db, game, player, data)
+
+    try:
+        data = schema.model_validate(message_data.get("data") or {})
+        result = await game_actors.submit(game_id, command)
+
+        if hasattr(result, "model_dump"):
+            result = result.model_dump(mode="json")
+        ack.update(ok=True, result=result)
+    except ValidationError as e:
+        errors = "; ".join(error["msg"] for error in e.errors())
+        ack.update(ok=False, status=422, error=errors)
+    except ActionError as e:
+        ack.update(ok=False, status=e.status_code, error=e.detail)
+    except Exception as e:
+        # A bug in one command shouldn't drop the player's socket
+        print(f"WebSocket command {msg_type} failed in game {game_id}: {e!r}")
+        ack.update(ok=False, status=500, error="Internal server error")
+
+    await manager.send_personal_message({"type": "ack", "data": ack}, websocket)
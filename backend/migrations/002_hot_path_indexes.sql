@@ -0,0 +1,13 @@
+-- Migration: Composite indexes for hot lookups
+-- Date: 2026-10-18
+-- Description: Player by (game_id, session_id) and (game_id, status),
+-- chat history by (game_id, timestamp)
+
+CREATE INDEX IF NOT EXISTS ix_players_game_id_session_id
+ON players (game_id, session_id);
+
+CREATE INDEX IF NOT EXISTS ix_players_game_id_status
+ON players (game_id, status);
+
+CREATE INDEX IF NOT EXISTS ix_chat_messages_game_id_timestamp
+ON chat_messages (game_id, timestamp);
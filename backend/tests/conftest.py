@@ -0,0 +1,106 @@
+"""Shared test database setup"""
+
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app import query_stats
+from app.config import settings
+from app.main import app
+from app.database import (
+    get_async_db,
+    get_async_sessionmaker,
+    set_sqlite_pragmas,
+    Base,
+)
+from app.migrations import apply_migrations
+from app.services import game_store
+
+
+# Test database
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+
+for path in ("./test.db", "./test.db-wal", "./test.db-shm"):
+    if os.path.exists(path):
+        os.remove(path)
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# TestClient runs every request on its own event loop, so don't pool connections
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
+
+event.listen(engine, "connect", set_sqlite_pragmas)
+event.listen(async_engine.sync_engine, "connect", set_sqlite_pragmas)
+query_stats.instrument(engine)
+query_stats.instrument(async_engine.sync_engine)
+
+# Fail any request that goes over its query budget
+settings.QUERY_BUDGET_RAISE = True
+
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+app.dependency_overrides[get_async_db] = override_get_async_db
+app.dependency_overrides[get_async_sessionmaker] = lambda: TestingAsyncSessionLocal
+
+# Create tables
+with engine.begin() as conn:
+    Base.metadata.create_all(conn)
+    apply_migrations(conn)
+
+
+def new_client(session_id: str) -> TestClient:
+    return TestClient(app, cookies={"session_id": session_id})
+
+
+def start_game(prefix: str) -> dict:
+    """Create a lobby with 4 players and start it
+
+    The players' clients are ``<prefix>-host`` ("Host") and ``<prefix>-0``..
+    ``<prefix>-2`` ("P0".."P2").
+    """
+    host = new_client(f"{prefix}-host")
+    game = host.post("/api/games/create", json={"player_name": "Host"}).json()
+    for i in range(3):
+        new_client(f"{prefix}-{i}").post(
+            "/api/games/join", json={"code": game["code"], "player_name": f"P{i}"}
+        )
+    assert host.post(f"/api/games/{game['id']}/start").status_code == 200
+    return game
+
+
+@pytest.fixture
+def make_client():
+    """Factory for test clients carrying a session cookie"""
+    return new_client
+
+
+@pytest.fixture
+def started_game():
+    """Factory for started 4-player games (see ``start_game``)"""
+    return start_game
+
+
+@pytest.fixture(scope="session", autouse=True)
+def cleanup_database():
+    """Remove the test database after the run"""
+    yield
+    game_store.clear()
+    engine.dispose()
+    for path in ("./test.db", "./test.db-wal", "./test.db-shm"):
+        if os.path.exists(path):
+            os.remove(path)
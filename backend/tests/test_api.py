@@ -2,34 +2,10 @@
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 
 from app.main import app
-from app.database import get_db, Base
 
 
-# Test database
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-
-def override_get_db():
-    try:
-        db = TestingSessionLocal()
-        yield db
-    finally:
-        db.close()
-
-
-app.dependency_overrides[get_db] = override_get_db
-
-# Create tables
-Base.metadata.create_all(bind=engine)
-
 client = TestClient(app)
 
 
@@ -97,10 +73,3 @@ def test_start_game_minimum_players():
     # Try to start with insufficient players
     start_response = client.post(f"/api/games/{game_id}/start")
     assert start_response.status_code == 400
-
-
-# Cleanup
-import os
-
-if os.path.exists("./test.db"):
-    os.remove("./test.db")
@@ -0,0 +1,87 @@
+"""Test archival of ended games and lobby purge"""
+
+import asyncio
+import json
+import zlib
+from datetime import datetime, timedelta
+
+from app.models import ArchivedGame, ChatMessage, Game, GamePhase, Player
+from app.services import GameArchiver
+
+from .conftest import async_engine, TestingSessionLocal
+
+
+def add_game(db, code, phase, age_hours, players=2, messages=0):
+    """Insert a game whose activity happened ``age_hours`` ago"""
+    when = datetime.utcnow() - timedelta(hours=age_hours)
+    game = Game(code=code, phase=phase, created_at=when)
+    if phase == GamePhase.ENDED:
+        game.ended_at = when
+    db.add(game)
+    db.flush()
+    rows = [
+        Player(game_id=game.id, session_id=f"{code}-{i}", name=f"P{i}", joined_at=when)
+        for i in range(players)
+    ]
+    db.add_all(rows)
+    db.flush()
+    for i in range(messages):
+        db.add(
+            ChatMessage(
+                game_id=game.id, player_id=rows[0].id, message=f"m{i}", timestamp=when
+            )
+        )
+    db.commit()
+    return game.id
+
+
+def test_archive_and_purge():
+    db = TestingSessionLocal()
+    try:
+        ended_id = add_game(db, "ARCH01", GamePhase.ENDED, 48, players=3, messages=4)
+        recent_id = add_game(db, "ARCH02", GamePhase.ENDED, 1)
+        lobby_id = add_game(db, "ARCH03", GamePhase.LOBBY, 12, messages=1)
+        fresh_lobby_id = add_game(db, "ARCH04", GamePhase.LOBBY, 1)
+
+        report = asyncio.run(GameArchiver().run_once(async_engine))
+
+        assert report.games_archived == 1
+        assert report.lobbies_purged == 1
+        assert report.players_deleted == 5
+        assert report.messages_deleted == 5
+        assert 0 < report.bytes_stored < report.bytes_removed
+
+        db.expire_all()
+        remaining = {g.id for g in db.query(Game).filter(Game.code.like("ARCH%"))}
+        assert remaining == {recent_id, fresh_lobby_id}
+        assert db.query(Player).filter(Player.game_id == lobby_id).count() == 0
+        assert (
+            db.query(ChatMessage).filter(ChatMessage.game_id == ended_id).count() == 0
+        )
+
+        archived = db.query(ArchivedGame).filter(ArchivedGame.id == ended_id).one()
+        data = json.loads(zlib.decompress(archived.payload))
+        assert data["game"]["code"] == "ARCH01"
+        assert len(data["players"]) == archived.player_count == 3
+        assert len(data["messages"]) == archived.message_count == 4
+    finally:
+        db.close()
+
+
+def test_player_with_chat_elsewhere_is_kept():
+    """Deleting a player must not orphan their messages in another game"""
+    db = TestingSessionLocal()
+    try:
+        old_id = add_game(db, "ARCH05", GamePhase.ENDED, 48, players=1)
+        live_id = add_game(db, "ARCH06", GamePhase.DISCUSSION, 0, players=0)
+        player = db.query(Player).filter(Player.game_id == old_id).one()
+        db.add(ChatMessage(game_id=live_id, player_id=player.id, message="hi"))
+        db.commit()
+
+        report = asyncio.run(GameArchiver().run_once(async_engine))
+
+        assert report.players_deleted == 0
+        db.expire_all()
+        assert db.get(Player, player.id).game_id is None
+    finally:
+        db.close()
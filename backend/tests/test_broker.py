@@ -0,0 +1,133 @@
+"""Test broadcasts across workers through the local broker"""
+
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.websockets.broker import InProcessBroker, LocalBroker, create_broker
+from app.websockets.connection_manager import ConnectionManager
+
+from .test_connection_manager import FakeWebSocket
+
+
+async def wait_for(predicate, timeout: float = 1.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+def test_broadcast_reaches_other_workers(tmp_path):
+    path = str(tmp_path / "ws.sock")
+
+    async def run():
+        workers = [ConnectionManager() for _ in range(3)]
+        for worker in workers:
+            await worker.start(LocalBroker(path))
+        assert workers[0].broker.hub is not None
+        assert all(w.broker.hub is None for w in workers[1:])
+
+        in_game, other_game, sender = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await workers[1].connect(in_game, 1)
+        await workers[2].connect(other_game, 2)
+        await workers[0].connect(sender, 1)
+        await asyncio.sleep(0.05)
+
+        await workers[0].broadcast_to_game(
+            1, {"type": "chat", "data": {"message": "hi"}}, exclude=sender
+        )
+        await wait_for(lambda: in_game.sent)
+        await asyncio.sleep(0.05)
+
+        for worker in workers:
+            await worker.stop()
+        return in_game, other_game, sender
+
+    in_game, other_game, sender = asyncio.run(run())
+
+    assert [m["data"]["message"] for m in in_game.sent] == ["hi"]
+    assert other_game.sent == []
+    assert sender.sent == []
+
+
+def test_forwarded_broadcast_is_numbered_and_replayable(tmp_path):
+    path = str(tmp_path / "ws.sock")
+
+    async def run():
+        origin, local = ConnectionManager(), ConnectionManager()
+        await origin.start(LocalBroker(path))
+        await local.start(LocalBroker(path))
+
+        ws = FakeWebSocket()
+        await local.connect(ws, 1)
+        local.resume(ws)
+        await local.send_chat_message(1, "P1", "local")
+        await asyncio.sleep(0.05)
+        # The origin's own stream is further along than this worker's
+        for i in range(3):
+            await origin.send_chat_message(1, "P2", f"remote {i}")
+        await wait_for(lambda: len(ws.sent) == 5)
+        local.disconnect(ws)
+
+        back = FakeWebSocket()
+        await local.connect(back, 1)
+        local.resume(back, (ws.sent[0]["data"]["stream"], ws.sent[2]["seq"]))
+        await asyncio.sleep(0.05)
+
+        await local.stop()
+        await origin.stop()
+        return ws, back
+
+    ws, back = asyncio.run(run())
+
+    assert [m["seq"] for m in ws.sent[1:]] == [1, 2, 3, 4]
+    assert [m["data"]["message"] for m in back.sent[1:]] == ["remote 1", "remote 2"]
+
+
+def test_remote_broker_needs_game_affinity(monkeypatch):
+    monkeypatch.setattr(settings, "WS_BROKER", "local")
+    monkeypatch.setattr(settings, "WS_GAME_AFFINITY", False)
+    with pytest.raises(RuntimeError):
+        create_broker()
+
+    monkeypatch.setattr(settings, "WS_GAME_AFFINITY", True)
+    assert isinstance(create_broker(), LocalBroker)
+
+
+def test_worker_takes_over_hub(tmp_path):
+    path = str(tmp_path / "ws.sock")
+
+    async def run():
+        first, second, third = ConnectionManager(), ConnectionManager(), None
+        await first.start(LocalBroker(path))
+        await second.start(LocalBroker(path))
+
+        ws = FakeWebSocket()
+        await second.connect(ws, 7)
+
+        # The hub's worker exits; the survivor becomes the hub and keeps
+        # its subscriptions
+        await first.stop()
+        await wait_for(lambda: second.broker.hub is not None)
+
+        third = ConnectionManager()
+        await third.start(LocalBroker(path))
+        await asyncio.sleep(0.05)
+        await third.send_chat_message(7, "P1", "still here")
+        await wait_for(lambda: ws.sent)
+
+        await third.stop()
+        await second.stop()
+        return ws
+
+    ws = asyncio.run(run())
+    assert ws.sent[0]["data"]["message"] == "still here"
+
+
+def test_default_broker_is_in_process(monkeypatch):
+    assert isinstance(create_broker(), InProcessBroker)
+
+    # A Redis URL set for something else doesn't switch brokers
+    monkeypatch.setattr(settings, "REDIS_URL", "redis://localhost:6379/0")
+    assert isinstance(create_broker(), InProcessBroker)
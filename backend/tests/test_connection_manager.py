@@ -0,0 +1,299 @@
+"""Test WebSocket broadcast fan-out"""
+
+import asyncio
+import json
+import time
+from unittest.mock import ANY
+
+import msgpack
+
+from app.config import settings
+from app.websockets.connection_manager import ConnectionManager
+from app.websockets.protocols import JSON, MSGPACK
+
+
+class FakeWebSocket:
+    """Records messages; optionally takes ``delay`` seconds per send"""
+
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.sent = []
+        self.binary_frames = 0
+        self.closed_with = None
+
+    async def accept(self, subprotocol=None):
+        self.subprotocol = subprotocol
+
+    async def send_text(self, data):
+        await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(data))
+
+    async def send_bytes(self, data):
+        await asyncio.sleep(self.delay)
+        self.binary_frames += 1
+        self.sent.append(msgpack.unpackb(data, strict_map_key=False))
+
+    async def close(self, code: int = 1000):
+        self.closed_with = code
+
+
+def test_slow_client_does_not_delay_others(monkeypatch):
+    monkeypatch.setattr(settings, "WS_SEND_TIMEOUT_MS", 50)
+    monkeypatch.setattr(settings, "WS_MAX_MISSED_SENDS", 2)
+
+    async def run():
+        manager = ConnectionManager()
+        fast = [FakeWebSocket() for _ in range(15)]
+        slow = FakeWebSocket(delay=5)
+        for ws in [*fast, slow]:
+            await manager.connect(ws, 1)
+
+        started = time.monotonic()
+        await manager.send_phase_change(1, "voting")
+        await manager.send_phase_change(1, "reveal")
+        assert time.monotonic() - started < 0.01
+
+        await asyncio.sleep(0.2)
+        assert all(len(ws.sent) == 2 for ws in fast)
+
+        # Second miss in a row: evicted
+        assert slow not in manager.active_connections[1]
+        assert manager.evicted_count == 1
+        assert slow.closed_with == 1013
+
+    asyncio.run(run())
+
+
+def test_successful_send_resets_missed_count(monkeypatch):
+    monkeypatch.setattr(settings, "WS_SEND_TIMEOUT_MS", 50)
+    monkeypatch.setattr(settings, "WS_MAX_MISSED_SENDS", 2)
+
+    async def run():
+        manager = ConnectionManager()
+        flaky = FakeWebSocket(delay=5)
+        await manager.connect(flaky, 1)
+
+        for delay in (5, 0, 5):
+            flaky.delay = delay
+            await manager.send_chat_message(1, "P1", "hi")
+            await asyncio.sleep(0.1)
+
+        assert flaky in manager.active_connections[1]
+        assert manager.evicted_count == 0
+
+    asyncio.run(run())
+
+
+def test_queued_state_updates_coalesce():
+    """Only the newest game_update is sent; chat is always delivered"""
+
+    async def run():
+        manager = ConnectionManager()
+        ws = FakeWebSocket(delay=0.01)
+        await manager.connect(ws, 1)
+
+        for i in range(5):
+            await manager.send_game_update(1, {"round": i})
+            await manager.send_chat_message(1, "P1", f"msg {i}")
+        await asyncio.sleep(0.2)
+        return ws
+
+    ws = asyncio.run(run())
+
+    updates = [m["data"] for m in ws.sent if m["type"] == "game_update"]
+    chats = [m["data"]["message"] for m in ws.sent if m["type"] == "chat"]
+    assert updates == [{"round": 4}]
+    assert chats == [f"msg {i}" for i in range(5)]
+    # The surviving update keeps its place after the messages queued before it
+    assert [m["type"] for m in ws.sent[-2:]] == ["game_update", "chat"]
+
+
+def test_queued_vote_updates_all_delivered():
+    """Each vote_update only lists the players it changed, so none is dropped"""
+
+    async def run():
+        manager = ConnectionManager()
+        ws = FakeWebSocket(delay=0.01)
+        await manager.connect(ws, 1)
+
+        for i in range(5):
+            await manager.send_vote_update(1, {str(i): {"votes_received": 1}})
+        await asyncio.sleep(0.2)
+        return ws
+
+    ws = asyncio.run(run())
+
+    votes = [m["data"] for m in ws.sent if m["type"] == "vote_update"]
+    assert votes == [{str(i): {"votes_received": 1}} for i in range(5)]
+
+
+def test_full_queue_disconnects(monkeypatch):
+    monkeypatch.setattr(settings, "WS_QUEUE_SIZE", 4)
+
+    async def run():
+        manager = ConnectionManager()
+        ws = FakeWebSocket(delay=5)
+        await manager.connect(ws, 1)
+        for i in range(6):
+            await manager.send_chat_message(1, "P1", f"msg {i}")
+        await asyncio.sleep(0)
+        return manager, ws
+
+    manager, ws = asyncio.run(run())
+
+    assert 1 not in manager.active_connections
+    assert manager.evicted_count == 1
+    assert ws.closed_with == 1013
+
+
+def test_broadcast_encoded_once(monkeypatch):
+    calls = []
+    encode = ConnectionManager.encode
+
+    def counting_encode(message, protocol=JSON):
+        calls.append(protocol)
+        return encode(message, protocol)
+
+    monkeypatch.setattr(ConnectionManager, "encode", staticmethod(counting_encode))
+
+    async def run():
+        manager = ConnectionManager()
+        sockets = [FakeWebSocket() for _ in range(16)]
+        for ws in sockets:
+            await manager.connect(ws, 1)
+        await manager.send_vote_update(1, {7: {"votes_received": 2}})
+        await asyncio.sleep(0.01)
+        return sockets
+
+    sockets = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert all(ws.sent[0]["data"] == {"7": {"votes_received": 2}} for ws in sockets)
+
+
+def test_broadcast_encoded_once_per_protocol(monkeypatch):
+    calls = []
+    encode = ConnectionManager.encode
+
+    def counting_encode(message, protocol=JSON):
+        calls.append(protocol)
+        return encode(message, protocol)
+
+    monkeypatch.setattr(ConnectionManager, "encode", staticmethod(counting_encode))
+
+    async def run():
+        manager = ConnectionManager()
+        json_sockets = [FakeWebSocket() for _ in range(4)]
+        msgpack_sockets = [FakeWebSocket() for _ in range(4)]
+        for ws in json_sockets:
+            await manager.connect(ws, 1)
+        for ws in msgpack_sockets:
+            await manager.connect(ws, 1, protocol=MSGPACK)
+        await manager.send_chat_message(1, "P1", "hi")
+        await asyncio.sleep(0.01)
+        return json_sockets, msgpack_sockets
+
+    json_sockets, msgpack_sockets = asyncio.run(run())
+
+    assert sorted(calls) == [JSON, MSGPACK]
+    assert all(ws.binary_frames == 0 for ws in json_sockets)
+    assert all(ws.binary_frames == 1 for ws in msgpack_sockets)
+    assert msgpack_sockets[0].sent == json_sockets[0].sent
+
+
+def test_quiet_clients_are_pinged_then_reaped(monkeypatch):
+    monkeypatch.setattr(settings, "WS_HEARTBEAT_SECONDS", 10)
+    monkeypatch.setattr(settings, "WS_STALE_SECONDS", 20)
+    monkeypatch.setattr(settings, "WS_REAP_SECONDS", 30)
+
+    async def run():
+        manager = ConnectionManager()
+        alive, quiet = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(alive, 1)
+        await manager.connect(quiet, 1)
+        start = manager.last_seen[quiet]
+
+        manager.last_seen[alive] = start + 25
+        assert manager.check_heartbeats(now=start + 25) == 0
+        assert manager.connection_counts(now=start + 25) == {
+            1: {"active": 1, "stale": 1}
+        }
+        await asyncio.sleep(0.01)
+
+        assert manager.check_heartbeats(now=start + 30) == 1
+        await asyncio.sleep(0.01)
+        return manager, alive, quiet
+
+    manager, alive, quiet = asyncio.run(run())
+
+    assert [m["type"] for m in quiet.sent] == ["ping"]
+    assert alive.sent == []
+    assert quiet.closed_with == 1001
+    assert manager.active_connections == {1: [alive]}
+    assert manager.reaped_count == 1
+
+
+def test_reconnecting_client_gets_only_what_it_missed(monkeypatch):
+    monkeypatch.setattr(settings, "WS_REPLAY_SIZE", 4)
+
+    async def run():
+        manager = ConnectionManager()
+        first = FakeWebSocket()
+        await manager.connect(first, 1)
+        manager.resume(first)
+        for i in range(2):
+            await manager.send_chat_message(1, "P1", f"msg {i}")
+        await asyncio.sleep(0.01)
+        manager.disconnect(first)
+
+        # Buffered while nobody is connected
+        for i in range(2, 5):
+            await manager.send_chat_message(1, "P1", f"msg {i}")
+
+        last = first.sent[-1]["seq"]
+        stream = first.sent[0]["data"]["stream"]
+        back = FakeWebSocket()
+        await manager.connect(back, 1)
+        manager.resume(back, (stream, last))
+
+        # Too far behind: the buffer rolled past seq 0
+        late = FakeWebSocket()
+        await manager.connect(late, 1)
+        manager.resume(late, (stream, 0))
+
+        stranger = FakeWebSocket()
+        await manager.connect(stranger, 1)
+        manager.resume(stranger, ("other", last))
+
+        await asyncio.sleep(0.01)
+        return back, late, stranger
+
+    back, late, stranger = asyncio.run(run())
+
+    assert back.sent[0]["data"] == {"stream": ANY, "seq": 5, "replayed": True}
+    assert [m["data"]["message"] for m in back.sent[1:]] == [
+        "msg 2",
+        "msg 3",
+        "msg 4",
+    ]
+    assert [m["seq"] for m in back.sent[1:]] == [3, 4, 5]
+    for ws in (late, stranger):
+        assert [m["type"] for m in ws.sent] == ["resume"]
+        assert ws.sent[0]["data"]["replayed"] is False
+
+
+def test_idle_replay_buffers_expire(monkeypatch):
+    monkeypatch.setattr(settings, "WS_REPLAY_TTL_SECONDS", 60)
+
+    async def run():
+        manager = ConnectionManager()
+        ws = FakeWebSocket()
+        await manager.connect(ws, 1)
+        manager.resume(ws)
+        manager.disconnect(ws)
+        left = manager.replay[1].idle_since
+        assert manager.prune_replay(now=left + 59) == 0
+        assert manager.prune_replay(now=left + 60) == 1
+        return manager
+
+    assert asyncio.run(run()).replay == {}
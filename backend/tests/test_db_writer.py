@@ -0,0 +1,70 @@
+"""Test single-writer commit queue"""
+
+import asyncio
+
+from sqlalchemy import event, select
+
+from app.models import Game
+from app.services import DatabaseWriter
+
+from .conftest import async_engine, TestingAsyncSessionLocal
+
+
+def insert_game(code: str):
+    async def job(session):
+        game = Game(code=code)
+        session.add(game)
+        await session.flush()
+        return game.id
+
+    return job
+
+
+def test_concurrent_writes_share_one_transaction():
+    """Writes submitted together are committed in a single batch"""
+    commits = []
+
+    def on_commit(conn):
+        commits.append(conn)
+
+    event.listen(async_engine.sync_engine, "commit", on_commit)
+
+    async def run():
+        writer = DatabaseWriter()
+        ids = await asyncio.gather(
+            *(writer.submit(async_engine, insert_game(f"WB{i:04d}")) for i in range(5))
+        )
+        await writer.stop()
+        return ids
+
+    try:
+        ids = asyncio.run(run())
+    finally:
+        event.remove(async_engine.sync_engine, "commit", on_commit)
+
+    assert len(set(ids)) == 5
+    assert len(commits) == 1
+
+
+def test_failing_write_does_not_fail_batch():
+    """A bad write raises for its caller only"""
+
+    async def broken(session):
+        raise ValueError("boom")
+
+    async def run():
+        writer = DatabaseWriter()
+        results = await asyncio.gather(
+            writer.submit(async_engine, insert_game("WBOK01")),
+            writer.submit(async_engine, broken),
+            return_exceptions=True,
+        )
+        await writer.stop()
+        async with TestingAsyncSessionLocal() as db:
+            stored = await db.scalar(select(Game.id).where(Game.code == "WBOK01"))
+        return results, stored
+
+    (good, bad), stored = asyncio.run(run())
+
+    assert isinstance(bad, ValueError)
+    assert stored == good
@@ -0,0 +1,58 @@
+"""Test conditional GETs on game state endpoints"""
+
+from fastapi.testclient import TestClient
+
+from app.services import game_store
+
+
+def revalidate(client: TestClient, url: str, etag: str):
+    return client.get(url, headers={"If-None-Match": etag})
+
+
+def test_game_not_modified_until_it_changes(make_client):
+    host = make_client("etag-host")
+    game = host.post("/api/games/create", json={"player_name": "Host"}).json()
+    url = f"/api/games/{game['code']}"
+
+    first = host.get(url)
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    cached = revalidate(host, url, etag)
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["X-DB-Queries"] == "0"
+
+    # Another viewer of the same version gets their own tag
+    other = make_client("etag-other")
+    assert revalidate(other, url, etag).status_code == 200
+
+    other.post("/api/games/join", json={"code": game["code"], "player_name": "P1"})
+    changed = revalidate(host, url, etag)
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert len(changed.json()["players"]) == 2
+
+
+def test_reloaded_game_does_not_reuse_etags(make_client):
+    host = make_client("etag-reload")
+    game = host.post("/api/games/create", json={"player_name": "Host"}).json()
+    url = f"/api/games/{game['code']}"
+    etag = host.get(url).headers["ETag"]
+
+    game_store.evict(game["id"])
+    assert revalidate(host, url, etag).status_code == 200
+
+
+def test_chat_not_modified_until_new_message(make_client):
+    host = make_client("etag-chat")
+    game = host.post("/api/games/create", json={"player_name": "Host"}).json()
+    url = f"/api/chat/{game['id']}/messages"
+
+    etag = host.get(url).headers["ETag"]
+    assert revalidate(host, url, etag).status_code == 304
+
+    host.post(url, json={"message": "hello"})
+    response = revalidate(host, url, etag)
+    assert response.status_code == 200
+    assert [m["message"] for m in response.json()] == ["hello"]
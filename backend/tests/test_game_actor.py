@@ -0,0 +1,71 @@
+"""Test per-game command mailboxes"""
+
+import asyncio
+
+import pytest
+
+from app.services import GameActors
+
+
+def step(log, name):
+    async def command():
+        log.append(f"{name} start")
+        await asyncio.sleep(0.01)
+        log.append(f"{name} end")
+        return name
+
+    return command
+
+
+def test_commands_for_one_game_never_interleave():
+    """Commands for the same game run one at a time, in arrival order"""
+    log = []
+
+    async def run():
+        actors = GameActors()
+        results = await asyncio.gather(
+            *(actors.submit(1, step(log, name)) for name in "abc")
+        )
+        await actors.stop()
+        return results
+
+    assert asyncio.run(run()) == ["a", "b", "c"]
+    assert log == ["a start", "a end", "b start", "b end", "c start", "c end"]
+
+
+def test_games_run_in_parallel():
+    """Commands for different games overlap"""
+    log = []
+
+    async def run():
+        actors = GameActors()
+        await asyncio.gather(
+            actors.submit(1, step(log, "a")), actors.submit(2, step(log, "b"))
+        )
+        await actors.stop()
+
+    asyncio.run(run())
+    assert log[:2] == ["a start", "b start"]
+
+
+def test_nested_command_runs_inline_and_errors_propagate():
+    """A command may submit to its own game; its exception reaches the caller"""
+
+    async def run():
+        actors = GameActors()
+
+        async def inner():
+            raise ValueError("refused")
+
+        async def outer():
+            return await actors.submit(1, inner)
+
+        try:
+            with pytest.raises(ValueError):
+                await asyncio.wait_for(actors.submit(1, outer), 1)
+            # The actor survives a failed command
+            assert await actors.submit(1, step([], "next")) == "next"
+        finally:
+            await actors.stop()
+
+    asyncio.run(run())
@@ -0,0 +1,56 @@
+"""Test versioned game snapshots"""
+
+from unittest.mock import patch
+
+
+from app.services import game_snapshot, game_store
+
+
+def game_clients(make_client, prefix: str):
+    """Clients of a ``started_game``, in join order"""
+    return [make_client(f"{prefix}-host")] + [
+        make_client(f"{prefix}-{i}") for i in range(3)
+    ]
+
+
+def test_viewer_sees_only_own_cards(make_client, started_game):
+    game = started_game("snap-mask")
+    clients = game_clients(make_client, "snap-mask")
+
+    for name, client in zip(["Host", "P0", "P1", "P2"], clients):
+        players = client.get(f"/api/games/{game['code']}").json()["players"]
+        for player in players:
+            if player["name"] == name:
+                assert player["is_me"]
+                assert player["profession"] and player["special_condition"]
+            else:
+                assert not player["is_me"]
+                assert player["profession"] is None
+                assert player["special_condition"] is None
+
+    spectator = make_client("snap-mask-spectator")
+    players = spectator.get(f"/api/games/{game['code']}").json()["players"]
+    assert not any(p["is_me"] or p["profession"] for p in players)
+
+
+def test_snapshot_built_once_per_version(make_client, started_game):
+    game = started_game("snap-version")
+    clients = game_clients(make_client, "snap-version")
+    state = game_store._games[game["id"]]
+
+    with patch.object(
+        game_snapshot, "build_snapshot", wraps=game_snapshot.build_snapshot
+    ) as build:
+        for client in clients:
+            client.get(f"/api/games/{game['code']}")
+        assert build.call_count == 1
+
+        # Revealing a card bumps the version and shows up for everyone
+        clients[1].post(
+            f"/api/games/{game['id']}/reveal-card", json={"card_type": "profession"}
+        )
+        players = clients[2].get(f"/api/games/{game['code']}").json()["players"]
+        assert build.call_count == 2
+
+    revealed = next(p for p in players if p["name"] == "P0")
+    assert revealed["profession"] == state.players[revealed["id"]].profession
@@ -0,0 +1,342 @@
+"""Test in-memory game state store"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import event
+
+from app.models import Game, Player, GamePhase
+from app.services import GameService, db_writer, game_actors, game_store
+from app.services.game_state import GameState
+
+from .conftest import async_engine, TestingAsyncSessionLocal, TestingSessionLocal
+
+
+def test_reads_served_from_memory(make_client):
+    """Repeated reads of a live game issue no SQL"""
+    client = make_client("reader")
+    game = client.post("/api/games/create", json={"player_name": "Host"}).json()
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+    try:
+        for _ in range(3):
+            response = client.get(f"/api/games/{game['code']}")
+            assert response.status_code == 200
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+
+    assert statements == []
+
+
+def test_mutations_written_behind(started_game):
+    """Mutations reach the database only when the store flushes"""
+    game = started_game("flush")
+
+    db = TestingSessionLocal()
+    try:
+        row = db.query(Game).filter(Game.id == game["id"]).first()
+        assert row.phase == GamePhase.LOBBY
+
+        asyncio.run(game_store.flush())
+        db.expire_all()
+
+        row = db.query(Game).filter(Game.id == game["id"]).first()
+        assert row.phase == GamePhase.BUNKER_REVEAL
+        players = db.query(Player).filter(Player.game_id == game["id"]).all()
+        assert len(players) == 4
+        assert all(p.profession for p in players)
+    finally:
+        db.close()
+
+
+def test_evicted_game_reloads_from_database(make_client, started_game):
+    """A flushed game can be evicted and loaded back unchanged"""
+    game = started_game("evict")
+    host = make_client("evict-host")
+    host.post(
+        f"/api/games/{game['id']}/advance-phase",
+        json={"expected_phase": "bunker_reveal", "expected_round": 1},
+    )
+
+    asyncio.run(game_store.flush())
+    game_store.evict(game["id"])
+
+    data = host.get(f"/api/games/{game['code']}").json()
+    assert data["phase"] == "card_reveal"
+    assert data["revealed_bunker_cards"] == 1
+    assert len(data["players"]) == 4
+
+
+def test_advance_phase_is_compare_and_set(make_client, started_game):
+    """A repeated advance with the same expected state changes nothing"""
+    game = started_game("cas")
+    host = make_client("cas-host")
+    expected = {"expected_phase": "bunker_reveal", "expected_round": 1}
+
+    first = host.post(f"/api/games/{game['id']}/advance-phase", json=expected)
+    retry = host.post(f"/api/games/{game['id']}/advance-phase", json=expected)
+
+    assert first.json()["advanced"] is True
+    assert retry.json() == {**first.json(), "advanced": False}
+    assert retry.json()["phase"] == "card_reveal"
+    assert game_store._games[game["id"]].revealed_bunker_cards == 1
+
+
+def test_advance_phase_requires_expected_state(make_client, started_game):
+    """Without the phase and round the caller saw, nothing is advanced"""
+    game = started_game("cas-bare")
+    host = make_client("cas-bare-host")
+    url = f"/api/games/{game['id']}/advance-phase"
+
+    assert host.post(url).status_code == 422
+    assert host.post(url, json={"expected_phase": "bunker_reveal"}).status_code == 422
+    assert game_store._games[game["id"]].phase == GamePhase.BUNKER_REVEAL
+
+
+def test_phase_ends_when_everyone_has_acted(make_client, started_game):
+    """CARD_REVEAL and VOTING end as soon as every living player has acted"""
+    game = started_game("early")
+    state = game_store._games[game["id"]]
+    clients = [make_client("early-host")] + [
+        make_client(f"early-{i}") for i in range(3)
+    ]
+    clients[0].post(
+        f"/api/games/{game['id']}/advance-phase",
+        json={"expected_phase": "bunker_reveal", "expected_round": 1},
+    )
+    assert state.phase == GamePhase.CARD_REVEAL
+
+    for i, client in enumerate(clients):
+        assert state.phase == GamePhase.CARD_REVEAL
+        response = client.post(
+            f"/api/games/{game['id']}/reveal-card", json={"card_type": "profession"}
+        )
+        assert response.status_code == 200
+        assert len(state.round_reveals) == i + 1
+    assert state.phase == GamePhase.DISCUSSION
+
+    # Everyone votes for the host, who votes for the next player
+    state.phase = GamePhase.VOTING
+    players = state.player_list()
+    for i, client in enumerate(clients):
+        target = players[1] if i == 0 else players[0]
+        response = client.post(
+            f"/api/games/{game['id']}/vote", json={"target_player_id": target.id}
+        )
+        assert response.status_code == 200
+    assert state.phase == GamePhase.REVEAL
+    assert len(state.tally.ballots) == state.alive_count == 4
+    # The tally was written to the players when voting ended
+    assert [p.votes_received for p in players] == [3, 1, 0, 0]
+    assert all(p.has_voted for p in players)
+
+
+def full_lobby(make_client, prefix: str) -> GameState:
+    host = make_client(f"{prefix}-host")
+    game = host.post("/api/games/create", json={"player_name": "Host"}).json()
+    for i in range(3):
+        make_client(f"{prefix}-{i}").post(
+            "/api/games/join", json={"code": game["code"], "player_name": f"P{i}"}
+        )
+    return game_store._games[game["id"]]
+
+
+def start_meanwhile(state: GameState):
+    """Wrap an async function so the lobby starts once it has run"""
+
+    def wrap(func):
+        async def wrapper(*args):
+            result = await func(*args)
+            async with TestingAsyncSessionLocal() as db:
+                await game_actors.submit(
+                    state.id, lambda: GameService.start_game(db, state.id)
+                )
+            return result
+
+        return wrapper
+
+    return wrap
+
+
+def test_join_refused_if_game_starts_meanwhile(make_client, monkeypatch):
+    """The lobby is checked again once the new player's row exists"""
+    state = full_lobby(make_client, "join-race")
+    monkeypatch.setattr(db_writer, "submit", start_meanwhile(state)(db_writer.submit))
+
+    async def run():
+        async with TestingAsyncSessionLocal() as db:
+            return await GameService.join_game(db, state.code, "Late", "join-late")
+
+    assert asyncio.run(run()) == (None, None)
+    assert state.phase == GamePhase.BUNKER_REVEAL
+    assert len(state.players) == 4
+    db = TestingSessionLocal()
+    try:
+        late = db.query(Player).filter_by(session_id="join-late").one()
+        assert late.game_id is None
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("step", ["find_player", "leave_game"])
+def test_refused_join_keeps_player_in_old_game(make_client, monkeypatch, step):
+    """Whenever the lobby is lost, the player stays host of the game it had"""
+    lobby = full_lobby(make_client, f"rejoin-{step}")
+    mover = make_client(f"rejoin-{step}-mover")
+    old = mover.post("/api/games/create", json={"player_name": "Mover"}).json()
+    old_state = game_store._games[old["id"]]
+    host_id = old_state.host_id
+
+    if step == "find_player":
+        wrapped = start_meanwhile(lobby)(game_store.find_player)
+        monkeypatch.setattr(game_store, "find_player", wrapped)
+    else:
+        wrapped = start_meanwhile(lobby)(GameService._leave_game)
+        monkeypatch.setattr(GameService, "_leave_game", staticmethod(wrapped))
+
+    async def run():
+        async with TestingAsyncSessionLocal() as db:
+            return await GameService.join_game(
+                db, lobby.code, "Mover", f"rejoin-{step}-mover"
+            )
+
+    assert asyncio.run(run()) == (None, None)
+    assert lobby.phase == GamePhase.BUNKER_REVEAL
+    assert len(lobby.players) == 4
+    assert old_state.host_id == host_id
+    assert list(old_state.players) == [host_id]
+    assert game_store._sessions[f"rejoin-{step}-mover"] == (old_state.id, host_id)
+
+
+def test_creating_a_game_leaves_the_old_one(make_client):
+    """The old game loses the player and its host"""
+    host = make_client("leave-host")
+    old = host.post("/api/games/create", json={"player_name": "Host"}).json()
+    make_client("leave-0").post(
+        "/api/games/join", json={"code": old["code"], "player_name": "P0"}
+    )
+
+    new = host.post("/api/games/create", json={"player_name": "Host"}).json()
+
+    old_state = game_store._games[old["id"]]
+    assert old_state.host_id is None
+    assert [p.name for p in old_state.player_list()] == ["P0"]
+    new_state = game_store._games[new["id"]]
+    assert [p.id for p in new_state.player_list()] == [new_state.host_id]
+
+
+def test_failed_action_rolls_back_state(started_game):
+    """An exception inside a unit of work restores the game"""
+    game = started_game("uow")
+    state = game_store._games[game["id"]]
+    asyncio.run(game_store.flush())
+    version = state.version
+    player = state.player_list()[0]
+
+    try:
+        with game_store.unit_of_work(state):
+            state.phase = GamePhase.ENDED
+            player.revealed_cards.append("health")
+            game_store.mark_dirty(state)
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+
+    assert state.phase == GamePhase.BUNKER_REVEAL
+    assert player.revealed_cards == []
+    assert state.version == version
+    assert not state.is_dirty
+
+
+def test_flush_waits_for_open_unit_of_work(started_game):
+    """A half-applied action is never written"""
+    game = started_game("uow-flush")
+    state = game_store._games[game["id"]]
+    asyncio.run(game_store.flush())
+
+    with game_store.unit_of_work(state):
+        state.current_round = 2
+        game_store.mark_dirty(state)
+        assert asyncio.run(game_store.flush()) == 0
+
+    assert state.is_dirty
+    assert asyncio.run(game_store.flush()) == 1
+
+
+def test_cancelled_flush_keeps_games_dirty(started_game, monkeypatch):
+    """A flush cancelled mid-write leaves its games for the final flush"""
+    game = started_game("uow-cancel")
+    state = game_store._games[game["id"]]
+    asyncio.run(game_store.flush())
+    state.current_round = 3
+    game_store.mark_dirty(state)
+    write = db_writer.submit
+
+    async def hang(bind, work):
+        await asyncio.Event().wait()
+
+    async def run():
+        monkeypatch.setattr(db_writer, "submit", hang)
+        flushing = asyncio.create_task(game_store.flush())
+        await asyncio.sleep(0.01)
+        flushing.cancel()
+        await asyncio.gather(flushing, return_exceptions=True)
+        assert state.id in game_store._dirty
+
+        monkeypatch.setattr(db_writer, "submit", write)
+        return await game_store.flush()
+
+    assert asyncio.run(run()) >= 1
+    db = TestingSessionLocal()
+    try:
+        assert db.get(Game, game["id"]).current_round == 3
+    finally:
+        db.close()
+
+
+def test_round_reset_is_one_statement(started_game):
+    """Players changed the same way are written with a single UPDATE"""
+    game = started_game("bulk")
+    state = game_store._games[game["id"]]
+    asyncio.run(game_store.flush())
+
+    with game_store.unit_of_work(state):
+        for player in state.player_list():
+            player.has_voted = True
+        game_store.mark_dirty(state)
+    asyncio.run(game_store.flush())
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with game_store.unit_of_work(state):
+        GameService._next_round(state, state.playing_players(), len(state.players))
+        game_store.mark_dirty(state)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+    try:
+        asyncio.run(game_store.flush())
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+
+    player_updates = [s for s in statements if s.startswith("UPDATE players")]
+    assert len(player_updates) == 1
+    assert "IN" in player_updates[0]
+    assert "profession" not in player_updates[0]
+
+    # Nothing changed since: nothing is written
+    statements.clear()
+    game_store.mark_dirty(state)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+    try:
+        asyncio.run(game_store.flush())
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+    assert statements == []
@@ -0,0 +1,116 @@
+"""Test delta sync over WebSocket"""
+
+import asyncio
+
+
+from app.services import GameService, game_store, get_snapshot
+from app.services.game_snapshot import diff_snapshots
+from app.websockets import game_sync, manager
+
+from .conftest import TestingAsyncSessionLocal
+from .test_connection_manager import FakeWebSocket
+
+
+def test_reveal_broadcasts_small_delta(started_game):
+    game = started_game("sync")
+    state = game_store._games[game["id"]]
+    player = state.player_list()[1]
+    before = state.version
+
+    async def run():
+        ws = FakeWebSocket()
+        await manager.connect(ws, state.id)
+        game_sync.track(state)
+        try:
+            async with TestingAsyncSessionLocal() as db:
+                await GameService.reveal_player_card(
+                    db, state.id, player.id, "profession"
+                )
+            await asyncio.sleep(0.01)
+        finally:
+            manager.disconnect(ws)
+        return ws.sent
+
+    sent = asyncio.run(run())
+
+    deltas = [m["data"] for m in sent if m["type"] == "delta"]
+    assert deltas == [
+        {
+            "gen": state.generation,
+            "from": before,
+            "seq": before + 1,
+            "ops": [
+                {
+                    "op": "player",
+                    "id": player.id,
+                    "set": {
+                        "profession": player.profession,
+                        "revealed_cards": ["profession"],
+                    },
+                }
+            ],
+        }
+    ]
+
+
+def test_no_deltas_without_connections(make_client, started_game):
+    game = started_game("sync-idle")
+    make_client("sync-idle-0").post(
+        f"/api/games/{game['id']}/reveal-card", json={"card_type": "profession"}
+    )
+    assert game["id"] not in game_sync.published
+
+
+def test_deltas_replayed_after_reconnect(started_game):
+    """Changes made while the client was away reach it through the replay"""
+    game = started_game("sync-gap")
+    state = game_store._games[game["id"]]
+    player = state.player_list()[1]
+
+    async def run():
+        ws = FakeWebSocket()
+        await manager.connect(ws, state.id)
+        manager.resume(ws)
+        game_sync.track(state)
+        await asyncio.sleep(0.01)
+        manager.disconnect(ws)
+
+        async with TestingAsyncSessionLocal() as db:
+            await GameService.reveal_player_card(db, state.id, player.id, "profession")
+
+        back = FakeWebSocket()
+        await manager.connect(back, state.id)
+        manager.resume(back, (ws.sent[0]["data"]["stream"], ws.sent[0]["data"]["seq"]))
+        game_sync.track(state)
+        await asyncio.sleep(0.01)
+        manager.disconnect(back)
+        return back.sent
+
+    sent = asyncio.run(run())
+
+    assert sent[0]["data"]["replayed"] is True
+    deltas = [m["data"] for m in sent if m["type"] == "delta"]
+    assert [d["seq"] for d in deltas] == [state.version]
+
+
+def test_delta_applies_over_any_intermediate_version(started_game):
+    """Ops carry absolute values, so a client between versions catches up"""
+    game = started_game("sync-diff")
+    state = game_store._games[game["id"]]
+    first = get_snapshot(state).public
+
+    players = state.player_list()
+    players[0].revealed_cards.append("profession")
+    game_store.mark_dirty(state)
+    middle = get_snapshot(state).public
+
+    players[1].revealed_cards.append("profession")
+    game_store.mark_dirty(state)
+    last = get_snapshot(state).public
+
+    client = {p["id"]: dict(p) for p in middle["players"]}
+    for op in diff_snapshots(first, last):
+        assert op["op"] == "player"
+        client[op["id"]].update(op["set"])
+
+    assert list(client.values()) == last["players"]
@@ -0,0 +1,137 @@
+"""Test the server-side phase timer"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from app.models import GamePhase
+from app.services import PhaseScheduler, game_store, phase_scheduler
+from app.websockets import manager
+
+from .conftest import TestingAsyncSessionLocal
+from .test_connection_manager import FakeWebSocket
+
+
+def make_scheduler(state) -> PhaseScheduler:
+    scheduler = PhaseScheduler()
+    scheduler._sessions = TestingAsyncSessionLocal
+    scheduler.sync(state)
+    return scheduler
+
+
+def test_started_game_is_scheduled(started_game):
+    game = started_game("sched-start")
+    state = game_store._games[game["id"]]
+
+    assert state.phase == GamePhase.BUNKER_REVEAL
+    assert phase_scheduler.deadline(state.id) == state.phase_end_time
+
+
+def test_expired_phase_advances_and_reschedules(started_game):
+    game = started_game("sched-due")
+    state = game_store._games[game["id"]]
+    scheduler = make_scheduler(state)
+    now = datetime.utcnow()
+
+    async def run():
+        ws = FakeWebSocket()
+        await manager.connect(ws, state.id)
+        try:
+            # Not due yet
+            delay = await scheduler.run_due(now)
+            assert delay > 0 and state.phase == GamePhase.BUNKER_REVEAL
+
+            await scheduler.run_due(state.phase_end_time)
+            await scheduler.wait_advancing()
+            await asyncio.sleep(0.01)
+        finally:
+            manager.disconnect(ws)
+        return ws.sent
+
+    sent = asyncio.run(run())
+
+    assert state.phase == GamePhase.CARD_REVEAL
+    # The store listener picked up the next phase's deadline
+    assert phase_scheduler.deadline(state.id) == state.phase_end_time
+    changes = [m["data"] for m in sent if m["type"] == "phase_change"]
+    assert [c["phase"] for c in changes] == ["card_reveal"]
+
+
+def test_stale_deadline_is_skipped(started_game):
+    game = started_game("sched-stale")
+    state = game_store._games[game["id"]]
+    scheduler = make_scheduler(state)
+    old_deadline = state.phase_end_time
+
+    # Host skipped the phase: the new deadline replaces the old one
+    state.phase_end_time = old_deadline + timedelta(seconds=60)
+    game_store.mark_dirty(state)
+    scheduler.sync(state)
+
+    async def run():
+        await scheduler.run_due(old_deadline)
+        await scheduler.wait_advancing()
+
+    asyncio.run(run())
+
+    assert state.phase == GamePhase.BUNKER_REVEAL
+    assert scheduler.deadline(state.id) == state.phase_end_time
+
+
+def test_paused_timer_keeps_remaining_time(started_game):
+    game = started_game("sched-pause")
+    state = game_store._games[game["id"]]
+    scheduler = make_scheduler(state)
+    deadline = state.phase_end_time
+    paused_at = deadline - timedelta(seconds=30)
+
+    assert scheduler.pause(state, now=paused_at)
+    # Unscheduled by the pause, so nothing is started
+    asyncio.run(scheduler.run_due(deadline + timedelta(minutes=5)))
+    assert state.phase == GamePhase.BUNKER_REVEAL
+
+    resumed_at = deadline + timedelta(minutes=5)
+    assert scheduler.resume(state, now=resumed_at)
+    scheduler.sync(state)
+
+    assert state.phase_end_time == resumed_at + timedelta(seconds=30)
+    assert scheduler.deadline(state.id) == state.phase_end_time
+    assert not scheduler.is_paused(state.id)
+
+
+def test_slow_game_does_not_delay_next_deadline(started_game, monkeypatch):
+    game = started_game("sched-slow")
+    state = game_store._games[game["id"]]
+    scheduler = make_scheduler(state)
+    release = None
+
+    async def slow_advance(game_id, deadline):
+        await release.wait()
+
+    monkeypatch.setattr(scheduler, "_advance", slow_advance)
+    scheduler.schedule(-1, state.phase_end_time + timedelta(seconds=10))
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        delay = await asyncio.wait_for(scheduler.run_due(state.phase_end_time), 1)
+        pending = len(scheduler._advancing)
+        release.set()
+        await scheduler.wait_advancing()
+        return delay, pending
+
+    delay, pending = asyncio.run(run())
+    assert (delay, pending) == (10.0, 1)
+    assert not scheduler._advancing
+
+
+def test_rebuild_schedules_running_games_from_database(started_game):
+    game = started_game("sched-rebuild")
+    state = game_store._games[game["id"]]
+    scheduler = PhaseScheduler()
+
+    async def run():
+        await game_store.flush()
+        return await scheduler.rebuild(TestingAsyncSessionLocal)
+
+    assert asyncio.run(run()) >= 1
+    assert scheduler.deadline(state.id) == state.phase_end_time
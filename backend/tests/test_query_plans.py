@@ -0,0 +1,89 @@
+"""Check that every query issued by the routers is index-backed"""
+
+import asyncio
+import re
+
+import pytest
+from sqlalchemy import event
+
+from app.migrations import apply_migrations, get_migration_files
+from app.services import game_store
+
+from .conftest import async_engine, engine
+
+# "SCAN players" or "SCAN players USING INDEX ..." both walk the whole table
+TABLE_SCAN = re.compile(r"^SCAN (?!CONSTANT ROW)")
+
+
+@pytest.fixture
+def issued_queries():
+    """Record every statement the app sends to the database"""
+    statements = {}
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            params = parameters[0] if executemany else parameters
+            statements.setdefault(statement, params)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+def exercise_routers(make_client):
+    """Drive a game through the API, including cold loads from the database"""
+    host = make_client("plan-host")
+    game = host.post("/api/games/create", json={"player_name": "Host"}).json()
+    players = [make_client(f"plan-{i}") for i in range(3)]
+    for i, client in enumerate(players):
+        client.post(
+            "/api/games/join", json={"code": game["code"], "player_name": f"P{i}"}
+        )
+
+    # Force the next requests to load the game back from the database
+    asyncio.run(game_store.flush())
+    game_store.evict(game["id"])
+    host.get(f"/api/games/{game['code']}")
+    asyncio.run(game_store.flush())
+    game_store.evict(game["id"])
+
+    host.post(f"/api/games/{game['id']}/start")
+    host.get(f"/api/games/{game['id']}/my-character")
+    host.post(f"/api/games/{game['id']}/reveal-card", json={"card_type": "profession"})
+    host.post(f"/api/chat/{game['id']}/messages", json={"message": "hello"})
+    host.get(f"/api/chat/{game['id']}/messages")
+    host.post(
+        f"/api/games/{game['id']}/advance-phase",
+        json={"expected_phase": "bunker_reveal", "expected_round": 1},
+    )
+    asyncio.run(game_store.flush())
+
+    # Rejoining from a session whose game isn't loaded looks the player up
+    game_store.evict(game["id"])
+    make_client("plan-0").post("/api/games/create", json={"player_name": "Again"})
+    asyncio.run(game_store.flush())
+
+
+def test_router_queries_use_indexes(issued_queries, make_client):
+    """No query issued while serving the API scans a whole table"""
+    exercise_routers(make_client)
+    assert issued_queries
+
+    scans = {}
+    with engine.connect() as conn:
+        for statement, params in issued_queries.items():
+            plan = conn.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {statement}", params
+            ).fetchall()
+            details = [row[-1] for row in plan]
+            if any(TABLE_SCAN.match(detail) for detail in details):
+                scans[statement] = details
+
+    assert scans == {}
+
+
+def test_migrations_are_idempotent():
+    """Re-running the migrations applies nothing new"""
+    assert any(path.name.startswith("002_") for path in get_migration_files())
+    with engine.begin() as conn:
+        assert apply_migrations(conn) == []
@@ -0,0 +1,83 @@
+"""Test per-request query instrumentation"""
+
+import pytest
+from sqlalchemy import text
+
+from app import query_stats
+from app.config import settings
+from app.services import game_store
+
+from .conftest import engine
+
+
+def test_request_queries_exposed_as_headers(make_client):
+    """Writes queued on the database writer are charged to their request"""
+    host = make_client("qs-host")
+    game = host.post("/api/games/create", json={"player_name": "Host"})
+    assert int(game.headers["X-DB-Queries"]) > 0
+
+    joined = make_client("qs-p1").post(
+        "/api/games/join", json={"code": game.json()["code"], "player_name": "P1"}
+    )
+    assert int(joined.headers["X-DB-Queries"]) > 0
+
+    game_store.evict(game.json()["id"])
+    reloaded = host.get(f"/api/games/{game.json()['code']}")
+    assert int(reloaded.headers["X-DB-Queries"]) > 0
+    assert int(reloaded.headers["X-DB-Rows"]) == 3  # game + 2 players
+
+    cached = host.get(f"/api/games/{game.json()['code']}")
+    assert cached.headers["X-DB-Queries"] == "0"
+
+
+def test_metrics_aggregated_per_endpoint(make_client):
+    """Totals are keyed by route template, not the concrete URL"""
+    query_stats.reset()
+    client = make_client("qs-metrics")
+    code = client.post("/api/games/create", json={"player_name": "Host"}).json()["code"]
+    client.get(f"/api/games/{code}")
+    client.get(f"/api/games/{code}")
+
+    metrics = client.get("/metrics/queries").json()
+    assert metrics["GET /api/games/{game_code}"]["calls"] == 2
+    assert metrics["POST /api/games/create"]["statements"] > 0
+
+
+def test_metrics_labels_are_bounded(make_client):
+    """Unmatched URLs and unknown socket messages don't add labels of their own"""
+    query_stats.reset()
+    client = make_client("qs-bounded")
+    game = client.post("/api/games/create", json={"player_name": "Host"}).json()
+    for i in range(3):
+        client.get(f"/nope/{i}")
+
+    with client.websocket_connect(f"/ws/{game['code']}") as ws:
+        for i in range(3):
+            ws.send_json({"type": f"bogus-{i}"})
+        ws.send_json({"type": "ping"})
+        while ws.receive_json()["type"] != "pong":
+            pass
+
+    metrics = client.get("/metrics/queries").json()
+    assert metrics["GET <unmatched>"]["calls"] == 3
+    assert metrics["WS unknown"]["calls"] == 3
+    assert not any("nope" in label or "bogus" in label for label in metrics)
+
+
+def test_budget_exceeded(monkeypatch):
+    """Going over the budget fails loudly in tests"""
+    monkeypatch.setitem(settings.QUERY_BUDGET_OVERRIDES, "too-many", 1)
+    with pytest.raises(query_stats.QueryBudgetExceeded, match="budget 1"):
+        with query_stats.track("too-many"):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                conn.execute(text("SELECT 2"))
+
+
+def test_repeated_query_flagged():
+    """The same statement in a loop is reported as N+1"""
+    with pytest.raises(query_stats.QueryBudgetExceeded, match="same query"):
+        with query_stats.track("n-plus-one"):
+            with engine.connect() as conn:
+                for i in range(settings.QUERY_REPEAT_LIMIT + 1):
+                    conn.execute(text("SELECT :i"), {"i": i})
@@ -0,0 +1,103 @@
+"""Test the in-memory vote tally"""
+
+import asyncio
+from types import SimpleNamespace
+
+from app.models import GamePhase, PlayerStatus
+from app.services import GameService, game_store
+from app.services.vote_tally import LEADER, VoteTally, vote_weight
+
+from .conftest import TestingAsyncSessionLocal
+
+
+def test_cast_recast_and_cancel_keep_counts():
+    tally = VoteTally()
+    tally.cast(1, 10)
+    tally.cast(2, 10, weight=2)
+    tally.cast(3, 11)
+    assert tally.counts == {10: 3, 11: 1}
+    assert tally.candidates() == (3, {10})
+
+    # Psychologist moves voter 2's double vote
+    assert tally.recast(2, 11) == 10
+    assert tally.counts == {10: 1, 11: 3}
+    assert tally.voted_for(2) == 11
+
+    # Saboteur strikes one vote; Leader doubles a cast ballot
+    assert tally.cancel_one(11)
+    assert tally.candidates() == (2, {11})
+    tally.reweigh(1, 2)
+    assert tally.candidates() == (2, {10, 11})
+
+    # Peacemaker
+    tally.clear()
+    assert tally.candidates() == (0, set())
+    assert not tally.has_voted(1)
+    assert not tally.cancel_one(10)
+
+
+def test_protected_players_are_skipped():
+    tally = VoteTally()
+    tally.cast(1, 10)
+    tally.cast(2, 10)
+    tally.cast(3, 11)
+    tally.protect(10)
+    assert tally.candidates() == (1, {11})
+    tally.protect(11)
+    assert tally.candidates() == (0, set())
+
+
+def test_persist_and_rebuild_round_trip():
+    players = [
+        SimpleNamespace(
+            id=i,
+            name=f"P{i}",
+            votes_received=0,
+            has_voted=False,
+            voted_for=None,
+            special_condition={"name": LEADER} if i == 1 else None,
+            special_used=i == 1,
+            special_data={"protected_player": 3, "round": 2} if i == 2 else None,
+        )
+        for i in range(1, 4)
+    ]
+    assert vote_weight(players[0]) == 2
+
+    tally = VoteTally()
+    tally.cast(1, 2, vote_weight(players[0]))
+    tally.cast(2, 3)
+    tally.persist(players)
+
+    assert [p.votes_received for p in players] == [0, 2, 1]
+    assert [p.voted_for for p in players] == [2, 3, None]
+
+    rebuilt = VoteTally.from_players(players, current_round=2)
+    assert rebuilt.counts == tally.counts
+    assert rebuilt.ballots == tally.ballots
+    assert rebuilt.protected == {3}
+
+
+def test_elimination_uses_weighted_unprotected_votes(started_game):
+    game = started_game("tally")
+    state = game_store._games[game["id"]]
+    host, p0, p1, p2 = state.player_list()
+    state.phase = GamePhase.VOTING
+
+    # The Leader's vote outweighs two plain votes for someone Guardian protects
+    host.special_condition = {"name": LEADER}
+    host.special_used = True
+    state.tally.protect(p2.id)
+
+    async def run():
+        async with TestingAsyncSessionLocal() as db:
+            assert await GameService.vote_player(db, state.id, host.id, p0.id)
+            assert await GameService.vote_player(db, state.id, p0.id, p2.id)
+            assert await GameService.vote_player(db, state.id, p1.id, p2.id)
+            assert await GameService.vote_player(db, state.id, p2.id, p1.id)
+            # Nothing written to the players until voting ends
+            assert p0.votes_received == 0 and not host.has_voted
+            return await GameService.eliminate_player(db, state.id)
+
+    eliminated = asyncio.run(run())
+    assert eliminated is p0
+    assert p0.status == PlayerStatus.ELIMINATED
@@ -0,0 +1,148 @@
+"""Test the game WebSocket endpoint"""
+
+import msgpack
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from app.schemas import VoteRequest
+from app.services import game_store
+from app.websockets import manager
+from app.websockets.websocket_routes import COMMANDS
+
+
+def test_socket_is_bound_to_player(make_client):
+    host = make_client("ws-host")
+    game = host.post("/api/games/create", json={"player_name": "Host"}).json()
+    host_id = game["players"][0]["id"]
+
+    with host.websocket_connect(f"/ws/{game['code']}") as ws:
+        assert list(manager.connection_player_map.values()) == [host_id]
+
+        # State changed and evicted while connected: the next read is fresh
+        make_client("ws-p1").post(
+            "/api/games/join", json={"code": game["code"], "player_name": "P1"}
+        )
+        game_store.evict(game["id"])
+
+        ws.send_json({"type": "request_update"})
+        message = ws.receive_json()
+        while message["type"] != "game_update":
+            message = ws.receive_json()
+        assert [p["name"] for p in message["data"]["players"]] == ["Host", "P1"]
+
+    assert manager.connection_player_map == {}
+
+
+def test_socket_rejected_for_non_players(make_client):
+    host = make_client("ws-host-2")
+    game = host.post("/api/games/create", json={"player_name": "Host"}).json()
+
+    stranger = make_client("ws-stranger")
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with stranger.websocket_connect(f"/ws/{game['code']}") as ws:
+            ws.receive_json()
+    assert exc.value.code == 1008
+
+
+def test_msgpack_negotiated_when_offered(make_client):
+    host = make_client("ws-msgpack")
+    game = host.post("/api/games/create", json={"player_name": "Host"}).json()
+    url = f"/ws/{game['code']}"
+
+    with host.websocket_connect(
+        url, subprotocols=["bunker.msgpack.v1", "bunker.json.v1"]
+    ) as ws:
+        assert ws.accepted_subprotocol == "bunker.msgpack.v1"
+        assert msgpack.unpackb(ws.receive_bytes())["type"] == "resume"
+        ws.send_json({"type": "ping"})
+        assert msgpack.unpackb(ws.receive_bytes())["type"] == "pong"
+
+    # Older clients offer nothing and get JSON text
+    with host.websocket_connect(url) as ws:
+        assert ws.accepted_subprotocol is None
+        assert ws.receive_json()["type"] == "resume"
+        ws.send_json({"type": "ping"})
+        assert ws.receive_json()["type"] == "pong"
+
+
+def receive_ack(ws) -> dict:
+    message = ws.receive_json()
+    while message["type"] != "ack":
+        message = ws.receive_json()
+    return message["data"]
+
+
+def test_commands_are_acknowledged(make_client, started_game):
+    game = started_game("ws-cmd")
+    host = make_client("ws-cmd-host")
+
+    with host.websocket_connect(f"/ws/{game['code']}") as ws:
+        ws.send_json(
+            {"type": "reveal_card", "id": 1, "data": {"card_type": "profession"}}
+        )
+        assert receive_ack(ws) == {
+            "id": 1,
+            "ok": True,
+            "result": {"message": "Card revealed", "card_type": "profession"},
+        }
+
+        ws.send_json(
+            {"type": "reveal_card", "id": 2, "data": {"card_type": "profession"}}
+        )
+        ack = receive_ack(ws)
+        assert (ack["ok"], ack["status"]) == (False, 400)
+
+        ws.send_json({"type": "reveal_card", "id": 3, "data": {"card_type": "x"}})
+        ack = receive_ack(ws)
+        assert (ack["id"], ack["ok"], ack["status"]) == (3, False, 422)
+
+    state = game_store._games[game["id"]]
+    host_player = state.player_by_session("ws-cmd-host")
+    assert host_player.revealed_cards == ["profession"]
+
+
+def test_failed_command_is_acknowledged_and_socket_stays_open(
+    make_client, started_game, monkeypatch
+):
+    game = started_game("ws-crash")
+    host = make_client("ws-crash-host")
+
+    async def broken(db, game, player, data):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(COMMANDS, "vote", (broken, VoteRequest))
+
+    with host.websocket_connect(f"/ws/{game['code']}") as ws:
+        ws.send_json({"type": "vote", "id": 1, "data": {"target_player_id": 1}})
+        ack = receive_ack(ws)
+        assert (ack["id"], ack["ok"], ack["status"]) == (1, False, 500)
+
+        ws.send_json({"type": "ping"})
+        message = ws.receive_json()
+        while message["type"] != "pong":
+            message = ws.receive_json()
+
+
+def test_chat_command_uses_bound_player_name(make_client):
+    host = make_client("ws-chat-host")
+    game = host.post("/api/games/create", json={"player_name": "Host"}).json()
+
+    with host.websocket_connect(f"/ws/{game['code']}") as ws:
+        ws.send_json(
+            {
+                "type": "chat",
+                "id": "c1",
+                "data": {"message": " hello ", "player_name": "Impostor"},
+            }
+        )
+        broadcast = ws.receive_json()
+        while broadcast["type"] != "chat":
+            broadcast = ws.receive_json()
+        ack = receive_ack(ws)
+
+    assert broadcast["data"]["player_name"] == "Host"
+    assert ack["result"] == broadcast["data"]
+    assert ack["result"]["message"] == "hello"
+
+    messages = host.get(f"/api/chat/{game['id']}/messages").json()
+    assert [m["message"] for m in messages] == ["hello"]
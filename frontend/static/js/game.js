@@ -42,6 +42,11 @@ function gamePage(gameCode) {
         isPaused: false,
         pausedTimeRemaining: 0,
         gameResult: null,  // 'victory' or 'defeat'
+        etags: {},  // url -> ETag of the last response we loaded
+        syncGen: null,  // Snapshot generation/version that WS deltas apply to
+        syncVersion: null,
+        stream: null,  // Server's broadcast stream and the last seq we got from it
+        lastSeq: 0,
 
         // Max rounds based on player count
         get maxRounds() {
@@ -93,9 +98,23 @@ function gamePage(gameCode) {
             return date.toLocaleTimeString('uk-UA', { hour: '2-digit', minute: '2-digit', second: '2-digit' });
         },
 
+        // Conditional GET: resolves to null if nothing changed since the last load
+        async fetchIfChanged(url) {
+            const headers = {};
+            if (this.etags[url]) headers['If-None-Match'] = this.etags[url];
+
+            const response = await fetch(url, { headers, cache: 'no-store' });
+            if (response.status === 304) return null;
+
+            const etag = response.headers.get('ETag');
+            if (response.ok && etag) this.etags[url] = etag;
+            return response;
+        },
+
         async loadGameData() {
             try {
-                const response = await fetch(`/api/games/${this.gameCode}`);
+                const response = await this.fetchIfChanged(`/api/games/${this.gameCode}`);
+                if (!response) return;
                 if (!response.ok) throw new Error('Game not found');
 
                 const data = await response.json();
@@ -113,6 +132,8 @@ function gamePage(gameCode) {
                     bunker_capacity: data.bunker_capacity
                 };
                 this.players = data.players;
+                this.syncGen = data.generation;
+                this.syncVersion = data.version;
 
                 // Find my player
                 this.myPlayer = this.players.find(p => p.is_me) || null;
@@ -127,8 +148,8 @@ function gamePage(gameCode) {
             if (this.game.phase === 'lobby') return;
 
             try {
-                const response = await fetch(`/api/games/${this.game.id}/my-character`);
-                if (response.ok) {
+                const response = await this.fetchIfChanged(`/api/games/${this.game.id}/my-character`);
+                if (response && response.ok) {
                     this.myCharacter = await response.json();
                 }
             } catch (err) {
@@ -141,8 +162,8 @@ function gamePage(gameCode) {
                 const gameId = this.game.id;
                 if (!gameId) return;
 
-                const response = await fetch(`/api/chat/${gameId}/messages`);
-                if (response.ok) {
+                const response = await this.fetchIfChanged(`/api/chat/${gameId}/messages`);
+                if (response && response.ok) {
                     this.messages = await response.json();
                     this.$nextTick(() => this.scrollChatToBottom());
                 }
@@ -151,6 +172,49 @@ function gamePage(gameCode) {
             }
         },
 
+        commandSeq: 0,
+        pendingCommands: {}, // command id -> resolve(ack)
+
+        // Send a command over the socket and wait for its ack. Resolves with
+        // null if the socket isn't open, so the caller can use HTTP instead.
+        sendCommand(type, data) {
+            if (!this.ws || this.ws.readyState !== WebSocket.OPEN) {
+                return Promise.resolve(null);
+            }
+
+            const id = ++this.commandSeq;
+            return new Promise((resolve) => {
+                const timer = setTimeout(() => {
+                    delete this.pendingCommands[id];
+                    resolve({ id, ok: false, error: 'Сервер не відповідає' });
+                }, 10000);
+                this.pendingCommands[id] = (ack) => {
+                    clearTimeout(timer);
+                    resolve(ack);
+                };
+                this.ws.send(JSON.stringify({ type, id, data }));
+            });
+        },
+
+        // Run a player action over the socket, or over HTTP while disconnected.
+        // Resolves with an ack: { ok, result } or { ok: false, status, error }
+        async runAction(type, url, body) {
+            const ack = await this.sendCommand(type, body);
+            if (ack) return ack;
+
+            const response = await fetch(url, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify(body)
+            });
+            const result = await response.json();
+            return response.ok
+                ? { ok: true, result }
+                : { ok: false, status: response.status, error: result.detail };
+        },
+
         connectWebSocket() {
             // Prevent duplicate connections
             if (this.wsConnecting) {
@@ -167,24 +231,26 @@ function gamePage(gameCode) {
 
             this.wsConnecting = true;
             const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-            const wsUrl = `${protocol}//${window.location.host}/ws/${this.gameCode}`;
+            // Ask to resume where we left off; the server replays what we missed
+            const resume = this.stream ? `?stream=${this.stream}&seq=${this.lastSeq}` : '';
+            const wsUrl = `${protocol}//${window.location.host}/ws/${this.gameCode}${resume}`;
 
             console.log('[WS] Connecting to:', wsUrl);
-            this.ws = new WebSocket(wsUrl);
+            // Prefer compact binary frames; the server falls back to JSON
+            this.ws = new WebSocket(wsUrl, ['bunker.msgpack.v1', 'bunker.json.v1']);
+            this.ws.binaryType = 'arraybuffer';
 
             this.ws.onopen = () => {
                 console.log('[WS] WebSocket connected');
                 this.wsConnecting = false;
                 this.wsReconnectAttempts = 0;
-
-                // Request fresh game state when reconnecting
-                if (this.ws.readyState === WebSocket.OPEN) {
-                    this.ws.send(JSON.stringify({ type: 'request_update' }));
-                }
+                // The server's first message says whether we need to reload
             };
 
             this.ws.onmessage = (event) => {
-                const data = JSON.parse(event.data);
+                const data = typeof event.data === 'string'
+                    ? JSON.parse(event.data)
+                    : MsgPack.decode(event.data);
                 this.handleWebSocketMessage(data);
             };
 
@@ -193,10 +259,21 @@ function gamePage(gameCode) {
                 this.wsConnecting = false;
             };
 
-            this.ws.onclose = () => {
+            this.ws.onclose = (event) => {
                 console.log('[WS] WebSocket disconnected');
                 this.wsConnecting = false;
 
+                // Commands still waiting for an ack may or may not have run
+                for (const [id, resolve] of Object.entries(this.pendingCommands)) {
+                    resolve({ id, ok: false, error: "З'єднання втрачено" });
+                }
+                this.pendingCommands = {};
+
+                // 1008: not a player of this game, reconnecting won't help
+                if (event.code === 1008) {
+                    return;
+                }
+
                 // Exponential backoff for reconnection
                 this.wsReconnectAttempts++;
                 const delay = Math.min(1000 * Math.pow(2, this.wsReconnectAttempts), 10000);
@@ -213,7 +290,26 @@ function gamePage(gameCode) {
         handleWebSocketMessage(data) {
             console.log('WebSocket message:', data);
 
+            if (data.seq) {
+                this.lastSeq = data.seq;
+            }
+
             switch (data.type) {
+                case 'resume':
+                    this.handleResume(data.data);
+                    break;
+                case 'ack': {
+                    const resolve = this.pendingCommands[data.data.id];
+                    if (resolve) {
+                        delete this.pendingCommands[data.data.id];
+                        resolve(data.data);
+                    }
+                    break;
+                }
+                case 'ping':
+                    // Server heartbeat: answer so we aren't reaped as a dead socket
+                    this.ws.send(JSON.stringify({ type: 'pong' }));
+                    break;
                 case 'game_update':
                     this.handleGameUpdate(data.data);
                     break;
@@ -223,65 +319,18 @@ function gamePage(gameCode) {
                 case 'player_joined':
                     console.log('[WS] Player joined:', data.data?.player_name);
                     this.addGameLog(`<strong>${data.data?.player_name}</strong> приєднався до гри`, 'join');
-                    // Force reload game data to update player count
-                    this.loadGameData().then(() => {
-                        // Force Alpine reactivity
-                        this.$nextTick(() => {
-                            console.log('[WS] Player list updated, count:', this.playerCount);
-                        });
-                    });
+                    // The player list itself arrives as a delta
                     break;
                 case 'player_left':
                     console.log('[WS] Player left');
                     this.addGameLog('Гравець покинув гру', 'join');
-                    this.loadGameData();
                     break;
                 case 'phase_change':
                     console.log('[WS] Phase change received:', data.data);
-                    const oldPhase = this.game.phase;
-                    this.game.phase = data.data.phase;
-                    this.game.phase_end_time = data.data.phase_end_time;
-                    
-                    // Update current_round if provided
-                    if (data.data.current_round !== undefined && data.data.current_round !== null) {
-                        this.game.current_round = data.data.current_round;
-                    }
-                    
-                    // Log phase change
-                    const phaseNames = {
-                        'lobby': 'Лобі',
-                        'bunker_reveal': '🏠 Відкриття бункера',
-                        'card_reveal': '🎴 Відкриття карток',
-                        'discussion': '💬 Обговорення',
-                        'voting': '🗳️ Голосування',
-                        'reveal': '📊 Результати',
-                        'ended': '🏁 Гра завершена'
-                    };
-                    if (oldPhase !== this.game.phase) {
-                        this.addGameLog(`Фаза: <strong>${phaseNames[this.game.phase] || this.game.phase}</strong>`, 'phase');
-                    }
-                    
-                    console.log(`[WS] Phase changed from ${oldPhase} to ${this.game.phase}, round: ${this.game.current_round}, new end_time: ${this.game.phase_end_time}`);
-                    
-                    // Reset advancing flag and pause when phase changes
-                    this.isAdvancing = false;
-                    this.timerExpiredAt = null;
-                    this.isPaused = false;
-                    
-                    // Update maxPhaseTime for timer circle
-                    this.updateMaxPhaseTime();
-                    
-                    this.startTimer(); // Restart timer with new phase_end_time
-
-                    // Reload character data if game started
-                    if (this.game.phase !== 'lobby') {
-                        this.loadMyCharacter();
-                    }
-
-                    // Force Alpine.js to update by using $nextTick
-                    this.$nextTick(() => {
-                        console.log('[WS] UI updated after phase change to:', this.game.phase);
-                    });
+                    this.handlePhaseChange(data.data);
+                    break;
+                case 'delta':
+                    this.applyDelta(data.data);
                     break;
                 case 'bunker_card_revealed':
                     this.handleBunkerCardRevealed(data.data);
@@ -300,6 +349,9 @@ function gamePage(gameCode) {
                     break;
                 case 'timer_paused':
                     this.isPaused = data.data.paused;
+                    if (data.data.phase_end_time) {
+                        this.game.phase_end_time = data.data.phase_end_time;
+                    }
                     if (this.isPaused) {
                         this.pausedTimeRemaining = this.timeRemaining;
                         this.addGameLog('⏸️ Хост поставив гру на паузу', 'phase');
@@ -315,6 +367,108 @@ function gamePage(gameCode) {
             }
         },
 
+        // Phase changes arrive both as a phase_change event and as a delta;
+        // whichever comes first does the work
+        handlePhaseChange(data) {
+            const oldPhase = this.game.phase;
+            this.game.phase = data.phase;
+            this.game.phase_end_time = data.phase_end_time;
+            
+            // Update current_round if provided
+            if (data.current_round !== undefined && data.current_round !== null) {
+                this.game.current_round = data.current_round;
+            }
+            
+            // Log phase change
+            const phaseNames = {
+                'lobby': 'Лобі',
+                'bunker_reveal': '🏠 Відкриття бункера',
+                'card_reveal': '🎴 Відкриття карток',
+                'discussion': '💬 Обговорення',
+                'voting': '🗳️ Голосування',
+                'reveal': '📊 Результати',
+                'ended': '🏁 Гра завершена'
+            };
+            if (oldPhase !== this.game.phase) {
+                this.addGameLog(`Фаза: <strong>${phaseNames[this.game.phase] || this.game.phase}</strong>`, 'phase');
+            }
+            
+            console.log(`[WS] Phase changed from ${oldPhase} to ${this.game.phase}, round: ${this.game.current_round}, new end_time: ${this.game.phase_end_time}`);
+            
+            // Reset advancing flag and pause when phase changes
+            this.isAdvancing = false;
+            this.timerExpiredAt = null;
+            this.isPaused = false;
+            
+            // Update maxPhaseTime for timer circle
+            this.updateMaxPhaseTime();
+            
+            this.startTimer(); // Restart timer with new phase_end_time
+
+            // Reload character data if game started
+            if (this.game.phase !== 'lobby') {
+                this.loadMyCharacter();
+            }
+
+            // Force Alpine.js to update by using $nextTick
+            this.$nextTick(() => {
+                console.log('[WS] UI updated after phase change to:', this.game.phase);
+            });
+        },
+
+        // Apply a state delta; refetch the snapshot if we missed one
+        applyDelta(delta) {
+            if (this.syncVersion === null) return;  // Initial snapshot not loaded yet
+
+            if (delta.gen === this.syncGen && delta.seq <= this.syncVersion) return;  // Already have it
+            if (delta.gen !== this.syncGen || delta.from === null || this.syncVersion < delta.from) {
+                console.log('[WS] Missed a delta, reloading game state');
+                this.loadGameData();
+                return;
+            }
+
+            for (const op of delta.ops) {
+                if (op.op === 'game') {
+                    const { phase, phase_end_time, current_round, ...rest } = op.set;
+                    Object.assign(this.game, rest);
+                    if (phase !== undefined || phase_end_time !== undefined || current_round !== undefined) {
+                        this.handlePhaseChange({
+                            phase: phase !== undefined ? phase : this.game.phase,
+                            phase_end_time: phase_end_time !== undefined ? phase_end_time : this.game.phase_end_time,
+                            current_round: current_round
+                        });
+                    }
+                } else if (op.op === 'player_added') {
+                    const existing = this.players.find(p => p.id === op.player.id);
+                    if (existing) {
+                        Object.assign(existing, op.player, { is_me: existing.is_me });
+                    } else {
+                        this.players.push(op.player);
+                    }
+                } else if (op.op === 'player') {
+                    const player = this.players.find(p => p.id === op.id);
+                    if (!player) continue;
+                    const { revealed_cards, has_voted, ...rest } = op.set;
+                    if (has_voted && !player.has_voted) {
+                        this.addGameLog(`<strong>${player.name}</strong> проголосував`, 'vote');
+                    }
+                    if (has_voted !== undefined) player.has_voted = has_voted;
+                    if (revealed_cards && player.status === 'playing' && rest.status === undefined) {
+                        revealed_cards
+                            .filter(card => !(player.revealed_cards || []).includes(card))
+                            .forEach(card => this.revealPlayerCard(player, card, rest[card]));
+                    }
+                    Object.assign(player, rest);
+                    if (revealed_cards) player.revealed_cards = revealed_cards;
+                } else if (op.op === 'player_removed') {
+                    this.players = this.players.filter(p => p.id !== op.id);
+                }
+            }
+
+            this.myPlayer = this.players.find(p => p.is_me) || null;
+            this.syncVersion = delta.seq;
+        },
+
         updateMaxPhaseTime() {
             const phaseTimes = {
                 'bunker_reveal': 10,
@@ -341,14 +495,23 @@ function gamePage(gameCode) {
             this.startTimer();
         },
 
+        handleResume(data) {
+            this.stream = data.stream;
+            this.lastSeq = data.seq;
+
+            if (!data.replayed) {
+                // Missed more than the server kept: reload (304s if nothing changed)
+                console.log('[WS] Resync from snapshot');
+                this.loadGameData();
+                this.loadMyCharacter();
+                this.loadMessages();
+            }
+        },
+
         handleChatMessage(data) {
-            // Check if message already exists
-            if (!this.messages.find(m => m.message === data.message && m.player_name === data.player_name)) {
-                this.messages.push({
-                    player_name: data.player_name,
-                    message: data.message,
-                    timestamp: new Date().toISOString()
-                });
+            // Our own message arrives both as the ack and as the broadcast
+            if (!this.messages.find(m => m.id === data.id)) {
+                this.messages.push(data);
                 this.$nextTick(() => this.scrollChatToBottom());
             }
         },
@@ -367,48 +530,55 @@ function gamePage(gameCode) {
         handlePlayerCardRevealed(data) {
             const player = this.players.find(p => p.id === data.player_id);
             if (player) {
-                if (!player.revealed_cards) player.revealed_cards = [];
-                if (!player.revealed_cards.includes(data.card_type)) {
-                    player.revealed_cards.push(data.card_type);
-                    
-                    const cardNames = {
-                        'profession': 'Професію',
-                        'biology': 'Біологію',
-                        'health': 'Здоров\'я',
-                        'hobby': 'Хобі',
-                        'baggage': 'Багаж',
-                        'fact': 'Факт'
-                    };
-                    const cardValue = data.card_value ? `: <em>${data.card_value}</em>` : '';
-                    this.addGameLog(`<strong>${player.name}</strong> відкрив ${cardNames[data.card_type] || data.card_type}${cardValue}`, 'reveal');
-
-                    // Update card value
-                    if (data.card_value) {
-                        player[data.card_type] = data.card_value;
-
-                        // If this is my player, update myPlayer and myCharacter
-                        if (player.is_me) {
-                            this.myPlayer = player;
-                            // Also update myCharacter so UI reflects the change
-                            if (this.myCharacter) {
-                                this.myCharacter[data.card_type] = data.card_value;
-                            }
+                this.revealPlayerCard(player, data.card_type, data.card_value);
+            }
+        },
+
+        // Card reveals arrive both as an event and as a delta; the first one logs
+        revealPlayerCard(player, cardType, cardValue) {
+            if (!player.revealed_cards) player.revealed_cards = [];
+            if (!player.revealed_cards.includes(cardType)) {
+                player.revealed_cards.push(cardType);
+                
+                const cardNames = {
+                    'profession': 'Професію',
+                    'biology': 'Біологію',
+                    'health': 'Здоров\'я',
+                    'hobby': 'Хобі',
+                    'baggage': 'Багаж',
+                    'fact': 'Факт'
+                };
+                const cardValueText = cardValue ? `: <em>${cardValue}</em>` : '';
+                this.addGameLog(`<strong>${player.name}</strong> відкрив ${cardNames[cardType] || cardType}${cardValueText}`, 'reveal');
+
+                // Update card value
+                if (cardValue) {
+                    player[cardType] = cardValue;
+
+                    // If this is my player, update myPlayer and myCharacter
+                    if (player.is_me) {
+                        this.myPlayer = player;
+                        // Also update myCharacter so UI reflects the change
+                        if (this.myCharacter) {
+                            this.myCharacter[cardType] = cardValue;
                         }
                     }
+                }
 
-                    // Add flip animation
-                    const cardEl = document.querySelector(`.player-${player.id}-card-${data.card_type}`);
-                    if (cardEl) {
-                        cardEl.classList.add('flipping');
-                        setTimeout(() => cardEl.classList.remove('flipping'), 600);
-                    }
+                // Add flip animation
+                const cardEl = document.querySelector(`.player-${player.id}-card-${cardType}`);
+                if (cardEl) {
+                    cardEl.classList.add('flipping');
+                    setTimeout(() => cardEl.classList.remove('flipping'), 600);
                 }
             }
         },
 
         handleSpecialCardUsed(data) {
             this.addGameLog(`<strong>${data.player_name}</strong> використав особливу умову: ${data.special_name}`, 'special');
+            // Specials can change hidden cards (including mine), which deltas don't carry
             this.loadGameData();
+            this.loadMyCharacter();
         },
 
         handleVoteUpdate(data) {
@@ -448,9 +618,6 @@ function gamePage(gameCode) {
                 
                 this.addGameLog(`☠️ <strong>${player.name}</strong> був вигнаний з бункера!`, 'eliminate');
             }
-            
-            // Refresh game data to get latest state
-            this.loadGameData();
         },
 
         async sendMessage() {
@@ -459,31 +626,15 @@ function gamePage(gameCode) {
             const gameId = this.game.id;
 
             try {
-                const response = await fetch(`/api/chat/${gameId}/messages`, {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                    },
-                    body: JSON.stringify({
-                        message: this.chatMessage
-                    })
+                // The server broadcasts it to everyone, us included
+                const ack = await this.runAction('chat', `/api/chat/${gameId}/messages`, {
+                    message: this.chatMessage
                 });
 
-                if (response.ok) {
-                    const newMessage = await response.json();
-                    this.messages.push(newMessage);
+                if (ack.ok) {
+                    this.handleChatMessage(ack.result);
                     this.chatMessage = '';
-                    this.$nextTick(() => this.scrollChatToBottom());
-
-                    // Broadcast via WebSocket
-                    if (this.ws && this.ws.readyState === WebSocket.OPEN) {
-                        this.ws.send(JSON.stringify({
-                            type: 'chat',
-                            player_name: this.myPlayer?.name || 'Unknown',
-                            message: newMessage.message
-                        }));
-                    }
-                } else if (response.status === 429) {
+                } else if (ack.status === 429) {
                     alert('Занадто багато повідомлень! Зачекайте трохи.');
                 }
             } catch (err) {
@@ -495,28 +646,18 @@ function gamePage(gameCode) {
             const gameId = this.game.id;
 
             try {
-                const response = await fetch(`/api/games/${gameId}/reveal-card`, {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                    },
-                    body: JSON.stringify({
-                        card_type: cardType
-                    })
+                const ack = await this.runAction('reveal_card', `/api/games/${gameId}/reveal-card`, {
+                    card_type: cardType
                 });
 
-                if (response.ok) {
+                if (ack.ok) {
                     // Update local state
                     if (!this.myCharacter.revealed_cards) {
                         this.myCharacter.revealed_cards = [];
                     }
                     this.myCharacter.revealed_cards.push(cardType);
-
-                    // Broadcast to others
-                    this.loadGameData();
                 } else {
-                    const error = await response.json();
-                    alert(error.detail || 'Не вдалося відкрити картку');
+                    alert(ack.error || 'Не вдалося відкрити картку');
                 }
             } catch (err) {
                 console.error('Reveal card error:', err);
@@ -692,25 +833,16 @@ function gamePage(gameCode) {
                 const confirmed = confirm(`Використати Особливу Умову: ${specialName}?`);
                 if (!confirmed) return;
 
-                // Make API call
-                const response = await fetch(`/api/games/${gameId}/use-special`, {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                    },
-                    body: JSON.stringify(params)
-                });
+                const ack = await this.runAction('use_special', `/api/games/${gameId}/use-special`, params);
 
-                if (response.ok) {
-                    const result = await response.json();
-                    alert(`✅ ${result.message}`);
+                if (ack.ok) {
+                    alert(`✅ ${ack.result.message}`);
 
                     // Refresh data
                     await this.loadGameData();
                     await this.loadMyCharacter();
                 } else {
-                    const error = await response.json();
-                    alert(`❌ ${error.detail || 'Помилка використання особливої умови'}`);
+                    alert(`❌ ${ack.error || 'Помилка використання особливої умови'}`);
                 }
             } catch (err) {
                 console.error('Use special error:', err);
@@ -722,21 +854,14 @@ function gamePage(gameCode) {
             const gameId = this.game.id;
 
             try {
-                const response = await fetch(`/api/games/${gameId}/vote`, {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                    },
-                    body: JSON.stringify({
-                        target_player_id: targetPlayerId
-                    })
+                const ack = await this.runAction('vote', `/api/games/${gameId}/vote`, {
+                    target_player_id: targetPlayerId
                 });
 
-                if (response.ok) {
+                if (ack.ok) {
                     this.myPlayer.has_voted = true;
                 } else {
-                    const error = await response.json();
-                    alert(error.detail || 'Помилка голосування');
+                    alert(ack.error || 'Помилка голосування');
                 }
             } catch (err) {
                 console.error('Vote error:', err);
@@ -785,20 +910,10 @@ function gamePage(gameCode) {
                             console.log(`[TIMER] Phase: ${this.game.phase}, Remaining: ${diff}s, isHost: ${this.isHost}, isAdvancing: ${this.isAdvancing}, phase_end_time: ${this.game.phase_end_time}`);
                         }
 
-                        // Auto-advance phase when timer expires - ONLY HOST can auto-advance
-                        if (diff === 0 && !this.isAdvancing && this.isHost) {
-                            // Track when timer first expired
-                            if (!this.timerExpiredAt) {
-                                this.timerExpiredAt = Date.now();
-                                console.log('[TIMER] ⏰ Timer expired! isHost:', this.isHost, 'Advancing phase...');
-                                this.advancePhase();
-                            }
-                        } else if (diff === 0 && !this.isHost) {
-                            // Non-host players just wait for phase_change from WebSocket
-                            if (!this.timerExpiredAt) {
-                                this.timerExpiredAt = Date.now();
-                                console.log('[TIMER] ⏰ Timer expired, waiting for host to advance phase...');
-                            }
+                        // The server advances the phase when its timer expires
+                        if (diff === 0 && !this.timerExpiredAt) {
+                            this.timerExpiredAt = Date.now();
+                            console.log('[TIMER] ⏰ Timer expired, waiting for phase_change from server...');
                         }
                     } else {
                         this.timeRemaining = 0;
@@ -831,8 +946,14 @@ function gamePage(gameCode) {
             console.log('[ADVANCE] Calling /api/games/' + gameId + '/advance-phase');
 
             try {
+                // Expected state makes retries and double clicks harmless
                 const response = await fetch(`/api/games/${gameId}/advance-phase`, {
-                    method: 'POST'
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({
+                        expected_phase: this.game.phase,
+                        expected_round: this.game.current_round
+                    })
                 });
 
                 console.log('[ADVANCE] Response status:', response.status);
@@ -879,22 +1000,11 @@ function gamePage(gameCode) {
                 return;
             }
 
-            this.isPaused = !this.isPaused;
-            
-            if (this.isPaused) {
-                this.pausedTimeRemaining = this.timeRemaining;
-                this.addGameLog('⏸️ Гра на паузі', 'phase');
-            } else {
-                this.addGameLog('▶️ Гра продовжується', 'phase');
-                // Extend phase_end_time by the paused duration
-                // This is a client-side pause, so we just stop the timer from advancing
-            }
-            
-            // Broadcast pause state to other players via WebSocket
+            // The server pauses its phase timer and broadcasts timer_paused
             if (this.ws && this.ws.readyState === WebSocket.OPEN) {
                 this.ws.send(JSON.stringify({
                     type: 'pause_toggle',
-                    paused: this.isPaused
+                    paused: !this.isPaused
                 }));
             }
         },